@@ -0,0 +1 @@
+"""Pipeline and hot-path benchmarks (see docs/TEST_PLAN.md)."""
@@ -0,0 +1,77 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = os.path.join(ROOT, "services")
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+# Shared package importable without installing it
+if os.path.join(SERVICES, "common") not in sys.path:
+    sys.path.insert(0, os.path.join(SERVICES, "common"))
+
+
+def percentiles(samples_s: Sequence[float]) -> Dict[str, Any]:
+    """count / mean / p50 / p95 / p99 / max, in milliseconds (nearest rank)."""
+    if not samples_s:
+        return {"count": 0}
+    xs = sorted(samples_s)
+    n = len(xs)
+
+    def rank(p: float) -> float:
+        return xs[min(n - 1, max(0, math.ceil(p / 100.0 * n) - 1))]
+
+    return {
+        "count": n,
+        "mean_ms": round(sum(xs) / n * 1000.0, 3),
+        "p50_ms": round(rank(50) * 1000.0, 3),
+        "p95_ms": round(rank(95) * 1000.0, 3),
+        "p99_ms": round(rank(99) * 1000.0, 3),
+        "max_ms": round(xs[-1] * 1000.0, 3),
+    }
+
+
+def timed(fn, repeat: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    out: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def save(kind: str, params: Dict[str, Any], results: Dict[str, Any], out: Optional[str] = None) -> str:
+    """Write {kind, env, params, results} as JSON; default path is bench/results/."""
+    doc = {"kind": kind, "env": environment(), "params": params, "results": results}
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        out = os.path.join(RESULTS_DIR, f"{kind}-{doc['env']['commit'] or 'nogit'}-{stamp}.json")
+    with open(out, "w") as f:
+        json.dump(doc, f, indent=2)
+    return out
@@ -0,0 +1,99 @@
+"""
+Compare two benchmark result files.
+
+    python -m bench.compare baseline.json candidate.json [--threshold 10]
+
+Walks both result trees, pairs up every percentile block (anything with a
+p50_ms) and every throughput figure, and prints the change. Exits 1 if
+a p50/p95 got slower, or a throughput dropped, by more than the
+threshold (percent), so it can gate CI. p99 is shown but not gated (it
+is close to the max at these sample counts), and changes smaller than
+--min-delta-ms are treated as timer noise.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+GATED_LATENCY_KEYS = ("p50_ms", "p95_ms")
+THROUGHPUT_KEYS = ("ops_per_s", "throughput_obs_per_s")
+
+
+def _metrics(node: Any, prefix: str = "") -> Iterator[Tuple[str, str, float, Optional[float]]]:
+    """(name, key, value, p50_ms of the same block) for every comparable number."""
+    if not isinstance(node, dict):
+        return
+    p50 = node.get("p50_ms")
+    for key, value in node.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _metrics(value, name)
+        elif key in LATENCY_KEYS + THROUGHPUT_KEYS and isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, key, float(value), p50
+
+
+def compare(
+    base: Dict[str, Any],
+    cand: Dict[str, Any],
+    threshold_pct: float,
+    min_delta_ms: float = 0.05,
+) -> List[Dict[str, Any]]:
+    before = {name: (v, p50) for name, _, v, p50 in _metrics(base.get("results", {}))}
+    rows: List[Dict[str, Any]] = []
+    for name, key, after, after_p50 in _metrics(cand.get("results", {})):
+        if name not in before or before[name][0] <= 0:
+            continue
+        prev, prev_p50 = before[name]
+        change = (after - prev) / prev * 100.0
+        if key in THROUGHPUT_KEYS:
+            worse = -change
+            # ops/s of a sub-noise call moves with the same timer jitter
+            noise = prev_p50 is not None and after_p50 is not None and abs(after_p50 - prev_p50) < min_delta_ms
+        else:
+            worse = change
+            noise = key not in GATED_LATENCY_KEYS or abs(after - prev) < min_delta_ms
+        rows.append({
+            "metric": name,
+            "before": prev,
+            "after": after,
+            "change_pct": round(change, 1),
+            "regression": worse > threshold_pct and not noise,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.compare", description="Diff two benchmark results")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="latency changes below this are noise")
+    parser.add_argument("--json", action="store_true", help="print rows as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        base = json.load(f)
+    with open(args.candidate) as f:
+        cand = json.load(f)
+    if base.get("kind") != cand.get("kind"):
+        parser.error(f"different benchmark kinds: {base.get('kind')} vs {cand.get('kind')}")
+
+    rows = compare(base, cand, args.threshold, args.min_delta_ms)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"baseline  {base['env'].get('commit')}  {base['env'].get('utc')}")
+        print(f"candidate {cand['env'].get('commit')}  {cand['env'].get('utc')}")
+        for r in rows:
+            flag = "  REGRESSION" if r["regression"] else ""
+            print(f"{r['metric']:60s} {r['before']:>12.3f} -> {r['after']:>12.3f}  {r['change_pct']:+7.1f}%{flag}")
+    regressions = [r for r in rows if r["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Run the pipeline services in one process.
+
+Each service's `app` package is imported under its own alias. Outgoing
+requests to the services' compose URLs (http://track-fusion:8002, ...)
+are dispatched straight into the target ASGI app by a requests transport
+adapter, which also times every call: that is the per-hop breakdown.
+"""
+import contextlib
+import importlib
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import common  # noqa: F401  (puts services/common on sys.path)
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# (service dir, import alias, base URL the other services call it by)
+PIPELINE = [
+    ("audit-log", "bench_audit_log", "http://audit-log:8004"),
+    ("threat-scoring", "bench_threat_scoring", "http://threat-scoring:8003"),
+    ("track-fusion", "bench_track_fusion", "http://track-fusion:8002"),
+    ("sensor-ingest", "bench_sensor_ingest", "http://sensor-ingest:8001"),
+]
+
+
+def load_service(service: str, alias: str, module: str = "main"):
+    """Import services/<service>/app as package `alias`; returns its `module`."""
+    if alias not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(alias, None, is_package=True)
+        spec.submodule_search_locations = [os.path.join(common.SERVICES, service, "app")]
+        sys.modules[alias] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f"{alias}.{module}")
+
+
+class HopRecorder:
+    """Durations per hop name ("track-fusion POST /observations:batch")."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, hop: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.samples.setdefault(hop, []).append(seconds)
+            if not ok:
+                self.errors[hop] = self.errors.get(hop, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                hop: {**common.percentiles(xs), "errors": self.errors.get(hop, 0)}
+                for hop, xs in sorted(self.samples.items())
+            }
+
+
+class _InProcessAdapter(BaseAdapter):
+    def __init__(self, routes: Dict[str, Tuple[str, Any]], hops: HopRecorder):
+        super().__init__()
+        self.routes = routes
+        self.hops = hops
+
+    def send(self, request, **kwargs):
+        for base, (name, client) in self.routes.items():
+            if request.url.startswith(base):
+                break
+        else:
+            raise requests.ConnectionError(f"no in-process route for {request.url}")
+        path = request.url[len(base):] or "/"
+        headers = {k: v for k, v in request.headers.items() if k.lower() != "content-length"}
+
+        t0 = time.perf_counter()
+        r = client.request(request.method, path, content=request.body, headers=headers)
+        self.hops.record(f"{name} {request.method} {path.split('?', 1)[0]}", time.perf_counter() - t0, r.status_code < 400)
+
+        resp = requests.Response()
+        resp.status_code = r.status_code
+        resp._content = r.content
+        resp.headers = CaseInsensitiveDict(r.headers)
+        resp.encoding = "utf-8"
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self) -> None:
+        pass
+
+
+class InProcessPipeline:
+    """
+    Context manager: starts sensor-ingest, track-fusion, threat-scoring and
+    audit-log (lifespans included) and routes their HTTP calls in-process.
+
+    fusion_shards > 1 starts that many track-fusion shards
+    (http://track-fusion-<i>:8002); the compose URL reaches shard 0, which
+    routes to the others like any shard would.
+
+    transport="bus" chains the stages through the in-process bus
+    (PIPELINE_TRANSPORT=bus) instead of HTTP calls; drain() waits for the
+    queues to empty.
+    """
+
+    def __init__(self, data_dir: Optional[str] = None, fusion_shards: int = 1, transport: str = "http"):
+        self.fusion_shards = fusion_shards
+        self.transport = transport
+        self.hops = HopRecorder()
+        self.modules: Dict[str, Any] = {}
+        self.clients: Dict[str, Any] = {}
+        self._data_dir = data_dir
+        self._stack = contextlib.ExitStack()
+        self._orig_get_adapter = None
+
+    def __enter__(self) -> "InProcessPipeline":
+        if self._data_dir is None:
+            self._data_dir = self._stack.enter_context(tempfile.TemporaryDirectory(prefix="iamd-bench-"))
+        # Same wiring as docker-compose, before any service module is imported
+        os.environ.setdefault("JWT_SECRET", "dev_super_secret_change_me")
+        os.environ["AUDIT_URL"] = "http://audit-log:8004"
+        os.environ["THREAT_URL"] = "http://threat-scoring:8003"
+        os.environ["TRACK_FUSION_URL"] = "http://track-fusion:8002"
+        os.environ["AUDIT_DATA_DIR"] = self._data_dir
+        os.environ["STATE_DIR"] = os.path.join(self._data_dir, "state")
+        os.environ["PIPELINE_TRANSPORT"] = self.transport
+        os.environ["BUS_URL"] = ""
+        os.environ.setdefault("RULES_PATH", os.path.join(common.SERVICES, "threat-scoring", "app", "rules.yaml"))
+
+        from fastapi.testclient import TestClient
+
+        routes: Dict[str, Tuple[str, Any]] = {}
+        for service, alias, url in PIPELINE:
+            if service == "track-fusion" and self.fusion_shards > 1:
+                self._start_shards(routes, url)
+                continue
+            module = load_service(service, alias)
+            client = self._stack.enter_context(TestClient(module.app))
+            self.modules[service] = module
+            self.clients[service] = client
+            routes[url] = (service, client)
+
+        adapter = _InProcessAdapter(routes, self.hops)
+        orig = requests.Session.get_adapter
+        self._orig_get_adapter = orig
+
+        def get_adapter(session, url):
+            if any(url.startswith(base) for base in routes):
+                return adapter
+            return orig(session, url)
+
+        requests.Session.get_adapter = get_adapter
+        return self
+
+    def _start_shards(self, routes: Dict[str, Tuple[str, Any]], url: str) -> None:
+        from fastapi.testclient import TestClient
+
+        urls = [f"http://track-fusion-{i}:8002" for i in range(self.fusion_shards)]
+        state_dir = os.environ["STATE_DIR"]
+        os.environ["FUSION_SHARDS"] = ",".join(urls)
+        try:
+            for i, shard_url in enumerate(urls):
+                # Shard modules read their index and state dir at import
+                os.environ["FUSION_SHARD_INDEX"] = str(i)
+                os.environ["STATE_DIR"] = os.path.join(state_dir, f"shard-{i}")
+                module = load_service("track-fusion", f"bench_track_fusion_{i}")
+                client = self._stack.enter_context(TestClient(module.app))
+                self.modules[f"track-fusion-{i}"] = module
+                self.clients[f"track-fusion-{i}"] = client
+                routes[shard_url] = (f"track-fusion-{i}", client)
+        finally:
+            os.environ.pop("FUSION_SHARDS", None)
+            os.environ.pop("FUSION_SHARD_INDEX", None)
+            os.environ["STATE_DIR"] = state_dir
+        self.modules["track-fusion"] = self.modules["track-fusion-0"]
+        self.clients["track-fusion"] = self.clients["track-fusion-0"]
+        routes[url] = ("track-fusion", self.clients["track-fusion-0"])
+
+    def __exit__(self, *exc) -> None:
+        from iamd_common.log import flush
+
+        flush(5.0)
+        if self._orig_get_adapter is not None:
+            requests.Session.get_adapter = self._orig_get_adapter
+        self._stack.close()
+
+    def drain(self, timeout_s: float = 300.0) -> float:
+        """Seconds until the bus has nothing queued or in flight (0 over HTTP)."""
+        if self.transport != "bus":
+            return 0.0
+        from iamd_common.bus import get_bus
+
+        bus = get_bus()
+        t0 = time.perf_counter()
+        while not bus.idle() and time.perf_counter() - t0 < timeout_s:
+            time.sleep(0.01)
+        return time.perf_counter() - t0
+
+    def reset(self) -> None:
+        for service in ("track-fusion", "threat-scoring", "audit-log"):
+            self.clients[service].post("/reset")
@@ -0,0 +1,284 @@
+"""
+Hot-path micro-benchmarks.
+
+    python -m bench.micro
+    python -m bench.micro --tracks 5000 --scan 500 --repeat 50
+
+Times the functions the pipeline spends its time in, on seeded synthetic
+data, without HTTP in the way:
+
+- track-fusion: scan correlation (gate + assignment + Kalman update),
+  TrackStore newest-first page and bbox query
+- threat-scoring: vectorized score_many vs the scalar path, ThreatStore
+  upsert and top-K
+- audit-log: EventLog append_many (no fsync wait) and a filtered query
+- auth: verify_token on a cached token vs a full decode
+- codec: iamd_common.codec dumps/loads of one scan vs the stdlib json module
+- metrics: cost of a histogram observe / counter inc, and the resulting
+  instrumentation overhead per observation (budget: 1 us)
+
+Results go to bench/results/ as JSON (see bench.compare).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from . import common
+
+from iamd_common.scenario import ScenarioGenerator
+
+
+def _case(samples_s: List[float], ops_per_call: int) -> Dict[str, Any]:
+    out = common.percentiles(samples_s)
+    total = sum(samples_s)
+    out["ops_per_call"] = ops_per_call
+    out["ops_per_s"] = round(ops_per_call * len(samples_s) / total, 1) if total > 0 else None
+    return out
+
+
+def _observations(tracks: int, count: int, seed: int) -> List[Dict[str, Any]]:
+    gen = ScenarioGenerator(contacts=tracks, duration_s=3600.0, seed=seed)
+    out: List[Dict[str, Any]] = []
+    for obs in gen.observations():
+        out.append(obs)
+        if len(out) >= count:
+            break
+    return out
+
+
+def bench_track_fusion(args, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from .inproc import load_service
+
+    tf = load_service("track-fusion", "bench_track_fusion")
+    tf.reset()
+    obs = _observations(args.tracks, args.tracks * 2 + args.scan * (args.repeat + 2), args.seed)
+    scans = [obs[i:i + args.scan] for i in range(0, len(obs), args.scan)]
+
+    # Warm the picture so correlation runs against a populated store
+    warm = args.tracks * 2 // args.scan
+    for scan in scans[:warm]:
+        tf._correlate_scan([tf._observed(o) for o in scan])
+
+    timed_scans = iter(scans[warm:])
+    results["track_fusion.correlate_scan"] = _case(
+        common.timed(lambda: tf._correlate_scan([tf._observed(o) for o in next(timed_scans)]), args.repeat),
+        args.scan,
+    )
+    results["track_fusion.store_newest_100"] = _case(
+        common.timed(lambda: tf.TRACKS.newest(100), args.repeat * 10), 1
+    )
+    lat, lon = obs[0]["position"]["lat"], obs[0]["position"]["lon"]
+    results["track_fusion.store_in_bbox"] = _case(
+        common.timed(lambda: tf.TRACKS.in_bbox(lat - 0.5, lon - 0.5, lat + 0.5, lon + 0.5, 500), args.repeat * 10), 1
+    )
+    results["track_fusion.active_tracks"] = len(tf.TRACKS)
+    return [t.to_doc() for t in tf.TRACKS.values()]
+
+
+def bench_threat_scoring(args, results: Dict[str, Any], tracks: List[Dict[str, Any]]) -> None:
+    from .inproc import load_service
+
+    os.environ.setdefault("RULES_PATH", os.path.join(common.SERVICES, "threat-scoring", "app", "rules.yaml"))
+    ts = load_service("threat-scoring", "bench_threat_scoring")
+    scoring = load_service("threat-scoring", "bench_threat_scoring", "scoring")
+    score_features, score_many, track_features = scoring.score_features, scoring.score_many, scoring.track_features
+    ThreatStore = load_service("threat-scoring", "bench_threat_scoring", "store").ThreatStore
+    records = load_service("threat-scoring", "bench_threat_scoring", "records")
+
+    rules = ts.RULES.rules
+    features = [track_features(t) for t in tracks[: args.scan]]
+    n = len(features)
+    results["threat_scoring.score_many"] = _case(common.timed(lambda: score_many(features, rules), args.repeat), n)
+    results["threat_scoring.score_scalar"] = _case(
+        common.timed(lambda: [score_features(f, rules) for f in features], args.repeat), n
+    )
+
+    scored = score_many([track_features(t) for t in tracks], rules)
+    now = time.time()
+    threats = [
+        records.Threat(t["track_id"], t.get("label"), t.get("contact_type"), s[0], records.codes(s[1]), s[2], s[3], now)
+        for t, s in zip(tracks, scored)
+    ]
+    store = ThreatStore(capacity=max(10, len(threats) // 2))
+
+    def upsert_all() -> None:
+        for threat in threats:
+            store.upsert(threat)
+
+    results["threat_scoring.store_upsert"] = _case(common.timed(upsert_all, max(1, args.repeat // 5)), len(threats))
+    results["threat_scoring.store_top_10"] = _case(common.timed(lambda: store.top(10), args.repeat * 10), 1)
+
+
+def bench_audit_log(args, results: Dict[str, Any]) -> None:
+    from .inproc import load_service
+
+    # storage only: importing main would open an EventLog in AUDIT_DATA_DIR
+    EventLog = load_service("audit-log", "bench_audit_log", "storage").EventLog
+
+    actions = ("TRACK_UPDATED", "THREAT_SCORED", "OBSERVATION_BATCH_INGESTED")
+    seq = iter(range(10 ** 9))
+
+    def batch() -> List[Dict[str, Any]]:
+        out = []
+        for _ in range(args.scan):
+            i = next(seq)
+            out.append({
+                "event_id": f"EVT-{i:09d}",
+                "ts_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "source_service": "bench",
+                "action": actions[i % len(actions)],
+                "details": {"track_id": f"TRK-{i % 5000:06d}"},
+            })
+        return out
+
+    with tempfile.TemporaryDirectory(prefix="iamd-bench-audit-") as d:
+        log = EventLog(d, sync=False)
+        try:
+            pending = [batch() for _ in range(args.repeat + 1)]
+            it = iter(pending)
+            results["audit_log.append_many"] = _case(common.timed(lambda: log.append_many(next(it)), args.repeat), args.scan)
+            results["audit_log.query_action_100"] = _case(
+                common.timed(lambda: log.query(limit=100, action="THREAT_SCORED"), args.repeat * 10), 1
+            )
+        finally:
+            log.close()
+
+
+def bench_auth(args, results: Dict[str, Any]) -> None:
+    import jwt
+    from iamd_common import auth
+
+    token = auth.issue_token("bench@sensor.local", "sensor", ttl_seconds=3600)
+    alg, key, _ = auth._key(private=False)
+    auth.verify_token(token)
+    n = args.repeat * 100
+    results["auth.verify_cached"] = _case(common.timed(lambda: auth.verify_token(token), n), 1)
+    results["auth.verify_full_decode"] = _case(
+        common.timed(lambda: jwt.decode(token, key, algorithms=[alg]), n), 1
+    )
+
+
+def bench_codec(args, results: Dict[str, Any]) -> None:
+    from iamd_common import codec
+
+    scan = _observations(args.tracks, args.scan, args.seed)
+    raw = codec.dumps(scan)
+    results["codec.backend"] = codec.backend()
+    results["codec.dumps_scan"] = _case(common.timed(lambda: codec.dumps(scan), args.repeat), len(scan))
+    results["codec.loads_scan"] = _case(common.timed(lambda: codec.loads(raw), args.repeat), len(scan))
+    results["codec.stdlib_dumps_scan"] = _case(
+        common.timed(lambda: json.dumps(scan, separators=(",", ":")).encode(), args.repeat), len(scan)
+    )
+    results["codec.stdlib_loads_scan"] = _case(common.timed(lambda: json.loads(raw), args.repeat), len(scan))
+
+
+# Instrumentation calls on the ingest path: per batch across sensor-ingest,
+# track-fusion and threat-scoring (stage observes, counter incs, clock
+# reads) and per observation (audit enqueue timing per threat upsert).
+# Hand-counted, not measured: the overhead below is an estimate from them.
+METRIC_CALLS_PER_BATCH = {"observe": 10, "inc": 4, "clock": 18}
+METRIC_CALLS_PER_ITEM = {"observe": 1, "inc": 0, "clock": 2}
+METRICS_BUDGET_NS = 1000.0
+
+
+def bench_metrics(args, results: Dict[str, Any]) -> None:
+    from iamd_common.metrics import Counter, Histogram
+
+    h = Histogram("bench_seconds", "bench").labels()
+    c = Counter("bench", "bench").labels()
+    n = 10000
+
+    def observe() -> None:
+        for i in range(n):
+            h.observe(0.0003)
+
+    def inc() -> None:
+        for i in range(n):
+            c.inc()
+
+    def clock() -> None:
+        pc = time.perf_counter
+        for i in range(n):
+            pc()
+
+    def empty() -> None:
+        for i in range(n):
+            pass
+
+    base = min(common.timed(empty, args.repeat))
+    ns = {}
+    for name, fn in (("observe", observe), ("inc", inc), ("clock", clock)):
+        samples = common.timed(fn, args.repeat)
+        results[f"metrics.{name}"] = _case(samples, n)
+        ns[name] = max(0.0, (min(samples) - base) / n * 1e9)
+
+    per_batch = sum(ns[k] * v for k, v in METRIC_CALLS_PER_BATCH.items())
+    per_item = sum(ns[k] * v for k, v in METRIC_CALLS_PER_ITEM.items())
+    per_obs = per_item + per_batch / args.scan
+    # Measured cost per call times the assumed call counts, not a pipeline timing
+    results["metrics.overhead_per_observation_estimate"] = {
+        "call_ns": {k: round(v, 1) for k, v in ns.items()},
+        "calls_per_batch": METRIC_CALLS_PER_BATCH,
+        "calls_per_item": METRIC_CALLS_PER_ITEM,
+        "batch_size": args.scan,
+        "estimated_per_observation_ns": round(per_obs, 1),
+        "budget_ns": METRICS_BUDGET_NS,
+        "estimated_within_budget": per_obs < METRICS_BUDGET_NS,
+    }
+
+
+SUITES: Dict[str, Callable] = {
+    "track_fusion": bench_track_fusion,
+    "threat_scoring": bench_threat_scoring,
+    "audit_log": bench_audit_log,
+    "auth": bench_auth,
+    "codec": bench_codec,
+    "metrics": bench_metrics,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.micro", description="Hot-path micro-benchmarks")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tracks", type=int, default=2000, help="contacts in the warmed picture")
+    parser.add_argument("--scan", type=int, default=250, help="items per timed call (scan / batch size)")
+    parser.add_argument("--repeat", type=int, default=30, help="timed calls per case (queries run 10x)")
+    parser.add_argument("--only", choices=sorted(SUITES), action="append", help="run just these suites")
+    parser.add_argument("--out", help="result file (default bench/results/micro-<commit>-<time>.json)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET", "dev_super_secret_change_me")
+    # Hot paths only: no snapshot/WAL files from the service modules
+    os.environ["STATE_DIR"] = ""
+    selected = args.only or list(SUITES)
+    results: Dict[str, Any] = {}
+    tracks: List[Dict[str, Any]] = []
+    if "track_fusion" in selected or "threat_scoring" in selected:
+        tracks = bench_track_fusion(args, results)
+    if "threat_scoring" in selected:
+        bench_threat_scoring(args, results, tracks)
+    if "audit_log" in selected:
+        bench_audit_log(args, results)
+    if "auth" in selected:
+        bench_auth(args, results)
+    if "codec" in selected:
+        bench_codec(args, results)
+    if "metrics" in selected:
+        bench_metrics(args, results)
+
+    params = {k: v for k, v in vars(args).items() if k != "out"}
+    path = common.save("micro", params, results, args.out)
+    for name, s in results.items():
+        if isinstance(s, dict) and "p50_ms" in s:
+            print(f"{name:36s} p50={s.get('p50_ms')}ms p95={s.get('p95_ms')}ms ops/s={s.get('ops_per_s')}")
+        else:
+            print(f"{name:36s} {json.dumps(s)}")
+    print(f"saved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
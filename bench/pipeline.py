@@ -0,0 +1,229 @@
+"""
+End-to-end pipeline benchmark.
+
+    python -m bench.pipeline                       # services in-process
+    python -m bench.pipeline --mode live           # against running services
+    python -m bench.pipeline --fusion-shards 4     # track-fusion split in 4 shards
+    python -m bench.pipeline --transport bus       # stages chained by queues
+
+Drives a seeded synthetic scenario (iamd_common.scenario) through
+sensor-ingest's batch endpoint and reports throughput plus latency
+percentiles:
+
+- hops: every service-to-service call, timed at the caller (in-process
+  mode only; live mode cannot see inside the services)
+- end_to_end.ingest_response: client -> sensor-ingest -> track-fusion ->
+  threat-scoring and back (the scoring chain is synchronous); with
+  --transport bus only client -> sensor-ingest -> queue, and drain_s /
+  processed_obs_per_s cover the stages catching up
+- end_to_end.audit_visible: batch sent -> its OBSERVATION_BATCH_INGESTED
+  event readable from audit-log
+
+Results go to bench/results/ as JSON (see bench.compare).
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from . import common
+
+from iamd_common.auth import issue_token
+from iamd_common.clients import ServiceClient
+from iamd_common.scenario import ScenarioGenerator, parse_mix
+
+
+def build_batches(args) -> List[List[bytes]]:
+    # Generated up front so generation cost stays out of the measurement
+    gen = ScenarioGenerator(
+        contacts=args.contacts,
+        duration_s=args.duration_s,
+        seed=args.seed,
+        mix=parse_mix(args.mix),
+    )
+    batches: List[List[bytes]] = []
+    batch: List[bytes] = []
+    for i, (_, line) in enumerate(gen.records()):
+        if i >= args.max_obs:
+            break
+        batch.append(line)
+        if len(batch) >= args.batch_max:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class AuditWatcher(threading.Thread):
+    """Polls audit-log and timestamps when each batch's ingest event shows up."""
+
+    def __init__(self, client: ServiceClient, interval_s: float = 0.02):
+        super().__init__(daemon=True)
+        self.client = client
+        self.interval_s = interval_s
+        self.sent: Dict[str, float] = {}      # first observation_id -> send time
+        self.seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def expect(self, first_obs_id: str, t: float) -> None:
+        with self._lock:
+            self.sent[first_obs_id] = t
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.poll()
+            self._done.wait(self.interval_s)
+
+    def poll(self) -> None:
+        try:
+            r = self.client.get("/events", params={"action": "OBSERVATION_BATCH_INGESTED", "limit": 1000})
+            events = r.json() if r.status_code == 200 else []
+        except Exception:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            for evt in events:
+                ids = (evt.get("details") or {}).get("observation_ids") or []
+                if ids and ids[0] in self.sent and ids[0] not in self.seen:
+                    self.seen[ids[0]] = now
+
+    def stop(self, wait_s: float) -> None:
+        deadline = time.perf_counter() + wait_s
+        while time.perf_counter() < deadline and len(self.seen) < len(self.sent):
+            time.sleep(self.interval_s)
+        self._done.set()
+        self.join()
+
+    def latencies(self) -> List[float]:
+        with self._lock:
+            return [self.seen[k] - self.sent[k] for k in self.seen]
+
+
+def drive(
+    ingest: ServiceClient,
+    audit: ServiceClient,
+    batches: List[List[bytes]],
+    concurrency: int,
+    drain: Optional[Callable[[], float]] = None,
+) -> Dict[str, Any]:
+    bearer = "Bearer " + issue_token("bench@sensor.local", "sensor", ttl_seconds=3600)
+    watcher = AuditWatcher(audit)
+    watcher.start()
+
+    lock = threading.Lock()
+    latencies: List[float] = []
+    counts = {"observations": 0, "accepted": 0, "batches_failed": 0}
+
+    def post(lines: List[bytes]) -> None:
+        first_id = json.loads(lines[0])["observation_id"]
+        t0 = time.perf_counter()
+        watcher.expect(first_id, t0)
+        try:
+            r = ingest.post(
+                "/observations:batch",
+                data=b"\n".join(lines),
+                headers={"Authorization": bearer, "Content-Type": "application/x-ndjson"},
+            )
+            ok = r.status_code == 200
+            accepted = r.json().get("accepted", 0) if ok else 0
+        except Exception:
+            ok, accepted = False, 0
+        dt = time.perf_counter() - t0
+        with lock:
+            latencies.append(dt)
+            counts["observations"] += len(lines)
+            counts["accepted"] += accepted
+            counts["batches_failed"] += 0 if ok else 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(post, batches))
+    elapsed = time.perf_counter() - started
+    # Queued transport: wait for the downstream stages to finish the work
+    drain_s = drain() if drain is not None else 0.0
+    watcher.stop(wait_s=10.0)
+
+    processed = elapsed + drain_s
+    return {
+        **counts,
+        "batches": len(batches),
+        "elapsed_s": round(elapsed, 3),
+        "drain_s": round(drain_s, 3),
+        "throughput_obs_per_s": round(counts["observations"] / elapsed, 1) if elapsed > 0 else None,
+        "processed_obs_per_s": round(counts["observations"] / processed, 1) if processed > 0 else None,
+        "end_to_end": {
+            "ingest_response": common.percentiles(latencies),
+            "audit_visible": {**common.percentiles(watcher.latencies()), "missing": len(watcher.sent) - len(watcher.seen)},
+        },
+    }
+
+
+def _bus_drain(bus_url: str) -> Callable[[], float]:
+    """Waits (up to 300 s) for the broker to go idle; returns the time taken."""
+    from iamd_common.bus import HttpBus
+
+    broker = HttpBus(bus_url)
+
+    def drain() -> float:
+        t0 = time.perf_counter()
+        while not broker.idle() and time.perf_counter() - t0 < 300:
+            time.sleep(0.05)
+        return time.perf_counter() - t0
+
+    return drain
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.pipeline", description="End-to-end pipeline benchmark")
+    parser.add_argument("--mode", choices=("inproc", "live"), default="inproc")
+    parser.add_argument("--url", default="http://localhost:8001", help="sensor-ingest (live mode)")
+    parser.add_argument("--audit-url", default="http://localhost:8004", help="audit-log (live mode)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--contacts", type=int, default=2000)
+    parser.add_argument("--duration-s", type=float, default=60.0)
+    parser.add_argument("--mix", default="AIR=0.3,SEA=0.3,BENIGN=0.4")
+    parser.add_argument("--max-obs", type=int, default=20000, help="observations sent")
+    parser.add_argument("--batch-max", type=int, default=250)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fusion-shards", type=int, default=1, help="track-fusion shards (inproc mode)")
+    parser.add_argument("--transport", choices=("http", "bus"), default="http", help="stage chaining (inproc mode)")
+    parser.add_argument("--bus-url", help="broker to drain before stopping the clock (live mode, PIPELINE_TRANSPORT=bus)")
+    parser.add_argument("--out", help="result file (default bench/results/pipeline-<commit>-<time>.json)")
+    args = parser.parse_args(argv)
+
+    batches = build_batches(args)
+    params = {k: v for k, v in vars(args).items() if k != "out"}
+
+    if args.mode == "inproc":
+        from .inproc import InProcessPipeline
+
+        with InProcessPipeline(fusion_shards=args.fusion_shards, transport=args.transport) as pipe:
+            pipe.reset()
+            ingest = ServiceClient("http://sensor-ingest:8001", pool_maxsize=args.concurrency, timeout_s=60)
+            audit = ServiceClient("http://audit-log:8004", timeout_s=10)
+            results = drive(ingest, audit, batches, args.concurrency, pipe.drain if args.transport == "bus" else None)
+            hops = pipe.hops.summary()
+            # The watcher's own polling is not part of the pipeline
+            hops.pop("audit-log GET /events", None)
+            results["hops"] = hops
+            results["fusion_stats"] = pipe.clients["track-fusion"].get("/stats").json()
+    else:
+        ingest = ServiceClient(args.url, pool_maxsize=args.concurrency, timeout_s=60)
+        audit = ServiceClient(args.audit_url, timeout_s=10)
+        drain = _bus_drain(args.bus_url) if args.bus_url else None
+        results = drive(ingest, audit, batches, args.concurrency, drain)
+
+    path = common.save("pipeline", params, results, args.out)
+    print(json.dumps({k: v for k, v in results.items() if k != "hops"}, indent=2))
+    for hop, s in results.get("hops", {}).items():
+        print(f"{hop:45s} n={s['count']:6d} p50={s.get('p50_ms')}ms p95={s.get('p95_ms')}ms p99={s.get('p99_ms')}ms")
+    print(f"saved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,31 @@
+"""
+Shared pytest setup: services/common on sys.path, no state files, and
+a loader that imports a service's `app` package under a fresh alias, so
+every test starts from empty module-level state.
+"""
+import itertools
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "services", "common"))
+sys.path.insert(0, ROOT)
+
+os.environ["STATE_DIR"] = ""
+
+from bench.inproc import load_service  # noqa: E402
+
+_aliases = itertools.count()
+
+
+@pytest.fixture
+def load_app():
+    """load_app("track-fusion") -> a freshly imported app.main module."""
+
+    def load(service: str, module: str = "main"):
+        alias = f"test_{service.replace('-', '_')}_{next(_aliases)}"
+        return load_service(service, alias, module)
+
+    return load
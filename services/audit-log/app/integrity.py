@@ -0,0 +1,141 @@
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+
+# Domain-separated SHA-256 (RFC 6962 style) so a leaf can never pass as a node
+HASH_LEN = 32
+GENESIS = b"\x00" * HASH_LEN
+
+
+def leaf_hash(line: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + line).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def chain_hash(prev: bytes, leaf: bytes) -> bytes:
+    """Link one event to everything before it."""
+    return hashlib.sha256(prev + leaf).digest()
+
+
+def merkle_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """
+    All tree levels, leaves first, root last. An odd node is promoted to the
+    next level unchanged (never duplicated, so no second-preimage trick).
+    """
+    if not leaves:
+        return [[hashlib.sha256(b"").digest()]]
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        cur = levels[-1]
+        nxt = [node_hash(cur[i], cur[i + 1]) for i in range(0, len(cur) - 1, 2)]
+        if len(cur) % 2:
+            nxt.append(cur[-1])
+        levels.append(nxt)
+    return levels
+
+
+def merkle_append(levels: List[List[bytes]], leaf: bytes) -> None:
+    """
+    Add one leaf to levels from merkle_levels (non-empty) in place. Only
+    the right edge changes: O(log n) hashes instead of a rebuild.
+    """
+    levels[0].append(leaf)
+    index = len(levels[0]) - 1
+    for k in range(len(levels)):
+        cur = levels[k]
+        if len(cur) == 1:
+            return   # the root
+        parent = index // 2
+        left = 2 * parent
+        node = node_hash(cur[left], cur[left + 1]) if left + 1 < len(cur) else cur[left]
+        if k + 1 == len(levels):
+            levels.append([])
+        nxt = levels[k + 1]
+        if parent < len(nxt):
+            nxt[parent] = node
+        else:
+            nxt.append(node)
+        index = parent
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    return merkle_levels(leaves)[-1][0]
+
+
+def merkle_path(levels: List[List[bytes]], index: int) -> List[Dict[str, str]]:
+    """Sibling hashes from leaf to root: O(log n) entries."""
+    path: List[Dict[str, str]] = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append({"hash": level[sibling].hex(), "side": "left" if sibling < index else "right"})
+        index //= 2
+    return path
+
+
+def verify_path(leaf: bytes, path: List[Dict[str, str]], root: bytes) -> bool:
+    h = leaf
+    for step in path:
+        sib = bytes.fromhex(step["hash"])
+        h = node_hash(sib, h) if step["side"] == "left" else node_hash(h, sib)
+    return h == root
+
+
+def split_leaves(hashes: bytes) -> List[bytes]:
+    return [hashes[i:i + HASH_LEN] for i in range(0, len(hashes), HASH_LEN)]
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def verify_segment(job: Tuple[int, str, str, int, str, Optional[str], str]) -> Dict[str, Any]:
+    """
+    Re-hash one segment from disk. Runs in a worker process, so segments
+    are checked in parallel; each only needs the chain hash it starts from.
+
+    job = (segment, data_path, hash_path, events, prev_chain_hex,
+           expected_root_hex or None, expected_head_hex)
+    """
+    segment, data_path, hash_path, count, prev_hex, root_hex, head_hex = job
+    out: Dict[str, Any] = {"segment": segment, "events": count, "ok": False, "error": None, "first_bad_index": None}
+    try:
+        with open(data_path, "rb") as f:
+            data = f.read()
+        with open(hash_path, "rb") as f:
+            stored = f.read(count * HASH_LEN)
+    except OSError as e:
+        out["error"] = f"unreadable: {e}"
+        return out
+
+    lines = data.split(b"\n")
+    if len(lines) - 1 < count or len(stored) < count * HASH_LEN:
+        out["error"] = "segment shorter than indexed"
+        return out
+
+    prev = bytes.fromhex(prev_hex)
+    leaves: List[bytes] = []
+    for i in range(count):
+        leaf = leaf_hash(lines[i])
+        prev = chain_hash(prev, leaf)
+        if prev != stored[i * HASH_LEN:(i + 1) * HASH_LEN]:
+            out["error"] = "hash chain broken"
+            out["first_bad_index"] = i
+            return out
+        leaves.append(leaf)
+
+    if prev.hex() != head_hex:
+        out["error"] = "chain head mismatch"
+        return out
+    if root_hex is not None and merkle_root(leaves).hex() != root_hex:
+        out["error"] = "merkle root mismatch"
+        return out
+    out["ok"] = True
+    return out
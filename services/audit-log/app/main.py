@@ -1,31 +1,194 @@
-from fastapi import FastAPI
-from typing import Any, Dict, List
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+import multiprocessing
+import os
+import time
 
-app = FastAPI(title="audit-log", version="0.1.0")
+from iamd_common.codec import JSONDecodeError, loads
+from iamd_common.metrics import CONTENT_TYPE, ITEMS, render, sampled, stage
+from iamd_common.times import parse_time
+from .storage import EventLog
 
-# Demo-only in-memory append-only log
-EVENTS: List[Dict[str, Any]] = []
+# Durable segmented log (see storage.py)
+AUDIT_DATA_DIR = os.getenv("AUDIT_DATA_DIR", "data")
+AUDIT_SEGMENT_MAX_BYTES = int(os.getenv("AUDIT_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+AUDIT_COMMIT_INTERVAL_S = float(os.getenv("AUDIT_COMMIT_INTERVAL_S", "0.005"))
+# "group": POST returns once the group-commit fsync covers the events; "async": before
+AUDIT_SYNC_MODE = os.getenv("AUDIT_SYNC_MODE", "group")
+# Worker processes for GET /verify (segments are re-hashed in parallel)
+# Chain a log written before hash chaining existed (its segments stay "unverified")
+AUDIT_MIGRATE_UNCHAINED = os.getenv("AUDIT_MIGRATE_UNCHAINED", "false").lower() in ("1", "true", "yes")
+AUDIT_VERIFY_WORKERS = int(os.getenv("AUDIT_VERIFY_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+EVENTS = EventLog(
+    AUDIT_DATA_DIR,
+    segment_max_bytes=AUDIT_SEGMENT_MAX_BYTES,
+    commit_interval_s=AUDIT_COMMIT_INTERVAL_S,
+    sync=AUDIT_SYNC_MODE != "async",
+    migrate_unchained=AUDIT_MIGRATE_UNCHAINED,
+)
+
+_VERIFY_POOL: Optional[ProcessPoolExecutor] = None
+
+# Append covers the write and, in group mode, the wait for its fsync
+_APPEND = stage("audit_append")
+_QUERY = stage("audit_query")
+_EVENTS_IN = ITEMS.labels("audit_append")
+
+
+def _storage_gauges() -> Dict[tuple, float]:
+    d = EVENTS.describe()
+    return {
+        ("events",): d["events"],
+        ("durable_events",): d["durable_events"],
+        ("segments",): d["segments"],
+        ("active_segment_bytes",): d["active_segment_bytes"],
+        # written but not yet covered by an fsync (group-commit queue)
+        ("pending_commit",): d["events"] - d["durable_events"],
+    }
+
+
+sampled("iamd_audit_storage", "Audit log storage state", _storage_gauges, ("field",))
+
+
+def _verify_map(fn, jobs):
+    # One segment: not worth a process hop
+    global _VERIFY_POOL
+    jobs = list(jobs)
+    if len(jobs) <= 1 or AUDIT_VERIFY_WORKERS <= 1:
+        return map(fn, jobs)
+    if _VERIFY_POOL is None:
+        _VERIFY_POOL = ProcessPoolExecutor(
+            max_workers=AUDIT_VERIFY_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _VERIFY_POOL.map(fn, jobs)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    EVENTS.flush()
+    if _VERIFY_POOL is not None:
+        _VERIFY_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="audit-log", version="0.2.0", lifespan=_lifespan)
+
+
+def _parse_time(value: Optional[str], name: str) -> Optional[float]:
+    try:
+        return parse_time(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be epoch seconds or ISO-8601")
 
 
 @app.get("/health")
 def health() -> Dict[str, Any]:
-    return {"ok": True, "events": len(EVENTS)}
+    return {"ok": True, "events": len(EVENTS), "storage": EVENTS.describe()}
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    return Response(content=render(), media_type=CONTENT_TYPE)
 
 
 @app.post("/events")
 def add_event(evt: Dict[str, Any]) -> Dict[str, Any]:
-    # Append-only behavior (demo)
+    # Append-only, durable per AUDIT_SYNC_MODE
+    t0 = time.perf_counter()
     EVENTS.append(evt)
-    EVENTS[:] = EVENTS[-10:]
+    _APPEND.observe(time.perf_counter() - t0)
+    _EVENTS_IN.inc()
     return {"stored": True, "count": len(EVENTS)}
 
 
+async def _read_body(request: Request) -> bytes:
+    return await request.body()
+
+
+@app.post("/events:batch")
+def add_events(raw: bytes = Depends(_read_body)) -> Dict[str, Any]:
+    # Batched appends from iamd_common.log's background shipper: one write, one commit
+    try:
+        evts = loads(raw)
+    except JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed batch body: {e}")
+    if not isinstance(evts, list) or not all(isinstance(e, dict) for e in evts):
+        raise HTTPException(status_code=400, detail="Batch body must be a JSON array of events")
+    t0 = time.perf_counter()
+    EVENTS.append_many(evts)
+    _APPEND.observe(time.perf_counter() - t0)
+    _EVENTS_IN.inc(len(evts))
+    return {"stored": True, "received": len(evts), "count": len(EVENTS)}
+
+
 @app.get("/events")
-def get_events() -> List[Dict[str, Any]]:
-    # Return last 10 events for quick viewing
-    return EVENTS[-10:][::-1]
+def get_events(
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    action: Optional[str] = None,
+    source_service: Optional[str] = None,
+    track_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> Response:
+    """
+    Newest-first events (default: latest 10).
+
+    - action / source_service / track_id: exact-match filters (combined with AND)
+    - since (exclusive) / until (inclusive): event time, epoch or ISO-8601
+    - cursor: value of X-Next-Cursor from the previous page
+    """
+    before_seq: Optional[int] = None
+    if cursor:
+        try:
+            before_seq = int(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    t0 = time.perf_counter()
+    lines, next_cursor = EVENTS.query(
+        limit=limit,
+        before_seq=before_seq,
+        action=action,
+        source_service=source_service,
+        track_id=track_id,
+        since_ts=_parse_time(since, "since"),
+        until_ts=_parse_time(until, "until"),
+    )
+    _QUERY.observe(time.perf_counter() - t0)
+
+    # Stored lines are already JSON: splice them into an array as-is
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return Response(content=b"[" + b",".join(lines) + b"]", media_type="application/json", headers=headers)
+
+
+@app.get("/verify")
+def verify() -> Dict[str, Any]:
+    """
+    Re-hash the whole log from disk: hash chain, segment-to-segment links
+    and each sealed segment's Merkle root. ok=false lists the failing
+    segments (and the first bad seq when the chain breaks).
+    """
+    started = time.perf_counter()
+    report = EVENTS.verify(_verify_map)
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+    return report
+
+
+@app.get("/proof/{event_id}")
+def proof(event_id: str) -> Dict[str, Any]:
+    """Merkle inclusion proof for one event (O(log n) sibling hashes)."""
+    out = EVENTS.proof(event_id)
+    if out is None:
+        raise HTTPException(status_code=404, detail="Unknown event_id")
+    return out
+
 
 @app.post("/reset")
 def reset():
+    # Demo reset: drops every segment
     EVENTS.clear()
     return {"ok": True}
@@ -0,0 +1,155 @@
+"""EventLog recovery must surface tampering, not repair it."""
+import os
+
+import pytest
+
+
+@pytest.fixture
+def storage(load_app):
+    return load_app("audit-log", "storage")
+
+
+def _log(storage, data_dir, **kw):
+    return storage.EventLog(str(data_dir), sync=False, commit_interval_s=0, **kw)
+
+
+def _fill(storage, data_dir, count=10, **kw):
+    log = _log(storage, data_dir, **kw)
+    log.append_many([{"event_id": f"e{i}", "action": "TEST", "seq": i} for i in range(count)])
+    log.close()
+
+
+def _edit_line(path, index):
+    with open(path, "rb") as f:
+        lines = f.read().split(b"\n")
+    lines[index] = lines[index].replace(b'"TEST"', b'"TAMPERED"')
+    with open(path, "wb") as f:
+        f.write(b"\n".join(lines))
+
+
+def test_clean_restart_verifies(storage, tmp_path):
+    _fill(storage, tmp_path, segment_max_bytes=200)
+    log = _log(storage, tmp_path, segment_max_bytes=200)
+    assert len(log) == 10
+    assert log.verify()["ok"]
+    log.close()
+
+
+def test_edited_line_with_deleted_chain_file_fails(storage, tmp_path):
+    _fill(storage, tmp_path)
+    _edit_line(tmp_path / "00000001.ndjson", 3)
+    os.remove(tmp_path / "00000001.hash")
+
+    log = _log(storage, tmp_path)
+    log.append_many([{"event_id": "after", "action": "TEST"}])
+    result = log.verify()
+    log.close()
+    assert not result["ok"]
+    assert result["failures"][0]["error"] == "chain file missing"
+    assert not (tmp_path / "00000001.hash").exists()   # not rebuilt
+    # New events go to a fresh segment, never onto the damaged one
+    assert result["segments"] == 2
+
+
+def test_edited_line_with_intact_chain_file_fails(storage, tmp_path):
+    _fill(storage, tmp_path)
+    _edit_line(tmp_path / "00000001.ndjson", 3)
+
+    log = _log(storage, tmp_path)
+    result = log.verify()
+    log.close()
+    assert not result["ok"]
+
+
+def test_sealed_segment_without_manifest_is_not_resealed(storage, tmp_path):
+    _fill(storage, tmp_path, segment_max_bytes=200)
+    os.remove(tmp_path / "00000001.root")
+
+    log = _log(storage, tmp_path, segment_max_bytes=200)
+    result = log.verify()
+    log.close()
+    assert not result["ok"]
+    assert result["failures"][0] == {**result["failures"][0], "segment": 1, "error": "manifest missing or unreadable"}
+    assert not (tmp_path / "00000001.root").exists()
+
+
+def test_truncated_sealed_chain_file_fails(storage, tmp_path):
+    _fill(storage, tmp_path, segment_max_bytes=200)
+    with open(tmp_path / "00000001.hash", "r+b") as f:
+        f.truncate(32)
+    size = os.path.getsize(tmp_path / "00000001.ndjson")
+
+    log = _log(storage, tmp_path, segment_max_bytes=200)
+    result = log.verify()
+    log.close()
+    assert not result["ok"]
+    assert result["failures"][0]["segment"] == 1
+    # Evidence is kept: the sealed segment's lines are not cut to match
+    assert os.path.getsize(tmp_path / "00000001.ndjson") == size
+
+
+def test_truncated_sealed_segment_fails(storage, tmp_path):
+    _fill(storage, tmp_path, segment_max_bytes=200)
+    with open(tmp_path / "00000001.ndjson", "r+b") as f:
+        f.truncate(0)
+
+    log = _log(storage, tmp_path, segment_max_bytes=200)
+    result = log.verify()
+    log.close()
+    assert not result["ok"]
+    assert result["failures"][0]["segment"] == 1
+
+
+def test_torn_active_tail_is_recovered(storage, tmp_path):
+    _fill(storage, tmp_path)
+    with open(tmp_path / "00000001.hash", "r+b") as f:
+        f.truncate(9 * 32 + 5)
+
+    log = _log(storage, tmp_path)
+    assert len(log) == 9
+    assert log.verify()["ok"]
+    log.close()
+
+
+def _strip_chain(data_dir):
+    for name in os.listdir(data_dir):
+        if name.endswith((".hash", ".root")) or name == "FORMAT":
+            os.remove(data_dir / name)
+
+
+def test_edited_log_with_all_chain_files_deleted_fails(storage, tmp_path):
+    _fill(storage, tmp_path, segment_max_bytes=200)
+    _edit_line(tmp_path / "00000001.ndjson", 3)
+    _strip_chain(tmp_path)
+
+    for _ in range(2):
+        log = _log(storage, tmp_path, segment_max_bytes=200)
+        result = log.verify()
+        log.close()
+        assert not result["ok"]
+        assert result["events"] == 10
+        assert {f["error"] for f in result["failures"]} == {"chain file missing"}
+        assert log.stats["migrated_segments"] == 0
+
+
+def test_unchained_log_is_migrated_only_on_opt_in_and_stays_unverified(storage, tmp_path):
+    _fill(storage, tmp_path, segment_max_bytes=200)
+    _strip_chain(tmp_path)
+    segments = len([n for n in os.listdir(tmp_path) if n.endswith(".ndjson")])
+
+    log = _log(storage, tmp_path, segment_max_bytes=200, migrate_unchained=True)
+    assert log.stats["migrated_segments"] == segments
+    log.append_many([{"event_id": "after", "action": "TEST"}])
+    log.close()
+
+    # Restarted without the flag: still flagged, and later events verify
+    log = _log(storage, tmp_path, segment_max_bytes=200)
+    result = log.verify()
+    proof = log.proof("after")
+    log.close()
+    assert not result["ok"]
+    assert result["events"] == 11
+    unverified = [f for f in result["failures"] if f["error"] == storage.MIGRATED_ERROR]
+    assert len(unverified) == len(result["failures"]) == segments
+    assert result["segment_links_ok"]
+    assert proof["verified"]
@@ -0,0 +1,52 @@
+"""Inclusion proofs while the active segment grows."""
+import pytest
+
+
+@pytest.fixture
+def storage(load_app):
+    return load_app("audit-log", "storage")
+
+
+def _events(start, count):
+    return [{"event_id": f"e{i}", "action": "TEST", "seq": i} for i in range(start, start + count)]
+
+
+def test_merkle_append_matches_rebuild(load_app):
+    integrity = load_app("audit-log", "integrity")
+    leaves = [integrity.leaf_hash(str(i).encode()) for i in range(70)]
+    levels = integrity.merkle_levels(leaves[:1])
+    for n in range(2, len(leaves) + 1):
+        integrity.merkle_append(levels, leaves[n - 1])
+        assert levels == integrity.merkle_levels(leaves[:n])
+
+
+def test_active_segment_levels_extended_not_rebuilt(storage, tmp_path, monkeypatch):
+    built = []
+    real = storage.merkle_levels
+    monkeypatch.setattr(storage, "merkle_levels", lambda leaves: built.append(len(leaves)) or real(leaves))
+
+    log = storage.EventLog(str(tmp_path), sync=False, commit_interval_s=0)
+    try:
+        for start in range(0, 40, 8):
+            log.append_many(_events(start, 8))
+            first, last = log.proof("e0"), log.proof(f"e{start + 7}")
+            assert first["verified"] and last["verified"] and not last["sealed"]
+            assert first["merkle_root"] == last["merkle_root"]
+        # Built once on the first proof, then only extended
+        assert built == [8]
+        assert log.verify()["ok"]
+    finally:
+        log.close()
+
+
+def test_proofs_across_a_roll(storage, tmp_path):
+    log = storage.EventLog(str(tmp_path), sync=False, commit_interval_s=0, segment_max_bytes=400)
+    try:
+        for i in range(20):
+            log.append_many(_events(i, 1))
+            assert log.proof(f"e{i}")["verified"]
+        proofs = [log.proof(f"e{i}") for i in range(20)]
+        assert all(p["verified"] for p in proofs)
+        assert any(p["sealed"] for p in proofs) and not proofs[-1]["sealed"]
+    finally:
+        log.close()
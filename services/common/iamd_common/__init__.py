@@ -1,5 +1,12 @@
 __all__ = [
     "models",
     "auth",
-    "log"
+    "log",
+    "batch",
+    "clients",
+    "metrics",
+    "snapshot",
+    "bus",
+    "codec",
+    "times"
 ]
@@ -1,13 +1,80 @@
+import hashlib
 import os
+import threading
 import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
 import jwt
-from typing import Dict, Any
+
+from .metrics import ERRORS, sampled, stage
+
+# HS256 (shared JWT_SECRET) or an asymmetric algorithm with a key pair.
+# EdDSA / ES256 need pyjwt's crypto extra (the `cryptography` package).
+JWT_ALG = os.getenv("JWT_ALG", "HS256")
+ASYMMETRIC_ALGS = ("EdDSA", "ES256")
+
+# Verified tokens kept (LRU) so a token forwarded hop to hop is decoded once
+JWT_VERIFY_CACHE_SIZE = int(os.getenv("JWT_VERIFY_CACHE_SIZE", "4096"))
+JWT_LEEWAY_S = float(os.getenv("JWT_LEEWAY_S", "0"))
 
 
 def _secret() -> str:
     return os.getenv("JWT_SECRET", "dev_super_secret_change_me")
 
 
+def _alg() -> str:
+    return os.getenv("JWT_ALG", JWT_ALG)
+
+
+def _pem(name: str) -> Optional[str]:
+    # Inline PEM (JWT_PUBLIC_KEY) or a path to one (JWT_PUBLIC_KEY_FILE)
+    value = os.getenv(name)
+    if value:
+        return value.replace("\\n", "\n")
+    path = os.getenv(name + "_FILE")
+    return _read_pem(path) if path else None
+
+
+@lru_cache(maxsize=8)
+def _read_pem(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=8)
+def _prepared(alg: str, material: str, private: bool) -> Tuple[Any, Tuple[str, str]]:
+    # PEM parsing is the expensive part of asymmetric verify: do it once.
+    # Also returns the id the verify cache ties its entries to.
+    key_id = (alg, hashlib.sha256(material.encode()).hexdigest())
+    if alg not in ASYMMETRIC_ALGS:
+        return material, key_id
+    key = jwt.get_algorithm_by_name(alg).prepare_key(material)
+    if not private and hasattr(key, "public_key"):
+        key = key.public_key()
+    return key, key_id
+
+
+def _material(private: bool) -> Tuple[str, str]:
+    alg = _alg()
+    if alg not in ASYMMETRIC_ALGS:
+        return alg, _secret()
+    pem = _pem("JWT_PRIVATE_KEY" if private else "JWT_PUBLIC_KEY")
+    if pem is None and not private:
+        # Issuer-only deployments can verify with the private key's public half
+        pem = _pem("JWT_PRIVATE_KEY")
+    if pem is None:
+        raise RuntimeError(f"JWT_ALG={alg} needs JWT_PRIVATE_KEY / JWT_PUBLIC_KEY")
+    return alg, pem
+
+
+def _key(private: bool) -> Tuple[str, Any, Tuple[str, str]]:
+    alg, material = _material(private)
+    key, key_id = _prepared(alg, material, private)
+    return alg, key, key_id
+
+
 def issue_token(subject: str, role: str, ttl_seconds: int = 3600) -> str:
     now = int(time.time())
     payload = {
@@ -16,8 +83,97 @@ def issue_token(subject: str, role: str, ttl_seconds: int = 3600) -> str:
         "iat": now,
         "exp": now + ttl_seconds
     }
-    return jwt.encode(payload, _secret(), algorithm="HS256")
+    alg, key, _ = _key(private=True)
+    return jwt.encode(payload, key, algorithm=alg)
+
+
+class _VerifyCache:
+    """
+    Bounded LRU of verified claims keyed by SHA-256 of the token.
+
+    A hit still checks `exp`, so a cached token stops working the moment it
+    expires. Entries are tied to the key that verified them: changing the
+    key (or algorithm) empties the cache. Failed verifications are not
+    cached.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], Optional[float]]]" = OrderedDict()
+        self._key_id: Optional[Tuple[str, str]] = None
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def get(self, digest: bytes, key_id: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if key_id != self._key_id:
+                self._entries.clear()
+                self._key_id = key_id
+            hit = self._entries.get(digest)
+            if hit is None:
+                self.stats["misses"] += 1
+                return None
+            claims, exp = hit
+            if exp is not None and exp <= time.time() - JWT_LEEWAY_S:
+                del self._entries[digest]
+                self.stats["expired"] += 1
+                raise jwt.ExpiredSignatureError("Signature has expired")
+            self._entries.move_to_end(digest)
+            self.stats["hits"] += 1
+            return claims
+
+    def put(self, digest: bytes, key_id: Tuple[str, str], claims: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        exp = claims.get("exp")
+        with self._lock:
+            if key_id != self._key_id:
+                return
+            self._entries[digest] = (claims, float(exp) if exp is not None else None)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+
+_CACHE = _VerifyCache(JWT_VERIFY_CACHE_SIZE)
+_AUTH = stage("auth")
 
 
 def verify_token(token: str) -> Dict[str, Any]:
-    return jwt.decode(token, _secret(), algorithms=["HS256"])
+    """
+    Decode and verify a bearer token; raises a jwt.InvalidTokenError
+    subclass on failure. Repeat verifications of a token are served from
+    the cache (role and other claims included) until it expires.
+    """
+    t0 = time.perf_counter()
+    try:
+        alg, key, key_id = _key(private=False)
+        digest = hashlib.sha256(token.encode()).digest()
+
+        claims = _CACHE.get(digest, key_id)
+        if claims is None:
+            claims = jwt.decode(token, key, algorithms=[alg], leeway=JWT_LEEWAY_S)
+            _CACHE.put(digest, key_id, claims)
+    except jwt.ExpiredSignatureError:
+        ERRORS.labels("auth", "expired").inc()
+        raise
+    except jwt.InvalidTokenError:
+        ERRORS.labels("auth", "invalid").inc()
+        raise
+    finally:
+        _AUTH.observe(time.perf_counter() - t0)
+    return dict(claims)
+
+
+def auth_stats() -> Dict[str, int]:
+    return {**_CACHE.stats, "cached": len(_CACHE._entries)}
+
+
+sampled(
+    "iamd_auth_verify_cache",
+    "JWT verify cache lookups by result",
+    lambda: {(k,): v for k, v in _CACHE.stats.items()},
+    ("result",),
+    kind="counter",
+)
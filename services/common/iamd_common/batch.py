@@ -0,0 +1,69 @@
+import os
+from typing import Any, Dict, List, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from .codec import JSONDecodeError, loads
+from .models import Observation
+
+# Upper bound on items accepted in a single batch request
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "5000"))
+
+OBSERVATION_LIST = TypeAdapter(List[Observation])
+
+
+class BatchDecodeError(ValueError):
+    pass
+
+
+def decode_batch(raw: bytes) -> List[Any]:
+    """
+    Decode a batch request body.
+
+    Accepts either a JSON array or NDJSON (one JSON value per line).
+    Raises BatchDecodeError on malformed input or an oversized batch.
+    Parsed straight from bytes, without an intermediate str.
+    """
+    body = raw.strip()
+    if not body:
+        return []
+
+    try:
+        if body.startswith(b"["):
+            items = loads(body)
+        else:
+            items = [loads(line) for line in body.splitlines() if line.strip()]
+    except (JSONDecodeError, UnicodeDecodeError) as e:
+        raise BatchDecodeError(f"Malformed batch body: {e}")
+
+    if not isinstance(items, list):
+        raise BatchDecodeError("Batch body must be a JSON array or NDJSON")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise BatchDecodeError(f"Batch exceeds {MAX_BATCH_ITEMS} items")
+    return items
+
+
+def validate_observations(items: List[Any]) -> Tuple[Dict[int, Observation], Dict[int, str]]:
+    """
+    Validate a list of raw observations in one TypeAdapter pass.
+
+    Returns (valid_by_index, error_by_index). Only when some items fail is
+    the remainder re-validated, so one bad plot does not sink the scan.
+    """
+    try:
+        return dict(enumerate(OBSERVATION_LIST.validate_python(items))), {}
+    except ValidationError as e:
+        errors: Dict[int, str] = {}
+        for err in e.errors():
+            loc = err.get("loc") or ()
+            idx = loc[0] if loc and isinstance(loc[0], int) else -1
+            field = ".".join(str(p) for p in loc[1:])
+            errors.setdefault(idx, f"{field}: {err.get('msg')}" if field else str(err.get("msg")))
+
+        if -1 in errors:
+            # Not attributable to an item (e.g. body is not a list)
+            return {}, {i: errors[-1] for i in range(len(items))}
+
+    good = [i for i in range(len(items)) if i not in errors]
+    valid = OBSERVATION_LIST.validate_python([items[i] for i in good]) if good else []
+    return dict(zip(good, valid)), errors
@@ -0,0 +1,471 @@
+"""
+Queue transport between pipeline stages (PIPELINE_TRANSPORT=bus).
+
+    bus = get_bus()
+    bus.publish("observations", [{"items": [...], "authorization": "Bearer ..."}])
+    Consumer(bus, "observations", handle_one).start()
+
+Each topic is a bounded queue of messages (one message is one scan or one
+batch of tracks). Delivery is at-least-once:
+
+- publish blocks while the topic is full, then raises BusFull (the caller
+  turns that into backpressure, e.g. a 503 to the sensor)
+- consume hands out up to max_items messages and hides them for
+  BUS_VISIBILITY_S; a consumer that dies without acking gets them
+  redelivered
+- nack requeues after a delay; after BUS_MAX_ATTEMPTS deliveries a message
+  moves to "<topic>.dead" instead
+
+With BUS_URL empty the bus is in-process (stages loaded into one process,
+e.g. bench/inproc.py). With BUS_URL set, stages in separate processes share
+a local broker that keeps the same queues behind a small HTTP API:
+
+    python -m iamd_common.bus --port 8005
+"""
+import argparse
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .clients import get_client
+from .codec import dumps, loads
+from .metrics import CONTENT_TYPE, DROPS, ERRORS, ITEMS, render, sampled, stage
+
+PIPELINE_TRANSPORT = os.getenv("PIPELINE_TRANSPORT", "http")
+BUS_URL = os.getenv("BUS_URL", "")
+BUS_QUEUE_MAX = int(os.getenv("BUS_QUEUE_MAX", "1000"))
+BUS_BATCH_MAX = int(os.getenv("BUS_BATCH_MAX", "16"))
+BUS_WAIT_S = float(os.getenv("BUS_WAIT_S", "0.5"))
+BUS_VISIBILITY_S = float(os.getenv("BUS_VISIBILITY_S", "30"))
+BUS_MAX_ATTEMPTS = int(os.getenv("BUS_MAX_ATTEMPTS", "5"))
+BUS_RETRY_BASE_S = float(os.getenv("BUS_RETRY_BASE_S", "0.5"))
+BUS_RETRY_MAX_S = float(os.getenv("BUS_RETRY_MAX_S", "30"))
+BUS_PUBLISH_TIMEOUT_S = float(os.getenv("BUS_PUBLISH_TIMEOUT_S", "1"))
+
+# Pipeline topics: sensor-ingest -> track-fusion -> threat-scoring
+OBSERVATIONS = "observations"
+TRACKS = "tracks"
+DEAD_SUFFIX = ".dead"
+
+
+def bus_enabled() -> bool:
+    return PIPELINE_TRANSPORT == "bus"
+
+
+class BusFull(Exception):
+    """The topic stayed full for the whole publish timeout."""
+
+
+class Message:
+    __slots__ = ("id", "payload", "attempts", "deadline")
+
+    def __init__(self, id: int, payload: Any, attempts: int = 0):
+        self.id = id
+        self.payload = payload
+        self.attempts = attempts   # deliveries so far
+        self.deadline = 0.0        # while in flight: redeliver after this
+
+
+class _Topic:
+    def __init__(self) -> None:
+        self.ready: Deque[Message] = deque()
+        self.delayed: List[Tuple[float, int, Message]] = []   # heap by due time
+        self.inflight: Dict[int, Message] = {}
+        self.counts = {"published": 0, "delivered": 0, "acked": 0, "retried": 0, "dead": 0}
+
+    def queued(self) -> int:
+        return len(self.ready) + len(self.delayed)
+
+
+class InProcessBus:
+    """
+    Bounded topics in this process, guarded by one condition variable.
+
+    Payloads are passed by reference: publishers must not mutate them
+    afterwards. Capacity counts queued (ready + delayed) messages; in-flight
+    ones have already left the queue.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = BUS_QUEUE_MAX,
+        visibility_s: float = BUS_VISIBILITY_S,
+        max_attempts: int = BUS_MAX_ATTEMPTS,
+    ):
+        self.max_queue = max(1, max_queue)
+        self.visibility_s = visibility_s
+        self.max_attempts = max(1, max_attempts)
+        self._cond = threading.Condition()
+        self._topics: Dict[str, _Topic] = {}
+        self._ids = itertools.count(1)
+
+    def _topic(self, name: str) -> _Topic:
+        t = self._topics.get(name)
+        if t is None:
+            t = self._topics[name] = _Topic()
+        return t
+
+    def _dead(self, name: str, msg: Message) -> None:
+        dead = self._topic(name + DEAD_SUFFIX)
+        if len(dead.ready) >= self.max_queue:
+            dead.ready.popleft()
+        dead.ready.append(msg)
+        self._topic(name).counts["dead"] += 1
+        DROPS.labels("bus", "dead_letter").inc()
+
+    def _requeue(self, name: str, t: _Topic, msg: Message, delay_s: float, now: float) -> None:
+        if msg.attempts >= self.max_attempts:
+            self._dead(name, msg)
+            return
+        t.counts["retried"] += 1
+        if delay_s > 0:
+            heapq.heappush(t.delayed, (now + delay_s, msg.id, msg))
+        else:
+            t.ready.appendleft(msg)
+
+    def _due(self, name: str, t: _Topic, now: float) -> None:
+        while t.delayed and t.delayed[0][0] <= now:
+            t.ready.append(heapq.heappop(t.delayed)[2])
+        if t.inflight:
+            expired = [m for m in t.inflight.values() if m.deadline <= now]
+            for m in expired:
+                del t.inflight[m.id]
+                self._requeue(name, t, m, 0.0, now)
+
+    def publish(self, topic: str, payloads: List[Any], timeout_s: Optional[float] = BUS_PUBLISH_TIMEOUT_S) -> None:
+        """Enqueue one message per payload, all or none. timeout_s=None waits indefinitely."""
+        if not payloads:
+            return
+        if len(payloads) > self.max_queue:
+            raise ValueError(f"{len(payloads)} messages exceed the queue bound {self.max_queue}")
+        end = None if timeout_s is None else time.monotonic() + timeout_s
+        with self._cond:
+            t = self._topic(topic)
+            while t.queued() + len(payloads) > self.max_queue:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    DROPS.labels("bus", "queue_full").inc(len(payloads))
+                    raise BusFull(topic)
+                self._cond.wait(remaining)
+            for p in payloads:
+                t.ready.append(Message(next(self._ids), p))
+            t.counts["published"] += len(payloads)
+            self._cond.notify_all()
+
+    def consume(self, topic: str, max_items: int = BUS_BATCH_MAX, wait_s: float = BUS_WAIT_S) -> List[Message]:
+        """Up to max_items messages, waiting at most wait_s for the first."""
+        end = time.monotonic() + wait_s
+        with self._cond:
+            t = self._topic(topic)
+            while True:
+                now = time.monotonic()
+                self._due(topic, t, now)
+                if t.ready:
+                    out: List[Message] = []
+                    deadline = now + self.visibility_s
+                    while t.ready and len(out) < max_items:
+                        m = t.ready.popleft()
+                        m.attempts += 1
+                        m.deadline = deadline
+                        t.inflight[m.id] = m
+                        out.append(m)
+                    t.counts["delivered"] += len(out)
+                    # Room for blocked publishers
+                    self._cond.notify_all()
+                    return out
+                remaining = end - now
+                if remaining <= 0:
+                    return []
+                if t.delayed:
+                    remaining = min(remaining, max(0.0, t.delayed[0][0] - now))
+                self._cond.wait(remaining)
+
+    def ack(self, topic: str, ids: List[int]) -> None:
+        with self._cond:
+            t = self._topic(topic)
+            for i in ids:
+                if t.inflight.pop(i, None) is not None:
+                    t.counts["acked"] += 1
+
+    def nack(self, topic: str, ids: List[int], delay_s: float = 0.0) -> None:
+        """Return in-flight messages for redelivery (or dead-letter them)."""
+        with self._cond:
+            t = self._topic(topic)
+            now = time.monotonic()
+            for i in ids:
+                m = t.inflight.pop(i, None)
+                if m is not None:
+                    self._requeue(topic, t, m, delay_s, now)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._cond:
+            return {
+                name: {"ready": len(t.ready), "delayed": len(t.delayed), "inflight": len(t.inflight), **t.counts}
+                for name, t in self._topics.items()
+            }
+
+    def idle(self) -> bool:
+        """Nothing queued or in flight outside the dead-letter topics."""
+        with self._cond:
+            return all(
+                not (t.queued() or t.inflight)
+                for name, t in self._topics.items()
+                if not name.endswith(DEAD_SUFFIX)
+            )
+
+    def clear(self) -> None:
+        with self._cond:
+            self._topics.clear()
+            self._cond.notify_all()
+
+
+class HttpBus:
+    """Client for the local broker (same interface as InProcessBus)."""
+
+    def __init__(self, url: str):
+        self.client = get_client("bus", url)
+
+    def _post(self, path: str, body: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        r = self.client.post(path, json=body, timeout=timeout)
+        if r.status_code == 503:
+            raise BusFull(path)
+        r.raise_for_status()
+        return loads(r.content)
+
+    def publish(self, topic: str, payloads: List[Any], timeout_s: Optional[float] = BUS_PUBLISH_TIMEOUT_S) -> None:
+        if not payloads:
+            return
+        wait = BUS_RETRY_MAX_S if timeout_s is None else timeout_s
+        while True:
+            try:
+                self._post(f"/publish/{topic}", {"payloads": payloads, "timeout_s": wait}, wait + self.client.timeout_s)
+                return
+            except BusFull:
+                if timeout_s is not None:
+                    raise
+
+    def consume(self, topic: str, max_items: int = BUS_BATCH_MAX, wait_s: float = BUS_WAIT_S) -> List[Message]:
+        body = self._post(f"/consume/{topic}", {"max": max_items, "wait_s": wait_s}, wait_s + self.client.timeout_s)
+        return [Message(m["id"], m["payload"], m["attempts"]) for m in body.get("messages", [])]
+
+    def ack(self, topic: str, ids: List[int]) -> None:
+        self._post(f"/ack/{topic}", {"ids": ids}, self.client.timeout_s)
+
+    def nack(self, topic: str, ids: List[int], delay_s: float = 0.0) -> None:
+        self._post(f"/nack/{topic}", {"ids": ids, "delay_s": delay_s}, self.client.timeout_s)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        r = self.client.get("/stats")
+        r.raise_for_status()
+        return loads(r.content)
+
+    def idle(self) -> bool:
+        return all(
+            not (s["ready"] or s["delayed"] or s["inflight"])
+            for name, s in self.stats().items()
+            if not name.endswith(DEAD_SUFFIX)
+        )
+
+
+_LOCAL = InProcessBus()
+_BUS: Optional[Any] = None
+
+
+def get_bus():
+    """The process-wide bus: the broker at BUS_URL, else the in-process one."""
+    global _BUS
+    if _BUS is None:
+        _BUS = HttpBus(BUS_URL) if BUS_URL else _LOCAL
+    return _BUS
+
+
+def _local_depth() -> Dict[Tuple[str, str], float]:
+    out: Dict[Tuple[str, str], float] = {}
+    for name, s in _LOCAL.stats().items():
+        for field, v in s.items():
+            out[(name, field)] = v
+    return out
+
+
+sampled("iamd_bus_topic", "In-process bus queues per topic", _local_depth, ("topic", "field"))
+
+
+class Consumer:
+    """
+    Background stage loop: consume a batch, handle each payload in order,
+    ack the ones that went through.
+
+    A payload whose handle raises is nacked on its own with exponential
+    backoff (BUS_RETRY_BASE_S doubling per delivery, capped at
+    BUS_RETRY_MAX_S); the rest of the batch still goes through, and no
+    handled message is delivered again because of another's failure.
+    handle must still tolerate redelivery after a crash (at-least-once).
+    """
+
+    def __init__(
+        self,
+        bus: Any,
+        topic: str,
+        handle: Callable[[Any], None],
+        max_batch: int = BUS_BATCH_MAX,
+        wait_s: float = BUS_WAIT_S,
+    ):
+        self.bus = bus
+        self.topic = topic
+        self.handle = handle
+        self.max_batch = max(1, max_batch)
+        self.wait_s = wait_s
+        self._halt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._timer = stage(f"bus_consume_{topic}")
+        self._items = ITEMS.labels(f"bus_consume_{topic}")
+        self._failed = ERRORS.labels(f"bus_consume_{topic}", "handler_failed")
+        self._unreachable = ERRORS.labels(f"bus_consume_{topic}", "bus_unreachable")
+        self.stats: Dict[str, Any] = {"batches": 0, "handled": 0, "failed": 0, "last_error": None}
+
+    def start(self) -> "Consumer":
+        if self._thread is None or not self._thread.is_alive():
+            self._halt.clear()
+            self._thread = threading.Thread(target=self._run, name=f"bus-{self.topic}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        self._halt.set()
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+            self._thread = None
+
+    def poll(self) -> int:
+        """One consume/handle/ack round. Returns messages handled."""
+        msgs = self.bus.consume(self.topic, self.max_batch, self.wait_s)
+        if not msgs:
+            return 0
+        t0 = time.perf_counter()
+        done: List[int] = []
+        failed: List[Message] = []
+        for m in msgs:
+            try:
+                self.handle(m.payload)
+            except Exception as e:
+                failed.append(m)
+                self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                continue
+            done.append(m.id)
+        if done:
+            self.bus.ack(self.topic, done)
+        if failed:
+            self._failed.inc(len(failed))
+            self.stats["failed"] += len(failed)
+            delay = min(BUS_RETRY_MAX_S, BUS_RETRY_BASE_S * 2 ** (max(m.attempts for m in failed) - 1))
+            self.bus.nack(self.topic, [m.id for m in failed], delay)
+        self._timer.observe(time.perf_counter() - t0)
+        self._items.inc(len(done))
+        self.stats["batches"] += 1
+        self.stats["handled"] += len(done)
+        return len(done)
+
+    def _run(self) -> None:
+        while not self._halt.is_set():
+            try:
+                self.poll()
+            except Exception:
+                # Broker down or restarting: unacked messages come back
+                # after BUS_VISIBILITY_S
+                self._unreachable.inc()
+                self._halt.wait(1.0)
+
+
+# -- local broker ---------------------------------------------------------------
+
+
+class _BrokerHandler(BaseHTTPRequestHandler):
+    bus: InProcessBus = _LOCAL
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, doc: Any) -> None:
+        self._send(status, dumps(doc))
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._json(200, {"ok": True})
+        elif self.path == "/stats":
+            self._json(200, self.bus.stats())
+        elif self.path == "/metrics":
+            self._send(200, render().encode(), CONTENT_TYPE)
+        else:
+            self._json(404, {"detail": "Not found"})
+
+    def do_POST(self) -> None:
+        parts = self.path.strip("/").split("/", 1)
+        if len(parts) != 2:
+            self._json(404, {"detail": "Not found"})
+            return
+        op, topic = parts
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._json(400, {"detail": "Invalid JSON"})
+            return
+
+        if op == "publish":
+            try:
+                self.bus.publish(topic, body.get("payloads") or [], float(body.get("timeout_s", BUS_PUBLISH_TIMEOUT_S)))
+            except BusFull:
+                self._json(503, {"detail": f"Topic {topic} is full"})
+                return
+            except ValueError as e:
+                self._json(413, {"detail": str(e)})
+                return
+            self._json(200, {"ok": True})
+        elif op == "consume":
+            msgs = self.bus.consume(topic, int(body.get("max", BUS_BATCH_MAX)), float(body.get("wait_s", BUS_WAIT_S)))
+            self._json(200, {"messages": [{"id": m.id, "payload": m.payload, "attempts": m.attempts} for m in msgs]})
+        elif op == "ack":
+            self.bus.ack(topic, body.get("ids") or [])
+            self._json(200, {"ok": True})
+        elif op == "nack":
+            self.bus.nack(topic, body.get("ids") or [], float(body.get("delay_s", 0.0)))
+            self._json(200, {"ok": True})
+        else:
+            self._json(404, {"detail": "Not found"})
+
+
+def serve(host: str = "0.0.0.0", port: int = 8005) -> None:
+    server = ThreadingHTTPServer((host, port), _BrokerHandler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Local message broker for PIPELINE_TRANSPORT=bus")
+    ap.add_argument("--host", default=os.getenv("BUS_HOST", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("BUS_PORT", "8005")))
+    args = ap.parse_args(argv)
+    print(f"bus broker on {args.host}:{args.port} (queue max {BUS_QUEUE_MAX})", flush=True)
+    serve(args.host, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
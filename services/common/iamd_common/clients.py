@@ -0,0 +1,167 @@
+import asyncio
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Optional
+
+from .codec import MEDIA_TYPE, dumps
+
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+HTTP_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "3"))
+
+
+def _env_prefix(name: str) -> str:
+    # "track-fusion" -> "TRACK_FUSION"
+    return name.upper().replace("-", "_")
+
+
+def _pool_maxsize(name: str, default: Optional[int]) -> int:
+    if default is not None:
+        return default
+    return int(os.getenv(f"{_env_prefix(name)}_POOL_MAXSIZE", str(HTTP_POOL_MAXSIZE)))
+
+
+def _timeout_s(name: str, default: Optional[float]) -> float:
+    if default is not None:
+        return default
+    return float(os.getenv(f"{_env_prefix(name)}_TIMEOUT_S", str(HTTP_TIMEOUT_S)))
+
+
+class ServiceClient:
+    """
+    Keep-alive connection pool for one downstream service (sync).
+
+    Wraps a requests.Session mounted with a sized HTTPAdapter, so repeated
+    calls reuse pooled TCP connections instead of handshaking every time.
+    Paths are relative to base_url; timeout defaults to the client's own.
+    `json=` bodies are encoded with codec.dumps(); pass already-encoded
+    bytes as `data=` to forward them untouched.
+    """
+
+    def __init__(self, base_url: str, pool_maxsize: int = HTTP_POOL_MAXSIZE, timeout_s: float = HTTP_TIMEOUT_S):
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout_s)
+        return self.session.get(self.url(path), **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout_s)
+        if "json" in kwargs:
+            kwargs["data"] = dumps(kwargs.pop("json"))
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Type": MEDIA_TYPE}
+        return self.session.post(self.url(path), **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncServiceClient:
+    """
+    Keep-alive connection pool for one downstream service (async).
+
+    Backed by httpx.AsyncClient for use from `async def` handlers. httpx
+    pools are bound to an event loop, so one client is kept per running loop.
+    """
+
+    def __init__(self, base_url: str, pool_maxsize: int = HTTP_POOL_MAXSIZE, timeout_s: float = HTTP_TIMEOUT_S):
+        import httpx  # optional dependency: only services using the async client need it
+
+        self._httpx = httpx
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+        self.pool_maxsize = pool_maxsize
+        self._by_loop: Dict[int, Any] = {}
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def _client(self):
+        key = id(asyncio.get_running_loop())
+        client = self._by_loop.get(key)
+        if client is None or client.is_closed:
+            client = self._httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout_s,
+                limits=self._httpx.Limits(
+                    max_connections=self.pool_maxsize,
+                    max_keepalive_connections=self.pool_maxsize,
+                ),
+            )
+            self._by_loop[key] = client
+        return client
+
+    async def get(self, path: str, **kwargs: Any):
+        return await self._client().get(path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any):
+        return await self._client().post(path, **kwargs)
+
+    async def aclose(self) -> None:
+        clients = list(self._by_loop.values())
+        self._by_loop.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                # Client bound to a loop that is already gone
+                pass
+
+
+_CLIENTS: Dict[str, ServiceClient] = {}
+_ASYNC_CLIENTS: Dict[str, AsyncServiceClient] = {}
+_LOCK = threading.Lock()
+
+
+def get_client(name: str, base_url: str, pool_maxsize: Optional[int] = None, timeout_s: Optional[float] = None) -> ServiceClient:
+    """
+    Return the shared sync client for a named downstream service.
+
+    Pool size and timeout fall back to <NAME>_POOL_MAXSIZE / <NAME>_TIMEOUT_S,
+    then HTTP_POOL_MAXSIZE / HTTP_TIMEOUT_S.
+    """
+    client = _CLIENTS.get(name)
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(name)
+            if client is None:
+                client = ServiceClient(base_url, _pool_maxsize(name, pool_maxsize), _timeout_s(name, timeout_s))
+                _CLIENTS[name] = client
+    return client
+
+
+def get_async_client(name: str, base_url: str, pool_maxsize: Optional[int] = None, timeout_s: Optional[float] = None) -> AsyncServiceClient:
+    """Async counterpart of get_client()."""
+    client = _ASYNC_CLIENTS.get(name)
+    if client is None:
+        with _LOCK:
+            client = _ASYNC_CLIENTS.get(name)
+            if client is None:
+                client = AsyncServiceClient(base_url, _pool_maxsize(name, pool_maxsize), _timeout_s(name, timeout_s))
+                _ASYNC_CLIENTS[name] = client
+    return client
+
+
+def close_all() -> None:
+    with _LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_all() -> None:
+    with _LOCK:
+        clients = list(_ASYNC_CLIENTS.values())
+        _ASYNC_CLIENTS.clear()
+    for client in clients:
+        await client.aclose()
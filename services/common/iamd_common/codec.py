@@ -0,0 +1,69 @@
+"""
+One JSON codec for every hop.
+
+    from iamd_common.codec import dumps, loads, FastJSONResponse
+
+    body = dumps(docs)                       # bytes, compact
+    items = loads(raw)                       # bytes or str
+    return FastJSONResponse(docs)            # skips FastAPI's jsonable_encoder
+
+orjson when installed (several times faster both ways and already
+produces bytes), else the stdlib with compact separators and UTF-8
+output, so both emit equivalent JSON. Decode errors are
+json.JSONDecodeError in both cases (orjson's error subclasses it).
+
+Handlers that only forward a body should pass the received bytes on
+(`data=raw`) rather than decoding and re-encoding them; ServiceClient
+encodes `json=` bodies with dumps() too.
+"""
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency: fall back to the stdlib encoder
+    orjson = None
+
+# Same error type for both backends
+JSONDecodeError = json.JSONDecodeError
+
+MEDIA_TYPE = "application/json"
+
+if orjson is not None:
+    # numpy scalars / arrays as numbers, int keys as strings (as the stdlib does)
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return orjson.dumps(obj, default=default, option=_OPTIONS)
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+else:
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default).encode()
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def backend() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+try:
+    from starlette.responses import Response
+except ImportError:  # CLI-only installs (replay, scenario) have no web stack
+    Response = None
+
+if Response is not None:
+    class FastJSONResponse(Response):
+        """
+        JSON response rendered with dumps(). Returned directly from a
+        handler, it also bypasses FastAPI's jsonable_encoder pass, which
+        dominates the cost of large list responses.
+        """
+
+        media_type = MEDIA_TYPE
+
+        def render(self, content: Any) -> bytes:
+            return dumps(content)
@@ -1,21 +1,216 @@
+import atexit
 import os
-import requests
-from typing import Dict, Any
+import queue
+import threading
+import time
+from typing import Dict, Any, List, Optional
 
+from .clients import ServiceClient
+from .metrics import DROPS, sampled, stage
 
-def audit(event: Dict[str, Any]) -> None:
+
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL_S = float(os.getenv("AUDIT_FLUSH_INTERVAL_S", "0.5"))
+AUDIT_TIMEOUT_S = float(os.getenv("AUDIT_TIMEOUT_S", "2"))
+
+_ENQUEUE = stage("audit_enqueue")
+_SEND = stage("audit_send")
+_DROP_FULL = DROPS.labels("audit", "queue_full")
+_DROP_SEND = DROPS.labels("audit", "send_failed")
+
+
+class AuditShipper:
     """
-    Send an audit event to the audit-log service.
+    Non-blocking audit client.
 
-    Fail-open by design:
-    audit failure must not break mission flow.
+    Events go into a bounded in-process queue; a daemon thread ships them to
+    audit-log's batch endpoint whenever AUDIT_BATCH_SIZE events are waiting
+    or AUDIT_FLUSH_INTERVAL_S has elapsed, over one keep-alive session.
+
+    Fail-open by design: a full queue drops the event, a failed send drops
+    the batch. Both are counted, neither is raised to the caller.
     """
+
+    def __init__(
+        self,
+        url: str,
+        max_queue: int = AUDIT_QUEUE_MAX,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval_s: float = AUDIT_FLUSH_INTERVAL_S,
+        timeout_s: float = AUDIT_TIMEOUT_S,
+    ):
+        self.url = url.rstrip("/")
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self.timeout_s = timeout_s
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._client: Optional[ServiceClient] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+
+        self.stats: Dict[str, int] = {
+            "enqueued": 0,
+            "sent": 0,
+            "dropped_queue_full": 0,
+            "dropped_send_failed": 0,
+            "batches_sent": 0,
+            "send_failures": 0,
+            "queue_high_watermark": 0,
+        }
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """Enqueue without blocking. Returns False if the event was dropped."""
+        self._ensure_started()
+        # Count before put so the flusher can never decrement ahead of us
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._idle:
+                self._in_flight -= 1
+                self.stats["dropped_queue_full"] += 1
+                self._idle.notify_all()
+            _DROP_FULL.inc()
+            return False
+
+        depth = self._queue.qsize()
+        with self._lock:
+            self.stats["enqueued"] += 1
+            if depth > self.stats["queue_high_watermark"]:
+                self.stats["queue_high_watermark"] = depth
+        return True
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+        return {**stats, "queue_depth": self.queue_depth()}
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything enqueued so far was shipped or dropped."""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _ensure_started(self) -> None:
+        # Restart after fork (e.g. uvicorn/gunicorn workers); threads do not survive it
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            self._pid = pid
+            self._client = ServiceClient(self.url, pool_maxsize=1, timeout_s=self.timeout_s)
+            self._thread = threading.Thread(target=self._run, name="audit-shipper", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Dict[str, Any]] = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval_s))
+            except queue.Empty:
+                continue
+
+            # Fill up to batch_size, waiting at most flush_interval_s overall
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._send(batch)
+
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        t0 = time.perf_counter()
+        try:
+            r = self._client.post("/events:batch", json=batch)
+            ok = r.status_code < 400
+        except Exception:
+            # Intentionally swallow errors for demo resilience
+            ok = False
+        _SEND.observe(time.perf_counter() - t0)
+        if not ok:
+            _DROP_SEND.inc(len(batch))
+
+        with self._idle:
+            if ok:
+                self.stats["sent"] += len(batch)
+                self.stats["batches_sent"] += 1
+            else:
+                self.stats["send_failures"] += 1
+                self.stats["dropped_send_failed"] += len(batch)
+            self._in_flight -= len(batch)
+            self._idle.notify_all()
+
+
+_SHIPPER: Optional[AuditShipper] = None
+_SHIPPER_LOCK = threading.Lock()
+
+
+def get_shipper() -> Optional[AuditShipper]:
+    """Return the process-wide shipper, or None when AUDIT_URL is unset."""
+    global _SHIPPER
     url = os.getenv("AUDIT_URL")
     if not url:
-        return
+        return None
+    if _SHIPPER is None or _SHIPPER.url != url.rstrip("/"):
+        with _SHIPPER_LOCK:
+            if _SHIPPER is None or _SHIPPER.url != url.rstrip("/"):
+                _SHIPPER = AuditShipper(url)
+    return _SHIPPER
+
+
+def audit(event: Dict[str, Any]) -> None:
+    """
+    Queue an audit event for the audit-log service.
 
-    try:
-        requests.post(f"{url}/events", json=event, timeout=2)
-    except Exception:
-        # Intentionally swallow errors for demo resilience
+    Never blocks on the network. Fail-open by design:
+    audit failure must not break mission flow.
+    """
+    shipper = get_shipper()
+    if shipper is None:
         return
+    t0 = time.perf_counter()
+    shipper.submit(event)
+    _ENQUEUE.observe(time.perf_counter() - t0)
+
+
+def audit_stats() -> Dict[str, int]:
+    shipper = _SHIPPER
+    return shipper.snapshot() if shipper is not None else {}
+
+
+def flush(timeout: float = 5.0) -> bool:
+    shipper = _SHIPPER
+    return shipper.flush(timeout) if shipper is not None else True
+
+
+sampled(
+    "iamd_queue_depth",
+    "Items waiting in an in-process queue",
+    lambda: {("audit",): _SHIPPER.queue_depth()} if _SHIPPER is not None else None,
+    ("queue",),
+)
+
+
+# Best-effort drain on interpreter shutdown
+atexit.register(flush, 2.0)
@@ -0,0 +1,265 @@
+"""
+Replay recorded sensor feeds into sensor-ingest.
+
+    python -m iamd_common.replay data/sample_sensors --rate 10
+
+Feeds are JSONL files of observations (e.g. data/sample_sensors/*.jsonl).
+They are read lazily and merged by ts_utc through a heap, so memory stays
+flat however large the recordings are; each file must be in time order.
+Merged observations are grouped into scans and posted to
+/observations:batch with a bounded number of requests in flight.
+
+--rate 1 plays back in real time, --rate N at N x, --rate 0 as fast as
+the pipeline accepts. --loop keeps replaying (service mode).
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .auth import issue_token
+from .batch import MAX_BATCH_ITEMS
+from .clients import ServiceClient
+from .times import parse_ts
+
+REPLAY_URL = os.getenv("REPLAY_URL", os.getenv("SENSOR_INGEST_URL", "http://sensor-ingest:8001"))
+REPLAY_RATE = float(os.getenv("REPLAY_RATE", "1.0"))
+REPLAY_CONCURRENCY = int(os.getenv("REPLAY_CONCURRENCY", "4"))
+REPLAY_BATCH_MAX = int(os.getenv("REPLAY_BATCH_MAX", "500"))
+REPLAY_BATCH_WINDOW_S = float(os.getenv("REPLAY_BATCH_WINDOW_S", "0.1"))
+REPLAY_TIMEOUT_S = float(os.getenv("REPLAY_TIMEOUT_S", "10"))
+
+FEED_SUFFIXES = (".jsonl", ".ndjson")
+
+# (feed time, raw line) - the raw line is posted as-is, never re-encoded
+Record = Tuple[float, bytes]
+
+
+def expand_paths(inputs: Iterable[str]) -> List[str]:
+    """Files as given; directories contribute their *.jsonl / *.ndjson files."""
+    paths: List[str] = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(
+                os.path.join(item, name) for name in sorted(os.listdir(item)) if name.endswith(FEED_SUFFIXES)
+            )
+        else:
+            paths.append(item)
+    return paths
+
+
+def read_feed(path: str, skipped: Optional[Dict[str, int]] = None) -> Iterator[Record]:
+    """Stream one feed line by line; lines without a usable ts_utc are skipped."""
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ts = parse_ts(json.loads(line).get("ts_utc"))
+            except (ValueError, AttributeError):
+                ts = None
+            if ts is None:
+                if skipped is not None:
+                    skipped[path] = skipped.get(path, 0) + 1
+                continue
+            yield ts, line
+
+
+def merge_feeds(paths: List[str], skipped: Optional[Dict[str, int]] = None) -> Iterator[Record]:
+    """K-way heap merge by feed time; holds one pending line per file."""
+    return heapq.merge(*(read_feed(p, skipped) for p in paths), key=lambda rec: rec[0])
+
+
+def paced_batches(
+    records: Iterable[Record],
+    rate: float = 1.0,
+    batch_max: int = REPLAY_BATCH_MAX,
+    window_s: float = REPLAY_BATCH_WINDOW_S,
+    lag: Optional[Dict[str, float]] = None,
+) -> Iterator[List[bytes]]:
+    """
+    Group records into scans and release each when it is due.
+
+    A record is due at start + (ts - first_ts) / rate. Records within
+    window_s of feed time of a scan's first record ride in that scan (up
+    to batch_max), whatever the rate. rate <= 0 releases each scan
+    immediately. If the consumer falls
+    behind, scans go out late rather than being dropped; lag["max_s"]
+    tracks how late.
+    """
+    batch_max = max(1, min(batch_max, MAX_BATCH_ITEMS))
+    fast = rate <= 0
+    start = time.monotonic()
+    first_ts: Optional[float] = None
+    batch: List[bytes] = []
+    batch_ts = 0.0
+    batch_due = 0.0
+
+    def release() -> List[bytes]:
+        if not fast:
+            wait = batch_due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            elif lag is not None:
+                lag["max_s"] = max(lag.get("max_s", 0.0), -wait)
+        return batch
+
+    for ts, line in records:
+        if first_ts is None:
+            first_ts = ts
+        due = start + max(0.0, ts - first_ts) / rate if not fast else 0.0
+        if batch and (len(batch) >= batch_max or ts - batch_ts > window_s):
+            yield release()
+            batch = []
+        if not batch:
+            batch_ts = ts
+            batch_due = due
+        batch.append(line)
+    if batch:
+        yield release()
+
+
+class Replayer:
+    """
+    Posts scans to sensor-ingest's batch endpoint from a thread pool.
+
+    At most 2 x concurrency scans are queued or in flight; past that the
+    producer blocks, so a slow pipeline shows up as playback lag instead
+    of unbounded memory.
+    """
+
+    def __init__(
+        self,
+        url: str = REPLAY_URL,
+        concurrency: int = REPLAY_CONCURRENCY,
+        timeout_s: float = REPLAY_TIMEOUT_S,
+        token: Optional[str] = None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.client = ServiceClient(url, pool_maxsize=self.concurrency, timeout_s=timeout_s)
+        self._token = token
+        self._token_exp = float("inf") if token else 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.concurrency * 2)
+        self.stats: Dict[str, Any] = {
+            "observations_sent": 0,
+            "accepted": 0,
+            "rejected": 0,
+            "batches": 0,
+            "batches_failed": 0,
+        }
+
+    def _bearer(self) -> str:
+        # Reuse one sensor token until close to expiry
+        now = time.time()
+        if self._token is None or self._token_exp - now < 60:
+            self._token = issue_token("replay@sensor.local", "sensor", ttl_seconds=3600)
+            self._token_exp = now + 3600
+        return f"Bearer {self._token}"
+
+    def _post(self, lines: List[bytes], bearer: str) -> None:
+        try:
+            r = self.client.post(
+                "/observations:batch",
+                data=b"\n".join(lines),
+                headers={"Authorization": bearer, "Content-Type": "application/x-ndjson"},
+            )
+            ok = r.status_code == 200
+            body = r.json() if ok else {}
+        except Exception:
+            ok, body = False, {}
+        finally:
+            self._slots.release()
+
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["observations_sent"] += len(lines)
+            if not ok:
+                self.stats["batches_failed"] += 1
+                return
+            self.stats["accepted"] += int(body.get("accepted", 0))
+            self.stats["rejected"] += int(body.get("rejected", 0))
+
+    def run(self, batches: Iterable[List[bytes]]) -> Dict[str, Any]:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for lines in batches:
+                self._slots.acquire()
+                pool.submit(self._post, lines, self._bearer())
+        elapsed = time.monotonic() - started
+        with self._lock:
+            out = dict(self.stats)
+        out["elapsed_s"] = round(elapsed, 3)
+        out["observations_per_s"] = round(out["observations_sent"] / elapsed, 1) if elapsed > 0 else None
+        return out
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def replay(
+    paths: List[str],
+    url: str = REPLAY_URL,
+    rate: float = REPLAY_RATE,
+    concurrency: int = REPLAY_CONCURRENCY,
+    batch_max: int = REPLAY_BATCH_MAX,
+    window_s: float = REPLAY_BATCH_WINDOW_S,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """One pass over the feeds; returns the run summary."""
+    skipped: Dict[str, int] = {}
+    lag: Dict[str, float] = {"max_s": 0.0}
+    records: Iterable[Record] = merge_feeds(paths, skipped)
+    if limit is not None:
+        records = (rec for i, rec in zip(range(limit), records))
+
+    replayer = Replayer(url, concurrency=concurrency)
+    try:
+        summary = replayer.run(paced_batches(records, rate, batch_max, window_s, lag))
+    finally:
+        replayer.close()
+    summary["rate"] = rate
+    summary["max_lag_s"] = round(lag["max_s"], 3)
+    summary["skipped_lines"] = skipped
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m iamd_common.replay", description="Replay JSONL sensor feeds")
+    parser.add_argument("inputs", nargs="+", help="JSONL files or directories of them")
+    parser.add_argument("--url", default=REPLAY_URL, help="sensor-ingest base URL")
+    parser.add_argument("--rate", type=float, default=REPLAY_RATE, help="1 = real time, N = N x, 0 = as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=REPLAY_CONCURRENCY, help="batch requests in flight")
+    parser.add_argument("--batch-max", type=int, default=REPLAY_BATCH_MAX, help="observations per batch")
+    parser.add_argument("--batch-window-s", type=float, default=REPLAY_BATCH_WINDOW_S, help="feed-time window merged into one batch")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many observations per pass")
+    parser.add_argument("--loop", action="store_true", help="replay forever (service mode)")
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.inputs)
+    if not paths:
+        parser.error("no feed files found")
+
+    while True:
+        summary = replay(
+            paths,
+            url=args.url,
+            rate=args.rate,
+            concurrency=args.concurrency,
+            batch_max=args.batch_max,
+            window_s=args.batch_window_s,
+            limit=args.limit,
+        )
+        print(json.dumps(summary), flush=True)
+        if not args.loop:
+            return 0 if summary["batches_failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Seeded synthetic scenarios for load testing.
+
+    python -m iamd_common.scenario --contacts 20000 --duration-s 600 --out scenario.jsonl
+    python -m iamd_common.scenario --contacts 5000 --ingest --obs-per-s 2000
+
+Contacts fly (or sail) kinematic trajectories: constant velocity with
+random coordinated turns and climbs. Several sensors scan the same
+contacts on their own schedules with position/velocity noise, a per-plot
+detection probability and fade-outs that last several scans. The same
+seed always yields the same stream.
+
+Observations are generated scan by scan in time order, so the output is
+a stream (memory holds the contact states, never the output) and can be
+written as JSONL, fed to iamd_common.replay, or posted straight into
+sensor-ingest at a target rate. Ground truth rides in metadata.truth_id;
+object_id is only set with --object-ids (otherwise fusion must associate).
+"""
+import argparse
+import heapq
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .batch import MAX_BATCH_ITEMS
+from .replay import REPLAY_BATCH_MAX, REPLAY_CONCURRENCY, REPLAY_URL, Record, Replayer
+from .times import parse_ts
+
+M_PER_DEG = 111000.0
+
+REF_LAT = 29.7604
+REF_LON = -95.3698
+START_UTC = "2025-01-01T12:00:00Z"
+
+DEFAULT_MIX = {"AIR": 0.3, "SEA": 0.3, "BENIGN": 0.4}
+
+# speed m/s, altitude m, label prefix, signature (rcs, ir)
+CONTACT_TYPES: Dict[str, Dict[str, Any]] = {
+    "AIR": {"speed": (200.0, 450.0), "alt": (6000.0, 13000.0), "label": "AIRPLANE", "rcs": (0.6, 1.0), "ir": (0.2, 0.6)},
+    "BENIGN": {"speed": (60.0, 150.0), "alt": (1000.0, 3000.0), "label": "BENIGN", "rcs": (0.1, 0.4), "ir": (0.0, 0.1)},
+    "SEA": {"speed": (3.0, 18.0), "alt": (0.0, 0.0), "label": "VESSEL", "rcs": (0.4, 0.9), "ir": (0.0, 0.1)},
+}
+
+# Share of SEA contacts broadcasting AIS (the rest are "dark")
+AIS_FRACTION = 0.5
+
+# period_s, detection probability, noise sigmas, fade-out Markov chain, what it sees
+DEFAULT_SENSORS: List[Dict[str, Any]] = [
+    {"sensor_id": "RADAR-01", "sensor_type": "RADAR", "period_s": 2.0, "pd": 0.9,
+     "pos_sigma_m": 150.0, "alt_sigma_m": 100.0, "vel_sigma_mps": 5.0,
+     "fade_p": 0.01, "recover_p": 0.3, "confidence": 0.88, "sees": ("AIR", "BENIGN", "SEA")},
+    {"sensor_id": "EOIR-02", "sensor_type": "EOIR", "period_s": 1.0, "pd": 0.7,
+     "pos_sigma_m": 60.0, "alt_sigma_m": 60.0, "vel_sigma_mps": 8.0,
+     "fade_p": 0.03, "recover_p": 0.2, "confidence": 0.8, "sees": ("AIR", "BENIGN")},
+    {"sensor_id": "AIS-EDGE-01", "sensor_type": "AIS", "period_s": 10.0, "pd": 0.95,
+     "pos_sigma_m": 20.0, "alt_sigma_m": 0.0, "vel_sigma_mps": 0.5,
+     "fade_p": 0.005, "recover_p": 0.5, "confidence": 0.99, "sees": ("SEA_AIS",)},
+]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """"AIR=0.3,SEA=0.3,BENIGN=0.4" -> normalized weights."""
+    mix: Dict[str, float] = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip().upper()
+        if name not in CONTACT_TYPES:
+            raise ValueError(f"unknown contact type {name!r} (expected {', '.join(CONTACT_TYPES)})")
+        mix[name] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("contact mix weights must sum to > 0")
+    return {k: v / total for k, v in mix.items()}
+
+
+class _Contact:
+    __slots__ = ("idx", "kind", "ais", "lat", "lon", "alt", "speed", "heading", "climb",
+                 "turn_rate", "maneuver_until", "t", "label", "rcs", "ir")
+
+    def step(self, t: float, rng: random.Random) -> None:
+        # Advance to time t: straight legs with occasional coordinated turns / climbs
+        dt = t - self.t
+        if dt <= 0:
+            return
+        if t >= self.maneuver_until:
+            self.turn_rate = 0.0
+            self.climb = 0.0
+            if rng.random() < 1.0 - math.exp(-0.01 * dt):
+                self.turn_rate = math.radians(rng.uniform(1.0, 3.0)) * rng.choice((-1.0, 1.0))
+                if self.kind != "SEA":
+                    self.climb = rng.uniform(-10.0, 10.0)
+                self.maneuver_until = t + rng.uniform(10.0, 30.0)
+        self.heading = (self.heading + self.turn_rate * dt) % (2.0 * math.pi)
+        vx = self.speed * math.sin(self.heading)
+        vy = self.speed * math.cos(self.heading)
+        self.lat += vy * dt / M_PER_DEG
+        self.lon += vx * dt / (M_PER_DEG * math.cos(math.radians(self.lat)))
+        self.alt = max(0.0, self.alt + self.climb * dt)
+        self.t = t
+
+
+class ScenarioGenerator:
+    """
+    Reproducible multi-sensor scenario. Iterate records() for (feed time,
+    JSON line) pairs in time order, or observations() for dicts.
+    """
+
+    def __init__(
+        self,
+        contacts: int = 1000,
+        duration_s: float = 300.0,
+        seed: int = 0,
+        mix: Optional[Dict[str, float]] = None,
+        sensors: Optional[List[Dict[str, Any]]] = None,
+        radius_km: float = 100.0,
+        start_utc: str = START_UTC,
+        ref_lat: float = REF_LAT,
+        ref_lon: float = REF_LON,
+        object_ids: bool = False,
+    ):
+        self.contacts = contacts
+        self.duration_s = duration_s
+        self.seed = seed
+        self.mix = mix or DEFAULT_MIX
+        self.sensors = sensors or DEFAULT_SENSORS
+        self.radius_km = radius_km
+        self.start_ts = parse_ts(start_utc)
+        if self.start_ts is None:
+            raise ValueError(f"bad start time {start_utc!r}")
+        self.ref_lat = ref_lat
+        self.ref_lon = ref_lon
+        self.object_ids = object_ids
+
+    def _spawn(self, rng: random.Random) -> List[_Contact]:
+        kinds = list(self.mix)
+        weights = [self.mix[k] for k in kinds]
+        out = []
+        for i in range(self.contacts):
+            kind = rng.choices(kinds, weights)[0]
+            spec = CONTACT_TYPES[kind]
+            c = _Contact()
+            c.idx = i
+            c.kind = kind
+            c.ais = kind == "SEA" and rng.random() < AIS_FRACTION
+            r = self.radius_km * 1000.0 * math.sqrt(rng.random())
+            bearing = rng.uniform(0.0, 2.0 * math.pi)
+            c.lat = self.ref_lat + r * math.cos(bearing) / M_PER_DEG
+            c.lon = self.ref_lon + r * math.sin(bearing) / (M_PER_DEG * math.cos(math.radians(self.ref_lat)))
+            c.alt = rng.uniform(*spec["alt"])
+            c.speed = rng.uniform(*spec["speed"])
+            c.heading = rng.uniform(0.0, 2.0 * math.pi)
+            c.climb = 0.0
+            c.turn_rate = 0.0
+            c.maneuver_until = 0.0
+            c.t = 0.0
+            c.label = f"{spec['label']}-{i:05d}"
+            c.rcs = round(rng.uniform(*spec["rcs"]), 3)
+            c.ir = round(rng.uniform(*spec["ir"]), 3)
+            out.append(c)
+        return out
+
+    def observations(self) -> Iterator[Dict[str, Any]]:
+        rng = random.Random(self.seed)
+        contacts = self._spawn(rng)
+        # Per sensor: contacts it can see, and which of them are currently faded out
+        visible = []
+        for s in self.sensors:
+            sees = set(s["sees"])
+            visible.append([
+                c for c in contacts
+                if c.kind in sees or ("SEA_AIS" in sees and c.ais)
+            ])
+        faded: List[set] = [set() for _ in self.sensors]
+
+        # Scan schedule: (time offset, sensor index); first scans staggered
+        schedule = [(rng.uniform(0.0, s["period_s"]), k) for k, s in enumerate(self.sensors)]
+        heapq.heapify(schedule)
+        seq = 0
+
+        while schedule:
+            t, k = heapq.heappop(schedule)
+            if t > self.duration_s:
+                continue
+            s = self.sensors[k]
+            heapq.heappush(schedule, (t + s["period_s"], k))
+            ts_utc = datetime.fromtimestamp(self.start_ts + t, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+            down = faded[k]
+
+            for c in visible[k]:
+                c.step(t, rng)
+                if c.idx in down:
+                    if rng.random() < s["recover_p"]:
+                        down.discard(c.idx)
+                    continue
+                if rng.random() < s["fade_p"]:
+                    down.add(c.idx)
+                    continue
+                if rng.random() > s["pd"]:
+                    continue
+
+                seq += 1
+                pos_sigma = s["pos_sigma_m"]
+                vel_sigma = s["vel_sigma_mps"]
+                obs: Dict[str, Any] = {
+                    "observation_id": f"SIM-{self.seed}-{seq:09d}",
+                    "sensor_type": s["sensor_type"],
+                    "sensor_id": s["sensor_id"],
+                    "ts_utc": ts_utc,
+                    "position": {
+                        "lat": round(c.lat + rng.gauss(0.0, pos_sigma) / M_PER_DEG, 6),
+                        "lon": round(c.lon + rng.gauss(0.0, pos_sigma) / (M_PER_DEG * math.cos(math.radians(c.lat))), 6),
+                        "alt_m": round(max(0.0, c.alt + rng.gauss(0.0, s["alt_sigma_m"])), 1),
+                    },
+                    "velocity": {
+                        "vx_mps": round(c.speed * math.sin(c.heading) + rng.gauss(0.0, vel_sigma), 2),
+                        "vy_mps": round(c.speed * math.cos(c.heading) + rng.gauss(0.0, vel_sigma), 2),
+                        "vz_mps": round(c.climb + (rng.gauss(0.0, vel_sigma) if c.kind != "SEA" else 0.0), 2),
+                    },
+                    "signature": {"rcs": c.rcs, "ir": c.ir},
+                    "quality": {
+                        "snr_db": round(rng.uniform(10.0, 22.0), 1),
+                        "confidence": round(min(1.0, max(0.0, s["confidence"] + rng.gauss(0.0, 0.03))), 3),
+                    },
+                    "contact_type": c.kind,
+                    "label": c.label,
+                    "metadata": {"scenario": "synthetic", "seed": self.seed, "truth_id": f"SIM-{self.seed}-{c.idx:05d}"},
+                }
+                if self.object_ids:
+                    obs["object_id"] = obs["metadata"]["truth_id"]
+                yield obs
+
+    def records(self) -> Iterator[Record]:
+        for obs in self.observations():
+            yield parse_ts(obs["ts_utc"]), json.dumps(obs, separators=(",", ":")).encode()
+
+
+def rate_batches(records: Iterable[Record], obs_per_s: float, batch_max: int = REPLAY_BATCH_MAX) -> Iterator[List[bytes]]:
+    """Fixed-size batches released at a target observations/s (0 = unpaced)."""
+    batch_max = max(1, min(batch_max, MAX_BATCH_ITEMS))
+    start = time.monotonic()
+    sent = 0
+    batch: List[bytes] = []
+    for _, line in records:
+        batch.append(line)
+        if len(batch) >= batch_max:
+            if obs_per_s > 0:
+                wait = start + sent / obs_per_s - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            sent += len(batch)
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m iamd_common.scenario", description="Generate a synthetic multi-sensor scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--contacts", type=int, default=1000)
+    parser.add_argument("--duration-s", type=float, default=300.0, help="scenario time span")
+    parser.add_argument("--mix", default="AIR=0.3,SEA=0.3,BENIGN=0.4", help="contact type weights")
+    parser.add_argument("--radius-km", type=float, default=100.0, help="spawn radius around the reference point")
+    parser.add_argument("--start", default=START_UTC, help="scenario start time (ISO-8601)")
+    parser.add_argument("--object-ids", action="store_true", help="set object_id to the ground-truth id")
+    parser.add_argument("--out", help="write JSONL here ('-' for stdout)")
+    parser.add_argument("--ingest", action="store_true", help="post to sensor-ingest instead of writing a file")
+    parser.add_argument("--url", default=REPLAY_URL, help="sensor-ingest base URL")
+    parser.add_argument("--obs-per-s", type=float, default=0.0, help="ingest target rate (0 = as fast as possible)")
+    parser.add_argument("--batch-max", type=int, default=REPLAY_BATCH_MAX)
+    parser.add_argument("--concurrency", type=int, default=REPLAY_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    if bool(args.out) == args.ingest:
+        parser.error("choose exactly one of --out or --ingest")
+
+    gen = ScenarioGenerator(
+        contacts=args.contacts,
+        duration_s=args.duration_s,
+        seed=args.seed,
+        mix=parse_mix(args.mix),
+        radius_km=args.radius_km,
+        start_utc=args.start,
+        object_ids=args.object_ids,
+    )
+
+    if args.out:
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        count = 0
+        try:
+            for _, line in gen.records():
+                out.write(line + b"\n")
+                count += 1
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        print(json.dumps({"observations": count, "out": args.out}), file=sys.stderr)
+        return 0
+
+    replayer = Replayer(args.url, concurrency=args.concurrency)
+    try:
+        summary = replayer.run(rate_batches(gen.records(), args.obs_per_s, args.batch_max))
+    finally:
+        replayer.close()
+    summary["target_obs_per_s"] = args.obs_per_s
+    print(json.dumps(summary))
+    return 0 if summary["batches_failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
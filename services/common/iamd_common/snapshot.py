@@ -0,0 +1,442 @@
+"""
+Snapshot + write-ahead log for a service's in-memory state.
+
+Files in data_dir, per journal name:
+
+    <name>-snapshot-<gen>.bin   full state as of the start of wal <gen>
+    <name>-wal-<gen>.log        changes since then, one framed record each
+
+A checkpoint switches appends to a new WAL generation under the caller's
+lock, copies references to the state (cheap), then serializes and writes
+the snapshot from the snapshot thread without the lock. Records written
+while it runs land in the new WAL, so snapshot + replay always converges
+as long as every record carries an object's full state (an upsert or a
+delete), never an increment. Once the snapshot is durable, older
+snapshots and WALs are removed.
+
+Snapshot layout: magic, a JSON header (meta + section table), then
+8-byte aligned raw sections (numpy arrays or bytes). Loading mmaps the
+file; sections come back as memoryviews / zero-copy arrays.
+
+WAL records: <u32 length><u32 crc32> payload. Replay stops at the first
+torn or corrupt record and truncates it away.
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .metrics import sampled, stage
+
+STATE_DIR = os.getenv("STATE_DIR", "state")
+STATE_SNAPSHOT_INTERVAL_S = float(os.getenv("STATE_SNAPSHOT_INTERVAL_S", "30"))
+# A WAL this large triggers a snapshot before the interval is up
+STATE_WAL_MAX_BYTES = int(os.getenv("STATE_WAL_MAX_BYTES", str(64 * 1024 * 1024)))
+# fsync every WAL append (survives host crashes, not just process restarts)
+STATE_WAL_FSYNC = os.getenv("STATE_WAL_FSYNC", "false").lower() in ("1", "true", "yes")
+
+MAGIC = b"IAMDSNP1"
+_FRAME = struct.Struct("<II")
+_HEADER_LEN = struct.Struct("<Q")
+
+_WAL_APPEND = stage("wal_append")
+_SNAPSHOT = stage("snapshot_write")
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class Snapshot:
+    """Read-only, mmap-backed view of a snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path}: not a snapshot")
+        (hlen,) = _HEADER_LEN.unpack_from(self._mm, 8)
+        header = json.loads(self._mm[16:16 + hlen])
+        self._base = _align8(16 + hlen)
+        self.generation: int = header["generation"]
+        self.created_utc: str = header["created_utc"]
+        self.meta: Dict[str, Any] = header["meta"]
+        self.sections: Dict[str, Dict[str, Any]] = header["sections"]
+        for name, s in self.sections.items():
+            if self._base + s["offset"] + s["length"] > len(self._mm):
+                self._mm.close()
+                raise ValueError(f"{path}: section {name} truncated")
+
+    def raw(self, name: str) -> memoryview:
+        s = self.sections[name]
+        start = self._base + s["offset"]
+        return memoryview(self._mm)[start:start + s["length"]]
+
+    def array(self, name: str):
+        """Zero-copy numpy view of a section written from an array."""
+        import numpy as np
+
+        s = self.sections[name]
+        return np.frombuffer(self.raw(name), dtype=s["dtype"]).reshape(s["shape"])
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except BufferError:
+            # Arrays still reference the mapping; it closes when they go
+            pass
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_snapshot(path: str, generation: int, meta: Dict[str, Any], sections: Dict[str, Any]) -> int:
+    """Write sections (bytes or C-contiguous arrays) atomically; returns bytes written."""
+    table: Dict[str, Dict[str, Any]] = {}
+    views: List[memoryview] = []
+    offset = 0
+    for name, obj in sections.items():
+        view = memoryview(obj)
+        if not view.c_contiguous:
+            raise ValueError(f"section {name} is not contiguous")
+        entry: Dict[str, Any] = {"offset": offset, "length": view.nbytes}
+        if hasattr(obj, "dtype"):
+            entry["dtype"] = obj.dtype.str
+            entry["shape"] = list(obj.shape)
+        table[name] = entry
+        views.append(view.cast("B") if view.nbytes else view)
+        offset = _align8(offset + view.nbytes)
+
+    header = json.dumps({
+        "generation": generation,
+        "created_utc": datetime.now(timezone.utc).isoformat(),
+        "meta": meta,
+        "sections": table,
+    }, separators=(",", ":")).encode()
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        head = MAGIC + _HEADER_LEN.pack(len(header)) + header
+        f.write(head + b"\0" * (_align8(len(head)) - len(head)))
+        for view in views:
+            f.write(view)
+            pad = _align8(view.nbytes) - view.nbytes
+            if pad:
+                f.write(b"\0" * pad)
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, path)
+    _fsync_dir(os.path.dirname(path) or ".")
+    return size
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_wal(path: str) -> Tuple[List[bytes], int]:
+    """Records of one WAL file and the byte length of its valid prefix."""
+    with open(path, "rb") as f:
+        data = f.read()
+    out: List[bytes] = []
+    pos = 0
+    while pos + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, pos)
+        end = pos + _FRAME.size + length
+        if end > len(data):
+            break
+        payload = data[pos + _FRAME.size:end]
+        if zlib.crc32(payload) != crc:
+            break
+        out.append(payload)
+        pos = end
+    return out, pos
+
+
+class StateJournal:
+    """
+    Snapshot + WAL files for one in-memory state (see module docstring).
+
+    Usage:
+        journal.restore(load)               # at startup: load(snapshot, records) -> count
+        journal.append([payload, ...])      # after each change, under the state lock
+        journal.start(lock, capture, build) # periodic checkpoints
+        journal.close()                     # final checkpoint on shutdown
+
+    capture() runs under `lock` right after the WAL switch and should only
+    copy references / arrays; build(captured) runs without it and returns
+    (meta, sections) for the snapshot.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        name: str,
+        interval_s: float = STATE_SNAPSHOT_INTERVAL_S,
+        wal_max_bytes: int = STATE_WAL_MAX_BYTES,
+        fsync_wal: bool = STATE_WAL_FSYNC,
+    ):
+        self.data_dir = data_dir
+        self.name = name
+        self.interval_s = interval_s
+        self.wal_max_bytes = wal_max_bytes
+        self.fsync_wal = fsync_wal
+
+        self._lock = threading.Lock()          # WAL file handle
+        self._checkpoint_lock = threading.Lock()
+        self._fh = None
+        self._gen = 0
+        self._wal_bytes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._source: Optional[Tuple[Any, Callable, Callable]] = None
+        self._halt = threading.Event()
+        self._pattern = re.compile(rf"^{re.escape(name)}-(snapshot|wal)-(\d+)\.(bin|log)$")
+
+        self.stats: Dict[str, Any] = {
+            "generation": 0,
+            "wal_records": 0,
+            "wal_bytes": 0,
+            "snapshots": 0,
+            "snapshot_errors": 0,
+            "last_snapshot_utc": None,
+            "last_snapshot_ms": None,
+            "last_snapshot_bytes": None,
+            "restored_from_generation": None,
+            "restored_records": 0,
+            "restored_items": 0,
+            "restore_ms": None,
+            "torn_bytes_truncated": 0,
+        }
+        os.makedirs(data_dir, exist_ok=True)
+        sampled(
+            f"iamd_state_{name}",
+            f"Snapshot/WAL state of the {name} journal",
+            self._gauges,
+            ("field",),
+        )
+
+    # -- files ---------------------------------------------------------------
+
+    def _path(self, kind: str, gen: int) -> str:
+        ext = "bin" if kind == "snapshot" else "log"
+        return os.path.join(self.data_dir, f"{self.name}-{kind}-{gen:08d}.{ext}")
+
+    def _files(self) -> Dict[str, List[int]]:
+        found: Dict[str, List[int]] = {"snapshot": [], "wal": []}
+        for entry in os.listdir(self.data_dir):
+            m = self._pattern.match(entry)
+            if m:
+                found[m.group(1)].append(int(m.group(2)))
+        for gens in found.values():
+            gens.sort()
+        return found
+
+    def _open_wal(self, gen: int) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        self._gen = gen
+        self._fh = open(self._path("wal", gen), "ab")
+        self._wal_bytes = self._fh.tell()
+        self.stats["generation"] = gen
+
+    # -- startup -------------------------------------------------------------
+
+    def recover(self) -> Tuple[Optional[Snapshot], Iterator[bytes]]:
+        """
+        Newest readable snapshot (or None) and an iterator over every WAL
+        record written after it, oldest first. New appends go to a fresh
+        WAL generation. Close the snapshot once it has been loaded.
+        """
+        files = self._files()
+        snap: Optional[Snapshot] = None
+        for gen in reversed(files["snapshot"]):
+            try:
+                snap = Snapshot(self._path("snapshot", gen))
+                break
+            except (OSError, ValueError, KeyError):
+                continue
+        start = snap.generation if snap is not None else 0
+        wal_gens = [g for g in files["wal"] if g >= start]
+        self.stats["restored_from_generation"] = snap.generation if snap is not None else None
+
+        with self._lock:
+            self._open_wal(max([start] + wal_gens) + 1)
+        return snap, self._replay(wal_gens)
+
+    def restore(self, load: Callable[[Optional[Snapshot], Iterator[bytes]], int]) -> int:
+        """recover() into load(snapshot, records); returns its item count."""
+        t0 = time.perf_counter()
+        snap, records = self.recover()
+        try:
+            count = load(snap, records)
+        finally:
+            if snap is not None:
+                snap.close()
+        self.stats["restored_items"] = count
+        self.stats["restore_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+        return count
+
+    def _replay(self, gens: List[int]) -> Iterator[bytes]:
+        for gen in gens:
+            path = self._path("wal", gen)
+            records, valid = read_wal(path)
+            size = os.path.getsize(path)
+            if valid < size:
+                # Torn tail from a crash mid-append
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+                self.stats["torn_bytes_truncated"] += size - valid
+            for payload in records:
+                self.stats["restored_records"] += 1
+                yield payload
+
+    # -- appends -------------------------------------------------------------
+
+    def append(self, payloads: List[bytes]) -> None:
+        """Frame and write records in one write; flushed to the OS on return."""
+        if not payloads:
+            return
+        t0 = time.perf_counter()
+        buf = b"".join(_FRAME.pack(len(p), zlib.crc32(p)) + p for p in payloads)
+        with self._lock:
+            if self._fh is None:
+                self._open_wal(self._gen + 1)
+            self._fh.write(buf)
+            self._fh.flush()
+            if self.fsync_wal:
+                os.fsync(self._fh.fileno())
+            self._wal_bytes += len(buf)
+        self.stats["wal_records"] += len(payloads)
+        self.stats["wal_bytes"] += len(buf)
+        _WAL_APPEND.observe(time.perf_counter() - t0)
+
+    def _rotate(self) -> int:
+        with self._lock:
+            self._open_wal(self._gen + 1)
+            return self._gen
+
+    # -- checkpoints ---------------------------------------------------------
+
+    def checkpoint(self, lock, capture: Callable[[], Any], build: Callable[[Any], Tuple[Dict[str, Any], Dict[str, Any]]]) -> bool:
+        """Switch WAL, capture under lock, write the snapshot without it."""
+        with self._checkpoint_lock:
+            t0 = time.perf_counter()
+            with lock:
+                gen = self._rotate()
+                captured = capture()
+            path = self._path("snapshot", gen)
+            try:
+                meta, sections = build(captured)
+                size = write_snapshot(path, gen, meta, sections)
+            except Exception:
+                self.stats["snapshot_errors"] += 1
+                try:
+                    os.remove(path + ".tmp")
+                except OSError:
+                    pass
+                return False
+            self._prune(gen)
+            elapsed = time.perf_counter() - t0
+            _SNAPSHOT.observe(elapsed)
+            self.stats["snapshots"] += 1
+            self.stats["last_snapshot_utc"] = datetime.now(timezone.utc).isoformat()
+            self.stats["last_snapshot_ms"] = round(elapsed * 1000.0, 3)
+            self.stats["last_snapshot_bytes"] = size
+            return True
+
+    def _prune(self, gen: int) -> None:
+        files = self._files()
+        for kind in ("snapshot", "wal"):
+            for g in files[kind]:
+                if g < gen:
+                    try:
+                        os.remove(self._path(kind, g))
+                    except OSError:
+                        pass
+
+    def start(self, lock, capture: Callable[[], Any], build: Callable[[Any], Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        """Checkpoint every interval_s, or sooner once the WAL passes wal_max_bytes."""
+        self._source = (lock, capture, build)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._halt.clear()
+
+        def run() -> None:
+            last = time.monotonic()
+            while not self._halt.wait(min(1.0, self.interval_s)):
+                due = time.monotonic() - last >= self.interval_s
+                if due or self._wal_bytes >= self.wal_max_bytes:
+                    self.checkpoint(lock, capture, build)
+                    last = time.monotonic()
+
+        self._thread = threading.Thread(target=run, name=f"{self.name}-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._halt.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    # -- housekeeping --------------------------------------------------------
+
+    def reset(self, lock, clear: Callable[[], None]) -> None:
+        """
+        clear() the state under lock and drop every snapshot and WAL with
+        it held, so no append lands in a file that is then removed.
+        Locks are taken in checkpoint()'s order: checkpoint, state, WAL.
+        """
+        with self._checkpoint_lock, lock, self._lock:
+            clear()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            files = self._files()
+            for kind in ("snapshot", "wal"):
+                for g in files[kind]:
+                    try:
+                        os.remove(self._path(kind, g))
+                    except OSError:
+                        pass
+            self._open_wal(1)
+
+    def close(self, checkpoint: bool = True) -> None:
+        """Stop the snapshot thread, take a last snapshot if started, close the WAL."""
+        self.stop()
+        if checkpoint and self._source is not None:
+            self.checkpoint(*self._source)
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+                self._fh.close()
+                self._fh = None
+
+    def _gauges(self) -> Dict[Tuple[str, ...], float]:
+        return {
+            ("generation",): self._gen,
+            ("wal_bytes",): self._wal_bytes,
+            ("snapshots",): self.stats["snapshots"],
+            ("snapshot_errors",): self.stats["snapshot_errors"],
+        }
@@ -0,0 +1,40 @@
+"""
+Feed and query timestamps as epoch seconds.
+
+    from iamd_common.times import parse_time, parse_ts
+
+    since = parse_time(request_param)      # ValueError on bad input
+    t = parse_ts(obs.get("ts_utc"))        # None on bad input
+
+Both accept epoch seconds (number or numeric string) or ISO-8601; a
+naive ISO time is taken as UTC. Services wrap parse_time's ValueError
+in a 400 for their query parameters.
+"""
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """Epoch seconds, or None for a missing value. Raises ValueError."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        raise ValueError(f"not a timestamp: {value!r}")
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def parse_ts(value: Any) -> Optional[float]:
+    """parse_time(), with None for anything it cannot parse (feed records)."""
+    try:
+        return parse_time(value)
+    except ValueError:
+        return None
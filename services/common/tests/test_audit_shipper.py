@@ -0,0 +1,87 @@
+"""AuditShipper batches without blocking callers and fails open."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from iamd_common.log import AuditShipper
+
+
+class _AuditLog(ThreadingHTTPServer):
+    """audit-log's /events:batch: records batches, answers `status`, can be held."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.batches = []
+        self.status = 200
+        self.received = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.batches.append(json.loads(body))
+        self.server.received.set()
+        self.server.release.wait(5)
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = _AuditLog()
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    yield srv
+    srv.release.set()
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_events_shipped_in_batches(server):
+    shipper = AuditShipper(server.url, batch_size=10, flush_interval_s=0.05)
+    for i in range(25):
+        assert shipper.submit({"event_id": str(i)})
+    assert shipper.flush(5)
+    assert [e["event_id"] for b in server.batches for e in b] == [str(i) for i in range(25)]
+    assert all(len(b) <= 10 for b in server.batches)
+    stats = shipper.snapshot()
+    assert stats["sent"] == 25 and stats["batches_sent"] == len(server.batches)
+    assert stats["queue_depth"] == 0
+
+
+def test_full_queue_drops_instead_of_blocking(server):
+    server.release.clear()
+    shipper = AuditShipper(server.url, max_queue=2, batch_size=1, flush_interval_s=0.01)
+    assert shipper.submit({"event_id": "0"})
+    assert server.received.wait(5)   # the flusher is now stuck in a send
+    assert shipper.submit({"event_id": "1"})
+    assert shipper.submit({"event_id": "2"})
+    assert not shipper.submit({"event_id": "3"})
+    assert not shipper.flush(0.05)
+    server.release.set()
+    assert shipper.flush(5)
+    stats = shipper.snapshot()
+    assert stats["sent"] == 3 and stats["dropped_queue_full"] == 1
+    assert stats["queue_high_watermark"] == 2
+
+
+def test_failed_send_is_counted_and_dropped(server):
+    server.status = 500
+    shipper = AuditShipper(server.url, batch_size=5, flush_interval_s=0.05)
+    for i in range(5):
+        shipper.submit({"event_id": str(i)})
+    assert shipper.flush(5)
+    stats = shipper.snapshot()
+    assert stats["sent"] == 0
+    assert stats["dropped_send_failed"] == 5 and stats["send_failures"] >= 1
@@ -0,0 +1,82 @@
+"""JWT verify cache: hits skip decoding, but never outlive exp, a key change or the LRU bound."""
+import time
+
+import jwt
+import pytest
+
+from iamd_common import auth
+from iamd_common.auth import auth_stats, issue_token, verify_token
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """A fresh 3-entry cache; returns the list of tokens actually decoded."""
+    monkeypatch.setenv("JWT_SECRET", "test-secret-one-0123456789abcdef0123")
+    monkeypatch.setattr(auth, "_CACHE", auth._VerifyCache(3))
+    seen = []
+    real = jwt.decode
+
+    def counting(token, *args, **kwargs):
+        seen.append(token)
+        return real(token, *args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting)
+    return seen
+
+
+def test_repeat_verify_is_served_from_cache(decodes):
+    token = issue_token("op", "operator")
+    assert verify_token(token)["role"] == "operator"
+    claims = verify_token(token)
+    claims["role"] = "admin"   # callers get a copy
+    assert verify_token(token)["role"] == "operator"
+    assert len(decodes) == 1
+    assert auth_stats() == {"hits": 2, "misses": 1, "expired": 0, "evicted": 0, "cached": 1}
+
+
+def test_cached_token_expires_on_time(decodes, monkeypatch):
+    token = issue_token("op", "operator", ttl_seconds=5)
+    verify_token(token)
+    real = time.time
+    monkeypatch.setattr(auth.time, "time", lambda: real() + 10)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verify_token(token)
+    assert len(decodes) == 1 and auth_stats()["expired"] == 1 and auth_stats()["cached"] == 0
+
+
+def test_key_rotation_drops_cached_tokens(decodes, monkeypatch):
+    token = issue_token("op", "operator")
+    verify_token(token)
+    monkeypatch.setenv("JWT_SECRET", "test-secret-two-0123456789abcdef0123")
+    with pytest.raises(jwt.InvalidSignatureError):
+        verify_token(token)
+    assert len(decodes) == 2 and auth_stats()["cached"] == 0
+
+    fresh = issue_token("op", "operator")
+    verify_token(fresh)
+    verify_token(fresh)
+    assert len(decodes) == 3
+
+
+def test_lru_bound(decodes):
+    tokens = [issue_token(f"op-{i}", "operator") for i in range(5)]
+    for t in tokens[:3]:
+        verify_token(t)
+    verify_token(tokens[0])             # most recently used again
+    verify_token(tokens[3])             # evicts tokens[1], the least recent
+    verify_token(tokens[4])             # evicts tokens[2]
+    assert auth_stats()["cached"] == 3 and auth_stats()["evicted"] == 2
+
+    decodes.clear()
+    verify_token(tokens[0])
+    verify_token(tokens[4])
+    assert decodes == []
+    verify_token(tokens[1])
+    assert decodes == [tokens[1]]
+
+
+def test_failures_are_not_cached(decodes):
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidTokenError):
+            verify_token("not-a-token")
+    assert len(decodes) == 2 and auth_stats()["cached"] == 0
@@ -0,0 +1,30 @@
+"""decode_batch rejects malformed bodies as BatchDecodeError (a 400), never a 500."""
+import pytest
+from fastapi.testclient import TestClient
+
+from iamd_common.auth import issue_token
+from iamd_common.batch import BatchDecodeError, decode_batch
+
+
+@pytest.mark.parametrize("body", [
+    b'[{"sensor_id": "caf\xe9"}]',       # Latin-1, not UTF-8
+    b'{"a": 1}\n{"b": "\xff\xfe"}\n',     # NDJSON with a bad line
+    b"[1, 2",
+])
+def test_malformed_body(body):
+    with pytest.raises(BatchDecodeError):
+        decode_batch(body)
+
+
+@pytest.mark.parametrize("body, count", [(b"", 0), (b"  \n", 0), (b'[{"a": 1}]', 1), (b'{"a": 1}\n\n{"b": 2}\n', 2)])
+def test_array_and_ndjson(body, count):
+    assert len(decode_batch(body)) == count
+
+
+@pytest.mark.parametrize("service", ["sensor-ingest", "track-fusion"])
+def test_non_utf8_batch_is_400(load_app, service):
+    main = load_app(service)
+    headers = {"Authorization": f"Bearer {issue_token('test', 'sensor')}"}
+    with TestClient(main.app) as client:
+        r = client.post("/observations:batch", content=b'[{"sensor_id": "caf\xe9"}]', headers=headers)
+    assert r.status_code == 400
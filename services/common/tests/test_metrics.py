@@ -0,0 +1,30 @@
+"""Counters are exact under concurrent increments; output is Prometheus text."""
+import threading
+
+from iamd_common.metrics import Counter, Histogram
+
+
+def test_concurrent_counter_increments_are_not_lost():
+    child = Counter("test_concurrent", "test", ("stage",)).labels("x")
+    threads = [threading.Thread(target=lambda: [child.inc() for _ in range(50_000)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert child.value == 200_000
+
+
+def test_collect_formats():
+    c = Counter("test_items", "Items", ("stage",))
+    c.labels("a").inc(3)
+    h = Histogram("test_seconds", "Time", buckets=(0.1, 1.0))
+    h.observe(0.05)
+    h.observe(0.5)
+    assert c.collect()[-1] == 'test_items_total{stage="a"} 3'
+    assert h.collect()[2:] == [
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1"} 2',
+        'test_seconds_bucket{le="+Inf"} 2',
+        "test_seconds_sum 0.55",
+        "test_seconds_count 2",
+    ]
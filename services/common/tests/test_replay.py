@@ -0,0 +1,21 @@
+"""paced_batches groups by feed time, independent of the playback rate."""
+import pytest
+
+from iamd_common.replay import paced_batches
+
+
+def _records(times):
+    return [(t, f"{i}".encode()) for i, t in enumerate(times)]
+
+
+@pytest.mark.parametrize("rate", [0.0, 1000.0])
+def test_window_is_feed_time(rate):
+    records = _records([100.0, 100.05, 100.1, 101.0, 101.02, 105.0])
+    batches = list(paced_batches(records, rate=rate, batch_max=100, window_s=0.1))
+    assert batches == [[b"0", b"1", b"2"], [b"3", b"4"], [b"5"]]
+
+
+def test_batch_max_splits_a_scan():
+    records = _records([1.0] * 5)
+    batches = list(paced_batches(records, rate=0.0, batch_max=2, window_s=1.0))
+    assert batches == [[b"0", b"1"], [b"2", b"3"], [b"4"]]
@@ -0,0 +1,25 @@
+"""iamd_common.times: epoch seconds and ISO-8601 parse to the same instant."""
+import pytest
+
+from iamd_common.times import parse_time, parse_ts
+
+T = 1700000000.0
+
+
+@pytest.mark.parametrize("value", [T, int(T), "1700000000", "2023-11-14T22:13:20Z", "2023-11-14T22:13:20+00:00",
+                                   "2023-11-14T22:13:20", "2023-11-15T00:13:20+02:00"])
+def test_parse_time_forms(value):
+    assert parse_time(value) == T
+    assert parse_ts(value) == T
+
+
+@pytest.mark.parametrize("value", [None, ""])
+def test_parse_time_missing(value):
+    assert parse_time(value) is None
+
+
+@pytest.mark.parametrize("value", ["yesterday", "2023-13-40", [T], True])
+def test_parse_time_rejects(value):
+    with pytest.raises(ValueError):
+        parse_time(value)
+    assert parse_ts(value) is None
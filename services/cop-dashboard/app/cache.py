@@ -0,0 +1,100 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from iamd_common.metrics import stage
+
+_FETCH = stage("upstream_fetch")
+
+
+class _Entry:
+    __slots__ = ("value", "has_value", "fresh", "checked_at", "fetched_at", "inflight")
+
+    def __init__(self) -> None:
+        self.value: Any = None
+        self.has_value = False
+        self.fresh = False
+        self.checked_at = float("-inf")
+        self.fetched_at = float("-inf")
+        self.inflight: Optional[asyncio.Task] = None
+
+
+class ViewCache:
+    """
+    Short-TTL cache of upstream JSON views (one entry per client + path).
+
+    - Coalescing: concurrent misses for the same view share one upstream
+      request.
+    - Stale-while-revalidate: once a view has a value, a refresh that takes
+      longer than stale_budget_s is left running and the last value is
+      served, flagged stale. A failed refresh also serves the last value as
+      stale. So a slow or down upstream only degrades its own panel.
+
+    get() returns (value, stale); value is None until the first success.
+    """
+
+    def __init__(self, ttl_s: float = 0.5, stale_budget_s: float = 0.25, timeout_s: float = 2.0):
+        self.ttl_s = ttl_s
+        self.stale_budget_s = stale_budget_s
+        self.timeout_s = timeout_s
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "fetches": 0,
+            "coalesced": 0,
+            "stale_served": 0,
+            "errors": 0,
+        }
+
+    async def get(self, client, path: str) -> Tuple[Any, bool]:
+        entry = self._entries.get((client.base_url, path))
+        if entry is None:
+            entry = self._entries[(client.base_url, path)] = _Entry()
+
+        if time.monotonic() - entry.checked_at < self.ttl_s:
+            self.stats["hits"] += 1
+            return entry.value, not entry.fresh
+
+        if entry.inflight is None or entry.inflight.done():
+            entry.inflight = asyncio.create_task(self._refresh(entry, client, path))
+            self.stats["fetches"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        # shield: a waiter giving up must not cancel the shared request
+        if not entry.has_value:
+            await asyncio.shield(entry.inflight)
+            return entry.value, not entry.fresh
+        try:
+            await asyncio.wait_for(asyncio.shield(entry.inflight), self.stale_budget_s)
+        except asyncio.TimeoutError:
+            self.stats["stale_served"] += 1
+            return entry.value, True
+        return entry.value, not entry.fresh
+
+    def age_s(self, client, path: str) -> Optional[float]:
+        entry = self._entries.get((client.base_url, path))
+        if entry is None or not entry.has_value:
+            return None
+        return time.monotonic() - entry.fetched_at
+
+    def clear(self) -> None:
+        # In-flight refreshes finish into the dropped entries, unseen
+        self._entries.clear()
+
+    async def _refresh(self, entry: _Entry, client, path: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path, timeout=self.timeout_s)
+            if r.status_code != 200:
+                raise ValueError(f"HTTP {r.status_code}")
+            entry.value = r.json()
+            entry.has_value = True
+            entry.fresh = True
+            entry.fetched_at = time.monotonic()
+        except Exception:
+            self.stats["errors"] += 1
+            entry.fresh = False
+        _FETCH.observe(time.perf_counter() - t0)
+        entry.checked_at = time.monotonic()
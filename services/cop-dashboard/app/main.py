@@ -1,9 +1,11 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi import HTTPException
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
 import os
-import requests
 import uuid
 import time
 import random
@@ -11,8 +13,22 @@ import math
 import json
 
 from iamd_common.auth import issue_token
+from iamd_common.clients import get_async_client, aclose_all
+from iamd_common.codec import MEDIA_TYPE, dumps
+from iamd_common.metrics import CONTENT_TYPE, render, sampled
 
-app = FastAPI(title="cop-dashboard", version="0.2.0")
+from .cache import ViewCache
+from .stream import LiveHub
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    await HUB.close()
+    await aclose_all()
+
+
+app = FastAPI(title="cop-dashboard", version="0.2.0", lifespan=_lifespan)
 templates = Jinja2Templates(directory="app/templates")
 
 SENSOR_INGEST_URL = os.getenv("SENSOR_INGEST_URL", "http://sensor-ingest:8001")
@@ -20,28 +36,100 @@ TRACK_FUSION_URL = os.getenv("TRACK_FUSION_URL", "http://track-fusion:8002")
 THREAT_SCORING_URL = os.getenv("THREAT_SCORING_URL", "http://threat-scoring:8003")
 AUDIT_URL = os.getenv("AUDIT_URL", "http://audit-log:8004")
 
+# Pooled keep-alive clients, one per upstream
+INGEST = get_async_client("sensor-ingest", SENSOR_INGEST_URL)
+FUSION = get_async_client("track-fusion", TRACK_FUSION_URL)
+SCORING = get_async_client("threat-scoring", THREAT_SCORING_URL)
+AUDIT = get_async_client("audit-log", AUDIT_URL)
+
 JWT_SECRET = os.getenv("JWT_SECRET", "dev_super_secret_change_me")
+# Demo operator token: 2 hours, re-issued once less than the margin remains
+TOKEN_TTL_S = int(os.getenv("TOKEN_TTL_S", "7200"))
+TOKEN_REFRESH_MARGIN_S = float(os.getenv("TOKEN_REFRESH_MARGIN_S", "300"))
 
 REF_LAT = float(os.getenv("REF_LAT", "29.7604"))
 REF_LON = float(os.getenv("REF_LON", "-95.3698"))
 
+# Upstream view cache shared by the page, /api/* polls and /api/stream
+CACHE_TTL_S = float(os.getenv("CACHE_TTL_S", "0.5"))
+CACHE_STALE_BUDGET_S = float(os.getenv("CACHE_STALE_BUDGET_S", "0.25"))
+UPSTREAM_TIMEOUT_S = float(os.getenv("UPSTREAM_TIMEOUT_S", "2"))
+
+# /api/stream: one shared upstream poll, pushed to every console
+STREAM_INTERVAL_S = float(os.getenv("STREAM_INTERVAL_S", "1.0"))
+STREAM_TRACK_LIMIT = int(os.getenv("STREAM_TRACK_LIMIT", "200"))
+STREAM_EVENT_LIMIT = int(os.getenv("STREAM_EVENT_LIMIT", "50"))
+STREAM_QUEUE_MAX = int(os.getenv("STREAM_QUEUE_MAX", "64"))
+STREAM_KEEPALIVE_S = float(os.getenv("STREAM_KEEPALIVE_S", "15"))
+
 
 RATIONALE_MAP = {
     "closing_rate_gt_threshold": "High closing speed exceeds threshold",
     "no_ais_match": "No AIS match (identity/attribution gap)",
     "altitude_high": "High altitude profile",
     "surface_contact": "Surface contact without positive ID",
+    "low_track_confidence": "Intermittent track quality / sensor disagreement",
 }
 
 
-def _get_json(url: str, default):
-    try:
-        r = requests.get(url, timeout=2)
-        if r.status_code != 200:
-            return default
-        return r.json()
-    except Exception:
-        return default
+CACHE = ViewCache(ttl_s=CACHE_TTL_S, stale_budget_s=CACHE_STALE_BUDGET_S, timeout_s=UPSTREAM_TIMEOUT_S)
+
+# Panel name -> (upstream, path, default when it has never answered)
+PANEL_VIEWS = {
+    "tracks": (FUSION, "/tracks", []),
+    "threats": (SCORING, "/threats", []),
+    "fusion_stats": (FUSION, "/stats", {}),
+    "scoring_stats": (SCORING, "/stats", {}),
+    "events": (AUDIT, "/events", []),
+}
+
+# Same panels for the live stream; None tells the hub to keep its last value
+STREAM_VIEWS = {
+    "tracks": (FUSION, f"/tracks?limit={STREAM_TRACK_LIMIT}", None),
+    "threats": (SCORING, f"/threats?limit={STREAM_TRACK_LIMIT}", None),
+    "fusion_stats": (FUSION, "/stats", None),
+    "scoring_stats": (SCORING, "/stats", None),
+    "events": (AUDIT, f"/events?limit={STREAM_EVENT_LIMIT}", None),
+}
+
+
+async def _views(views: dict, names=None):
+    # All upstream calls in flight at once; returns (data, stale flag per panel)
+    names = list(names or views)
+    results = await asyncio.gather(*(CACHE.get(views[n][0], views[n][1]) for n in names))
+    data, stale = {}, {}
+    for name, (value, is_stale) in zip(names, results):
+        data[name] = value if value is not None else views[name][2]
+        stale[name] = is_stale
+    return data, stale
+
+
+async def _fetch_picture() -> dict:
+    data, _ = await _views(STREAM_VIEWS)
+    return data
+
+
+def _json_etag(request: Request, payload: dict) -> Response:
+    # Consoles re-polling an unchanged picture get a bodiless 304
+    body = dumps(payload, default=str)
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=MEDIA_TYPE, headers=headers)
+
+
+HUB = LiveHub(_fetch_picture, interval_s=STREAM_INTERVAL_S, queue_max=STREAM_QUEUE_MAX)
+
+sampled("iamd_view_cache", "Panel cache lookups by outcome", lambda: {(k,): v for k, v in CACHE.stats.items()}, ("outcome",), kind="counter")
+sampled("iamd_stream_clients", "Connected live-stream clients", lambda: HUB.stats["clients"])
+sampled(
+    "iamd_stream",
+    "Live-stream poll and fan-out counters",
+    lambda: {(k,): v for k, v in HUB.stats.items() if k != "clients"},
+    ("event",),
+    kind="counter",
+)
 
 
 def _pretty(obj) -> str:
@@ -77,16 +165,23 @@ def _random_offset_miles(center_lat: float, center_lon: float, max_miles: float
     return lat, lon
 
 
+_BEARER = {"value": None, "exp": 0.0}
+
+
 def _bearer_for_demo_operator() -> str:
-    # 2 hours = 7200 seconds
-    token = issue_token("operator@demo.local", "operator", ttl_seconds=7200)
-    return f"Bearer {token}"
-
-def _post_observation(obs: dict, bearer: str):
-    r = requests.post(
-        f"{SENSOR_INGEST_URL}/observations",
-        json=obs,
-        headers={"Authorization": bearer},
+    # Reuse one token until it is close to expiry, so downstream verify caches hit
+    now = time.time()
+    if _BEARER["value"] is None or _BEARER["exp"] - now < TOKEN_REFRESH_MARGIN_S:
+        token = issue_token("operator@demo.local", "operator", ttl_seconds=TOKEN_TTL_S)
+        _BEARER["value"] = f"Bearer {token}"
+        _BEARER["exp"] = now + TOKEN_TTL_S
+    return _BEARER["value"]
+
+async def _post_observation(obs: dict, bearer: str):
+    r = await INGEST.post(
+        "/observations",
+        content=dumps(obs),
+        headers={"Authorization": bearer, "Content-Type": MEDIA_TYPE},
         timeout=3,
     )
     if r.status_code != 200:
@@ -220,12 +315,13 @@ def _build_scenario_observations(scenario: str) -> list[dict]:
 # ----------------------------
 
 @app.get("/", response_class=HTMLResponse)
-def index(request: Request):
-    tracks = _get_json(f"{TRACK_FUSION_URL}/tracks", [])
-    threats = _get_json(f"{THREAT_SCORING_URL}/threats", [])
-    fusion_stats = _get_json(f"{TRACK_FUSION_URL}/stats", {})
-    scoring_stats = _get_json(f"{THREAT_SCORING_URL}/stats", {})
-    events = _get_json(f"{AUDIT_URL}/events", [])
+async def index(request: Request):
+    data, stale = await _views(PANEL_VIEWS)
+    tracks = data["tracks"]
+    threats = data["threats"]
+    fusion_stats = data["fusion_stats"]
+    scoring_stats = data["scoring_stats"]
+    events = data["events"]
 
     observations_ingested = int(fusion_stats.get("observations_ingested", 0) or 0)
     active_tracks = int(fusion_stats.get("active_tracks", len(tracks)) or len(tracks))
@@ -246,64 +342,93 @@ def index(request: Request):
             "observations_ingested": observations_ingested,
             "active_tracks": active_tracks,
             "active_threats": active_threats,
+            "stale": stale,
         }
     )
 
 
 @app.get("/api/snapshot")
-def api_snapshot():
-    tracks = _get_json(f"{TRACK_FUSION_URL}/tracks", [])
-    threats = _get_json(f"{THREAT_SCORING_URL}/threats", [])
-    return JSONResponse({"tracks": tracks, "threats": threats})
+async def api_snapshot(request: Request):
+    data, stale = await _views(PANEL_VIEWS, ("tracks", "threats"))
+    return _json_etag(request, {**data, "stale": stale})
 
 
 # Scenario endpoints (buttons call these)
 @app.post("/scenario/{scenario}")
-def run_scenario(scenario: str):
+async def run_scenario(scenario: str):
     bearer = _bearer_for_demo_operator()
     try:
         obs_list = _build_scenario_observations(scenario)
         for obs in obs_list:
-            _post_observation(obs, bearer)
+            await _post_observation(obs, bearer)
         return {"ok": True, "scenario": scenario, "count": len(obs_list)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/scenario/{scenario}")
-def run_scenario_get(scenario: str):
-    return run_scenario(scenario)
+async def run_scenario_get(scenario: str):
+    return await run_scenario(scenario)
 
 
 # Clear Radar / reset all in-memory services
 @app.post("/clear")
-def clear_all():
+async def clear_all():
     try:
-        requests.post(f"{TRACK_FUSION_URL}/reset", timeout=2)
+        await FUSION.post("/reset", timeout=2)
     except Exception:
         pass
     try:
-        requests.post(f"{THREAT_SCORING_URL}/reset", timeout=2)
+        await SCORING.post("/reset", timeout=2)
     except Exception:
         pass
     try:
-        requests.post(f"{AUDIT_URL}/reset", timeout=2)
+        await AUDIT.post("/reset", timeout=2)
     except Exception:
         pass
+    # Next poll must not serve the pre-clear picture
+    CACHE.clear()
     return {"ok": True}
 
 @app.get("/api/panels")
-def api_panels():
-    tracks = _get_json(f"{TRACK_FUSION_URL}/tracks", [])
-    threats = _get_json(f"{THREAT_SCORING_URL}/threats", [])
-    fusion_stats = _get_json(f"{TRACK_FUSION_URL}/stats", {})
-    scoring_stats = _get_json(f"{THREAT_SCORING_URL}/stats", {})
-    events = _get_json(f"{AUDIT_URL}/events", [])
-    return JSONResponse({
-        "tracks": tracks,
-        "threats": threats,
-        "fusion_stats": fusion_stats,
-        "scoring_stats": scoring_stats,
-        "events": events[-10:],   # keep it light
-    })
+async def api_panels(request: Request):
+    data, stale = await _views(PANEL_VIEWS)
+    data["events"] = data["events"][-10:]   # keep it light
+    return _json_etag(request, {**data, "stale": stale})
+
+
+@app.get("/api/stream")
+async def api_stream(request: Request):
+    """
+    Server-sent events: one `snapshot` on connect, then `delta` messages
+    with track/threat upserts and removals, changed stats and new audit events.
+    """
+    q = HUB.subscribe()
+
+    async def _events():
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(q.get(), timeout=STREAM_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+        finally:
+            HUB.unsubscribe(q)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/stream/stats")
+async def api_stream_stats():
+    return {**HUB.stats, "cache": CACHE.stats}
+
 
+@app.get("/metrics")
+async def metrics():
+    return Response(content=render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from iamd_common.codec import dumps
+
+# Audit event ids remembered to tell new events from already-pushed ones
+SEEN_EVENTS_MAX = 5000
+# Events included in the snapshot a newly connected console starts from
+SNAPSHOT_EVENTS = 10
+
+
+def _frame(kind: str, payload: Dict[str, Any]) -> bytes:
+    # One SSE message, encoded once and shared by every client queue
+    return b"event: " + kind.encode() + b"\ndata: " + dumps(payload, default=str) + b"\n\n"
+
+
+def _diff(old: Dict[str, Dict[str, Any]], rows: List[Dict[str, Any]], key: str) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+    new: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        k = row.get(key)
+        if k is not None:
+            new[str(k)] = row
+    upserts = [row for k, row in new.items() if old.get(k) != row]
+    removes = [k for k in old if k not in new]
+    return new, upserts, removes
+
+
+class LiveHub:
+    """
+    Server push for the COP page.
+
+    One poll loop reads the upstream services and diffs the result against
+    the last picture; each change set is encoded once and put on every
+    connected client's queue. Upstream load is one poll per interval no
+    matter how many consoles are open, and zero when none are.
+
+    fetch() returns {"tracks", "threats", "fusion_stats", "scoring_stats",
+    "events"}; a None value means that upstream failed this round and its
+    part of the picture is left as it was.
+
+    A client whose queue fills up (stalled browser tab) has it emptied and
+    gets a fresh snapshot instead, so a slow reader never holds up the rest.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+        interval_s: float = 1.0,
+        queue_max: int = 64,
+    ):
+        self._fetch = fetch
+        self.interval_s = interval_s
+        self.queue_max = queue_max
+
+        self._clients: Set["asyncio.Queue[bytes]"] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._reset_picture()
+
+        self.stats: Dict[str, int] = {
+            "clients": 0,
+            "polls": 0,
+            "poll_failures": 0,
+            "deltas_sent": 0,
+            "resyncs": 0,
+        }
+
+    def _reset_picture(self) -> None:
+        self._tracks: Dict[str, Dict[str, Any]] = {}
+        self._threats: Dict[str, Dict[str, Any]] = {}
+        self._fusion_stats: Dict[str, Any] = {}
+        self._scoring_stats: Dict[str, Any] = {}
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=SNAPSHOT_EVENTS)
+        self._seen: Deque[str] = deque()
+        self._seen_set: Set[str] = set()
+
+    # -- clients -----------------------------------------------------------
+
+    def subscribe(self) -> "asyncio.Queue[bytes]":
+        q: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=self.queue_max)
+        q.put_nowait(self.snapshot_frame())
+        self._clients.add(q)
+        self.stats["clients"] = len(self._clients)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return q
+
+    def unsubscribe(self, q: "asyncio.Queue[bytes]") -> None:
+        self._clients.discard(q)
+        self.stats["clients"] = len(self._clients)
+        if not self._clients and self._task is not None:
+            # Nobody watching: stop polling and forget the picture
+            self._task.cancel()
+            self._task = None
+            self._reset_picture()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._clients.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "tracks": list(self._tracks.values()),
+            "threats": list(self._threats.values()),
+            "fusion_stats": self._fusion_stats,
+            "scoring_stats": self._scoring_stats,
+            "events": list(self._events),
+        }
+
+    def snapshot_frame(self) -> bytes:
+        return _frame("snapshot", self.snapshot())
+
+    # -- poll loop ---------------------------------------------------------
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                delta = self._apply(await self._fetch())
+                self.stats["polls"] += 1
+                if delta:
+                    self._publish(_frame("delta", delta))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Next round retries; clients keep their last picture
+                self.stats["poll_failures"] += 1
+            await asyncio.sleep(max(0.0, self.interval_s - (time.monotonic() - started)))
+
+    def _apply(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        delta: Dict[str, Any] = {}
+
+        for name, key, attr in (("tracks", "track_id", "_tracks"), ("threats", "threat_id", "_threats")):
+            rows = data.get(name)
+            if rows is None:
+                continue
+            new, upserts, removes = _diff(getattr(self, attr), rows, key)
+            setattr(self, attr, new)
+            if upserts or removes:
+                delta[name] = {"upsert": upserts, "remove": removes}
+
+        for name, attr in (("fusion_stats", "_fusion_stats"), ("scoring_stats", "_scoring_stats")):
+            stats = data.get(name)
+            if stats is not None and stats != getattr(self, attr):
+                setattr(self, attr, stats)
+                delta[name] = stats
+
+        events = data.get("events")
+        if events is not None:
+            fresh = []
+            # Upstream returns newest-first; push oldest-first
+            for evt in reversed(events):
+                eid = str(evt.get("event_id") or json.dumps(evt, sort_keys=True, default=str))
+                if eid in self._seen_set:
+                    continue
+                self._seen.append(eid)
+                self._seen_set.add(eid)
+                if len(self._seen) > SEEN_EVENTS_MAX:
+                    self._seen_set.discard(self._seen.popleft())
+                self._events.appendleft(evt)
+                fresh.append(evt)
+            if fresh:
+                delta["events"] = fresh
+
+        return delta
+
+    def _publish(self, frame: bytes) -> None:
+        resync: Optional[bytes] = None
+        for q in self._clients:
+            try:
+                q.put_nowait(frame)
+                continue
+            except asyncio.QueueFull:
+                pass
+            # Stalled client: drop its backlog, restart it from the current picture
+            while not q.empty():
+                q.get_nowait()
+            if resync is None:
+                resync = self.snapshot_frame()
+            q.put_nowait(resync)
+            self.stats["resyncs"] += 1
+        self.stats["deltas_sent"] += len(self._clients)
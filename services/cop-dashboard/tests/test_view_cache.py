@@ -0,0 +1,107 @@
+"""ViewCache: one upstream call per view per TTL, and a slow or failing upstream serves its last value."""
+import asyncio
+
+import pytest
+
+
+class _Upstream:
+    """Answers GETs with `value` (or `status`) after `delay_s`, counting calls."""
+
+    base_url = "http://upstream"
+
+    def __init__(self):
+        self.calls = 0
+        self.value = {"n": 0}
+        self.status = 200
+        self.delay_s = 0.0
+
+    async def get(self, path, timeout):
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        return _Response(self.status, dict(self.value))
+
+
+class _Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def cache_mod(load_app):
+    return load_app("cop-dashboard", "cache")
+
+
+def test_concurrent_misses_share_one_request(cache_mod):
+    cache = cache_mod.ViewCache(ttl_s=10.0)
+    up = _Upstream()
+    up.delay_s = 0.02
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get(up, "/tracks") for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert up.calls == 1
+    assert results == [({"n": 0}, False)] * 10
+    assert cache.stats["fetches"] == 1 and cache.stats["coalesced"] == 9
+
+
+def test_ttl_hits_then_refetch(cache_mod):
+    cache = cache_mod.ViewCache(ttl_s=0.05)
+    up = _Upstream()
+
+    async def scenario():
+        first = await cache.get(up, "/tracks")
+        up.value = {"n": 1}
+        cached = await cache.get(up, "/tracks")
+        other = await cache.get(up, "/threats")   # separate entry per path
+        await asyncio.sleep(0.06)
+        return first, cached, other, await cache.get(up, "/tracks")
+
+    first, cached, other, refreshed = asyncio.run(scenario())
+    assert first == cached == ({"n": 0}, False)
+    assert other == ({"n": 1}, False)
+    assert refreshed == ({"n": 1}, False)
+    assert up.calls == 3 and cache.stats["hits"] == 1
+
+
+def test_slow_refresh_serves_last_value_as_stale(cache_mod):
+    cache = cache_mod.ViewCache(ttl_s=0.0, stale_budget_s=0.02)
+    up = _Upstream()
+
+    async def scenario():
+        await cache.get(up, "/tracks")
+        up.value, up.delay_s = {"n": 1}, 0.1
+        slow = await cache.get(up, "/tracks")
+        # The refresh kept running and lands for the next caller
+        await asyncio.sleep(0.15)
+        up.delay_s = 0.0
+        return slow, await cache.get(up, "/tracks")
+
+    slow, later = asyncio.run(scenario())
+    assert slow == ({"n": 0}, True)
+    assert later == ({"n": 1}, False)
+    assert cache.stats["stale_served"] == 1
+
+
+def test_failed_refresh_serves_last_value_as_stale(cache_mod):
+    cache = cache_mod.ViewCache(ttl_s=0.0)
+    up = _Upstream()
+    up.status = 503
+
+    async def scenario():
+        never = await cache.get(up, "/tracks")
+        up.status = 200
+        ok = await cache.get(up, "/tracks")
+        up.status, up.value = 500, {"n": 1}
+        return never, ok, await cache.get(up, "/tracks")
+
+    never, ok, failed = asyncio.run(scenario())
+    assert never == (None, True)
+    assert ok == ({"n": 0}, False)
+    assert failed == ({"n": 0}, True)
+    assert cache.stats["errors"] == 2
+    assert cache.age_s(up, "/tracks") >= 0.0 and cache.age_s(up, "/missing") is None
@@ -1,19 +1,42 @@
-from fastapi import FastAPI, Header, HTTPException
-from typing import Optional, Dict, Any
+from fastapi import FastAPI, Header, HTTPException, Depends, Request, Response
+from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
+import time
 import uuid
 import os
-import requests
 
 from pydantic import ValidationError
 from iamd_common.models import Observation
-from iamd_common.auth import verify_token
-from iamd_common.log import audit
+from iamd_common.auth import auth_stats, verify_token
+from iamd_common.log import audit, audit_stats
+from iamd_common.clients import get_client
+from iamd_common.bus import OBSERVATIONS, BusFull, bus_enabled, get_bus
+from iamd_common.batch import decode_batch, validate_observations, BatchDecodeError
+from iamd_common.codec import MEDIA_TYPE, FastJSONResponse, dumps, loads
+from iamd_common.metrics import CONTENT_TYPE, ERRORS, ITEMS, render, stage
 
 app = FastAPI(title="sensor-ingest", version="0.1.0")
 
 TRACK_FUSION_URL = os.getenv("TRACK_FUSION_URL", "http://track-fusion:8002")
 
+NDJSON = "application/x-ndjson"
+
+# Pooled keep-alive client for forwarding
+FUSION = get_client("track-fusion", TRACK_FUSION_URL)
+
+# PIPELINE_TRANSPORT=bus: queue observations for track-fusion instead of calling it
+BUS = get_bus() if bus_enabled() else None
+
+# Hot-path metric children, resolved once
+_DECODE = stage("decode")
+_VALIDATE = stage("validate")
+_FORWARD = stage("forward_track_fusion")
+_OBSERVATIONS = ITEMS.labels("ingest")
+_INVALID = ERRORS.labels("validate", "invalid_observation")
+_FORWARD_FAILED = ERRORS.labels("forward_track_fusion", "unreachable")
+_PUBLISH = stage("bus_publish_observations")
+_PUBLISH_FAILED = ERRORS.labels("bus_publish_observations", "unreachable")
+
 
 def _require_auth(auth_header: Optional[str]) -> Dict[str, Any]:
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -27,22 +50,54 @@ def _require_auth(auth_header: Optional[str]) -> Dict[str, Any]:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+def _require_role(claims: Dict[str, Any]) -> None:
+    if claims.get("role") not in ["sensor", "operator", "system"]:
+        raise HTTPException(status_code=403, detail="Insufficient role")
+
+
+async def _read_body(request: Request) -> bytes:
+    return await request.body()
+
+
+def _publish(observations: List[Dict[str, Any]], authorization: Optional[str]) -> None:
+    """Queue one scan for track-fusion; a full queue is backpressure (503)."""
+    t0 = time.perf_counter()
+    try:
+        BUS.publish(OBSERVATIONS, [{"items": observations, "authorization": authorization}])
+    except BusFull:
+        raise HTTPException(status_code=503, detail="Pipeline queue full", headers={"Retry-After": "1"})
+    except Exception:
+        _PUBLISH_FAILED.inc()
+        raise HTTPException(status_code=502, detail="Failed to queue observations for track-fusion")
+    finally:
+        _PUBLISH.observe(time.perf_counter() - t0)
+
+
 @app.get("/health")
 def health() -> Dict[str, Any]:
-    return {"ok": True}
+    return {"ok": True, "audit": audit_stats(), "auth": auth_stats()}
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    return Response(content=render(), media_type=CONTENT_TYPE)
 
 
 @app.post("/observations")
-def post_observation(payload: Dict[str, Any], authorization: Optional[str] = Header(None)) -> Dict[str, Any]:
+def post_observation(raw: bytes = Depends(_read_body), authorization: Optional[str] = Header(None)) -> Dict[str, Any]:
     claims = _require_auth(authorization)
+    _require_role(claims)
 
-    if claims.get("role") not in ["sensor", "operator", "system"]:
-        raise HTTPException(status_code=403, detail="Insufficient role")
-
+    # Validated straight from the body bytes, which are then forwarded as-is
+    t0 = time.perf_counter()
     try:
-        obs = Observation(**payload)
+        obs = Observation.model_validate_json(raw)
     except ValidationError as e:
+        _INVALID.inc()
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        _VALIDATE.observe(time.perf_counter() - t0)
+    _OBSERVATIONS.inc()
 
     audit({
         "event_id": str(uuid.uuid4()),
@@ -57,14 +112,130 @@ def post_observation(payload: Dict[str, Any], authorization: Optional[str] = Hea
         }
     })
 
+    if BUS is not None:
+        _publish([loads(raw)], authorization)
+        return {"forwarded": True, "queued": True, "fusion_status": None}
+
     # Forward to track-fusion (preserve authorization to enforce Zero Trust end-to-end)
+    t0 = time.perf_counter()
     try:
-        r = requests.post(
-            f"{TRACK_FUSION_URL}/observations",
-            json=obs.model_dump(),
-            headers={"Authorization": authorization},
+        r = FUSION.post(
+            "/observations",
+            data=raw,
+            headers={"Authorization": authorization, "Content-Type": MEDIA_TYPE},
             timeout=3
         )
         return {"forwarded": True, "fusion_status": r.status_code}
     except Exception:
+        _FORWARD_FAILED.inc()
         raise HTTPException(status_code=502, detail="Failed to forward observation to track-fusion")
+    finally:
+        _FORWARD.observe(time.perf_counter() - t0)
+
+
+@app.post("/observations:batch")
+def post_observation_batch(raw: bytes = Depends(_read_body), authorization: Optional[str] = Header(None)) -> Response:
+    """
+    Ingest a scan of observations (JSON array or NDJSON).
+
+    The token is verified once, the list is validated in one pass, and all
+    valid observations go to track-fusion in a single request. Invalid items
+    are reported per index and never forwarded. A fully valid body is
+    forwarded as the bytes received; otherwise only the valid items are
+    re-encoded.
+    """
+    claims = _require_auth(authorization)
+    _require_role(claims)
+
+    t0 = time.perf_counter()
+    try:
+        items = decode_batch(raw)
+    except BatchDecodeError as e:
+        ERRORS.labels("decode", "bad_batch").inc()
+        raise HTTPException(status_code=400, detail=str(e))
+    t1 = time.perf_counter()
+    _DECODE.observe(t1 - t0)
+
+    valid, errors = validate_observations(items)
+    order = sorted(valid)
+    _VALIDATE.observe(time.perf_counter() - t1)
+    _OBSERVATIONS.inc(len(items))
+    if errors:
+        _INVALID.inc(len(errors))
+
+    audit({
+        "event_id": str(uuid.uuid4()),
+        "ts_utc": datetime.now(timezone.utc).isoformat(),
+        "source_service": "sensor-ingest",
+        "actor": f"operator:{claims.get('sub','unknown')}",
+        "action": "OBSERVATION_BATCH_INGESTED",
+        "details": {
+            "count": len(items),
+            "accepted": len(valid),
+            "rejected": len(errors),
+            "observation_ids": [valid[i].observation_id for i in order],
+        }
+    })
+
+    fusion_status = None
+    fusion_results: List[Dict[str, Any]] = []
+    queued = False
+    if order and BUS is not None:
+        # Fused asynchronously: results carry no track_id
+        _publish(items if not errors else [items[i] for i in order], authorization)
+        queued = True
+    elif order:
+        # Forward to track-fusion (preserve authorization to enforce Zero Trust end-to-end)
+        if errors:
+            body, content_type = dumps([items[i] for i in order]), MEDIA_TYPE
+        else:
+            body, content_type = raw, (MEDIA_TYPE if raw.lstrip().startswith(b"[") else NDJSON)
+        t0 = time.perf_counter()
+        try:
+            r = FUSION.post(
+                "/observations:batch",
+                data=body,
+                headers={"Authorization": authorization, "Content-Type": content_type},
+                timeout=10
+            )
+        except Exception:
+            _FORWARD_FAILED.inc()
+            raise HTTPException(status_code=502, detail="Failed to forward observations to track-fusion")
+        finally:
+            _FORWARD.observe(time.perf_counter() - t0)
+        fusion_status = r.status_code
+        if r.status_code == 200:
+            fusion_results = loads(r.content).get("results", [])
+
+    # Map fusion results (indexed within the forwarded sub-list) back to request indices
+    by_index: Dict[int, Dict[str, Any]] = {}
+    for fr in fusion_results:
+        pos = fr.get("index")
+        if isinstance(pos, int) and 0 <= pos < len(order):
+            by_index[order[pos]] = fr
+
+    results: List[Dict[str, Any]] = []
+    for i in range(len(items)):
+        if i in errors:
+            results.append({"index": i, "accepted": False, "error": errors[i]})
+            continue
+        item: Dict[str, Any] = {"index": i, "accepted": True, "observation_id": valid[i].observation_id}
+        fr = by_index.get(i)
+        if fr is not None:
+            item["fused"] = bool(fr.get("ok"))
+            if fr.get("ok"):
+                item["track_id"] = fr.get("track_id")
+                item["created"] = fr.get("created")
+            else:
+                item["error"] = fr.get("error")
+        results.append(item)
+
+    return FastJSONResponse({
+        "forwarded": fusion_status is not None or queued,
+        "queued": queued,
+        "fusion_status": fusion_status,
+        "count": len(items),
+        "accepted": len(valid),
+        "rejected": len(errors),
+        "results": results,
+    })
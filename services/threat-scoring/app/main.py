@@ -1,157 +1,344 @@
-from fastapi import FastAPI
-from typing import Dict, Any, List
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
+import asyncio
+import signal
+import time
 import uuid
-import yaml
 import os
 
-from iamd_common.log import audit
-from .scoring import score_track
-
-app = FastAPI(title="threat-scoring", version="0.1.0")
+from iamd_common.log import audit, audit_stats
+from iamd_common.bus import TRACKS, Consumer, bus_enabled, get_bus
+from iamd_common.codec import FastJSONResponse, JSONDecodeError, loads
+from iamd_common.metrics import CONTENT_TYPE, ITEMS, render, sampled, stage
+from iamd_common.snapshot import STATE_DIR, StateJournal
+from . import persist
+from .records import Threat, codes as rationale_codes, iso, opt_float, threat_id
+from .rules import RulesCache, ScoringRules
+from .scoring import Features, track_features, score_features, score_many
+from .store import ThreatStore
 
 RULES_PATH = os.getenv("RULES_PATH", "app/rules.yaml")
-
-# One threat per track (upsert)
-THREATS_BY_TRACK: Dict[str, Dict[str, Any]] = {}
+RULES_POLL_INTERVAL_S = float(os.getenv("RULES_POLL_INTERVAL_S", "2.0"))
+THREAT_CAPACITY = int(os.getenv("THREAT_CAPACITY", "10"))
+
+# Compiled once at startup; hot-reloaded on mtime change, SIGHUP or POST /rules/reload
+RULES = RulesCache(RULES_PATH)
+
+
+async def _watch_rules() -> None:
+    while True:
+        await asyncio.sleep(RULES_POLL_INTERVAL_S)
+        if RULES.reload_if_changed():
+            await asyncio.to_thread(rescore_all)
+
+
+_RESCORES: set = set()   # in-flight SIGHUP rescores (the loop only keeps weak refs)
+
+
+def _reload_and_rescore() -> None:
+    # Signal handlers run on the loop; keep the rescore off it
+    if RULES.reload():
+        task = asyncio.ensure_future(asyncio.to_thread(rescore_all))
+        _RESCORES.add(task)
+        task.add_done_callback(_RESCORES.discard)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, _reload_and_rescore)
+    except (NotImplementedError, AttributeError, RuntimeError, ValueError):
+        # No SIGHUP on this platform / not in the main thread
+        pass
+    if JOURNAL is not None:
+        restore_state()
+        JOURNAL.start(THREATS.lock, lambda: persist.capture(THREATS, FEATURES_BY_TRACK), persist.build)
+    watcher = asyncio.create_task(_watch_rules())
+    if CONSUMER is not None:
+        CONSUMER.start()
+    yield
+    watcher.cancel()
+    if CONSUMER is not None:
+        CONSUMER.stop()
+    if JOURNAL is not None:
+        JOURNAL.close()
+
+
+app = FastAPI(title="threat-scoring", version="0.1.0", lifespan=_lifespan)
+
+# One threat per track (upsert), bounded with indexed eviction / top-K / counters
+THREATS = ThreatStore(capacity=THREAT_CAPACITY)
+
+# Scoring inputs per active threat, kept so a rules change can rescore in one batch
+FEATURES_BY_TRACK: Dict[str, Features] = {}
+
+# Snapshot + WAL of THREATS and FEATURES_BY_TRACK under STATE_DIR (empty disables)
+JOURNAL = StateJournal(STATE_DIR, "threats") if STATE_DIR else None
+_DIRTY: Dict[str, None] = {}   # track ids changed since the last WAL write
+
+# Hot-path metric children, resolved once
+_SCORING = stage("scoring")
+_UPSERT = stage("threat_upsert")
+_TRACKS = ITEMS.labels("scoring")
+
+sampled("iamd_threats_active", "Threats held in the store", lambda: len(THREATS))
+sampled(
+    "iamd_threats_by_priority",
+    "Active threats per priority band",
+    lambda: {(p,): n for p, n in THREATS.by_priority().items()},
+    ("priority",),
+)
 
 STATS: Dict[str, Any] = {
     "tracks_received": 0,
     "threats_emitted": 0,     # counts updates too (emissions)
     "by_priority": {"HIGH": 0, "MEDIUM": 0, "LOW": 0},
-    "last_update_utc": None
+    "last_update_utc": None   # epoch here, ISO-8601 in /stats
 }
 
 
-def load_rules() -> Dict[str, Any]:
-    with open(RULES_PATH, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+def _persist() -> None:
+    """Append changed threats to the WAL."""
+    if JOURNAL is None or not _DIRTY:
+        return
+    with THREATS.lock:
+        changed = list(_DIRTY)
+        _DIRTY.clear()
+        JOURNAL.append(persist.encode_changes(THREATS, FEATURES_BY_TRACK, changed))
+
 
+def restore_state() -> int:
+    """Load THREATS from the last snapshot + WAL tail. Returns active threats."""
+    if JOURNAL is None:
+        return 0
+    return JOURNAL.restore(lambda snap, records: persist.restore(THREATS, FEATURES_BY_TRACK, snap, records))
 
-def _track_to_threat_id(track_id: str) -> str:
-    # Deterministic ID so the same track always maps to the same threat record
-    # Example: TRK-000001 -> THR-000001
-    if track_id.startswith("TRK-"):
-        return "THR-" + track_id.split("TRK-", 1)[1]
-    return f"THR-{track_id}"
+
+async def _read_body(request: Request) -> bytes:
+    return await request.body()
 
 
 @app.get("/health")
 def health() -> Dict[str, Any]:
-    return {"ok": True, "active_threats": len(THREATS_BY_TRACK)}
+    return {
+        "ok": True,
+        "active_threats": len(THREATS),
+        "audit": audit_stats(),
+        "state": JOURNAL.stats if JOURNAL is not None else None,
+        "bus": CONSUMER.stats if CONSUMER is not None else None,
+    }
 
 
-@app.post("/tracks")
-def ingest_track(track: Dict[str, Any]) -> Dict[str, Any]:
-    rules = load_rules()
+@app.get("/metrics")
+def metrics() -> Response:
+    return Response(content=render(), media_type=CONTENT_TYPE)
+
 
-    now = datetime.now(timezone.utc).isoformat()
+def _upsert_threat(track: Dict[str, Any], features: Features, scored: tuple) -> Threat:
+    now = time.time()
     STATS["tracks_received"] += 1
     STATS["last_update_utc"] = now
 
-    score, rationale, priority, action = score_track(track, rules)
+    score, codes, priority, action = scored
 
     track_id = track.get("track_id", "UNKNOWN")
-    threat_id = _track_to_threat_id(track_id)
     label = track.get("label") or track.get("contact_type") or track.get("track_id")
     contact_type = track.get("contact_type") or "UNKNOWN"
 
-
     # Pull coordinates/altitude so the UI can plot on radar
     state = track.get("state", {})
-    threat = {
-        "threat_id": threat_id,
-        "track_id": track_id,
-        "label": label,
-        "contact_type": contact_type,
-        "priority": priority,
-        "score": score,
-        "rationale": rationale,
-        "recommended_action": action,
-        "last_update_utc": now,
-
-        # For plotting / display (derived from current track state)
-        "state": {
-            "lat": state.get("lat"),
-            "lon": state.get("lon"),
-            "alt_m": state.get("alt_m")
-        }
-    }
-
-    THREATS_BY_TRACK[track_id] = threat
+    threat = Threat(
+        track_id,
+        label,
+        contact_type,
+        score,
+        rationale_codes(codes),
+        priority,
+        action,
+        now,
+        opt_float(state.get("lat")),
+        opt_float(state.get("lon")),
+        opt_float(state.get("alt_m")),
+    )
 
-    if len(THREATS_BY_TRACK) > 10:
-        oldest_track = min(
-            THREATS_BY_TRACK,
-            key=lambda k: THREATS_BY_TRACK[k].get("last_update_utc", "")
-        )
-        del THREATS_BY_TRACK[oldest_track]
+    with THREATS.lock:
+        FEATURES_BY_TRACK[track_id] = features
+        evicted = THREATS.upsert(threat)
+        for tid in evicted:
+            FEATURES_BY_TRACK.pop(tid, None)
+        if JOURNAL is not None:
+            _DIRTY[track_id] = None
+            for tid in evicted:
+                _DIRTY[tid] = None
 
     STATS["threats_emitted"] += 1
 
-    # Recompute by_priority counts from current active threats (more accurate than incrementing)
-    byp = {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
-    for t in THREATS_BY_TRACK.values():
-        p = t.get("priority", "LOW")
-        if p not in byp:
-            byp[p] = 0
-        byp[p] += 1
-    STATS["by_priority"] = byp
-
     audit({
         "event_id": str(uuid.uuid4()),
-        "ts_utc": now,
+        "ts_utc": iso(now),
         "source_service": "threat-scoring",
         "actor": "system",
         "action": "THREAT_UPSERTED",
         "details": {
-            "threat_id": threat_id,
+            "threat_id": threat_id(track_id),
             "track_id": track_id,
             "priority": priority,
             "score": score,
-            "rationale": rationale
+            "rationale": codes
         }
     })
 
     return threat
 
 
-@app.get("/threats")
-def get_threats():
-    threats = list(THREATS_BY_TRACK.values())
+@app.post("/tracks")
+def ingest_track(track: Dict[str, Any]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    features = track_features(track)
+    scored = score_features(features, RULES.rules)
+    t1 = time.perf_counter()
+    _SCORING.observe(t1 - t0)
+    threat = _upsert_threat(track, features, scored)
+    _persist()
+    _UPSERT.observe(time.perf_counter() - t1)
+    _TRACKS.inc()
+    return threat.to_doc()
+
+
+def _score_batch(tracks: List[Dict[str, Any]]) -> List[Threat]:
+    # One rules snapshot and one vectorized scoring pass for the whole batch
+    t0 = time.perf_counter()
+    features = [track_features(t) for t in tracks]
+    scored = score_many(features, RULES.rules)
+    t1 = time.perf_counter()
+    _SCORING.observe(t1 - t0)
+    threats = [_upsert_threat(t, f, s) for t, f, s in zip(tracks, features, scored)]
+    _persist()
+    _UPSERT.observe(time.perf_counter() - t1)
+    _TRACKS.inc(len(tracks))
+    return threats
+
+
+@app.post("/tracks:batch")
+def ingest_track_batch(raw: bytes = Depends(_read_body)) -> Response:
+    """Score a JSON array of tracks (the body track-fusion forwards per scan)."""
+    try:
+        tracks = loads(raw)
+    except JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed batch body: {e}")
+    if not isinstance(tracks, list) or not all(isinstance(t, dict) for t in tracks):
+        raise HTTPException(status_code=400, detail="Batch body must be a JSON array of tracks")
+    threats = _score_batch(tracks)
+    return FastJSONResponse({"ok": True, "count": len(threats), "threats": [t.to_doc() for t in threats]})
+
+
+def _consume_tracks(msg: Dict[str, Any]) -> None:
+    # Upserts are keyed by track, so a redelivered batch is harmless
+    _score_batch(msg.get("tracks") or [])
+
+
+# PIPELINE_TRANSPORT=bus: score track batches published by track-fusion
+CONSUMER = Consumer(get_bus(), TRACKS, _consume_tracks) if bus_enabled() else None
+
+
+def rescore_all(rules: Optional[ScoringRules] = None) -> Dict[str, Any]:
+    """
+    Re-evaluate every active threat against the current rules in one
+    vectorized pass (used after a rules reload).
+    """
+    rules = rules or RULES.rules
+    start = time.perf_counter()
+
+    # Oldest first, so reindexing preserves recency order inside score buckets.
+    # Score outside the lock; ingest keeps running meanwhile.
+    with THREATS.lock:
+        track_ids = [tid for tid in THREATS.track_ids() if tid in FEATURES_BY_TRACK]
+        features = [FEATURES_BY_TRACK[tid] for tid in track_ids]
+    scored = score_many(features, rules)
+
+    rescored = 0
+    with THREATS.lock:
+        for tid, f, (score, codes, priority, action) in zip(track_ids, features, scored):
+            threat = THREATS.get(tid)
+            if threat is None or FEATURES_BY_TRACK.get(tid) is not f:
+                # Evicted or re-ingested meanwhile: the newer upsert wins
+                continue
+            threat.score = score
+            threat.priority = priority
+            threat.action = action
+            threat.codes = rationale_codes(codes)
+            THREATS.reindex(tid)
+            rescored += 1
+            if JOURNAL is not None:
+                _DIRTY[tid] = None
+    _persist()
+
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    audit({
+        "event_id": str(uuid.uuid4()),
+        "ts_utc": datetime.now(timezone.utc).isoformat(),
+        "source_service": "threat-scoring",
+        "actor": "system",
+        "action": "THREATS_RESCORED",
+        "details": {
+            "rules_version": RULES.current.version,
+            "rules_sha256": RULES.current.sha256,
+            "threats": rescored,
+            "elapsed_ms": round(elapsed_ms, 3),
+        }
+    })
+    return {"rescored": rescored, "elapsed_ms": elapsed_ms}
 
-    # highest score first, then most recent
-    threats.sort(
-        key=lambda t: (t.get("score", 0.0), t.get("last_update_utc", "")),
-        reverse=True
-    )
 
-    return threats[:10]
+@app.get("/rules")
+def get_rules() -> Dict[str, Any]:
+    return RULES.describe()
 
 
+@app.post("/rules/reload")
+def reload_rules() -> Dict[str, Any]:
+    changed = RULES.reload()
+    if RULES.last_error:
+        # Rejected edit: previous rules remain active
+        raise HTTPException(status_code=422, detail={"error": RULES.last_error, "active": RULES.describe()})
+    rescored = rescore_all() if changed else None
+    return {"reloaded": changed, "rescore": rescored, **RULES.describe()}
 
-@app.get("/stats")
-def stats() -> Dict[str, Any]:
-    # Keep stats consistent with current in-memory state
-    active = len(THREATS_BY_TRACK)
 
-    byp = {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
-    for t in THREATS_BY_TRACK.values():
-        p = t.get("priority", "LOW")
-        if p not in byp:
-            byp[p] = 0
-        byp[p] += 1
+@app.get("/threats")
+def get_threats(limit: int = Query(10, ge=1, le=1000)):
+    # highest score first, then most recent
+    return FastJSONResponse([t.to_doc() for t in THREATS.top(limit)])
+
 
+@app.get("/stats")
+def stats() -> Dict[str, Any]:
+    # Counters are maintained incrementally by the store
+    last = STATS["last_update_utc"]
     return {
         **STATS,
-        "active_threats": active,
-        "by_priority": byp,
+        "last_update_utc": iso(last) if last is not None else None,
+        "active_threats": len(THREATS),
+        "by_priority": THREATS.by_priority(),
     }
 
 
 @app.post("/reset")
 def reset():
-    THREATS_BY_TRACK.clear()
+    def clear() -> None:
+        THREATS.clear()
+        FEATURES_BY_TRACK.clear()
+        _DIRTY.clear()
+
+    if JOURNAL is not None:
+        # Takes the snapshot thread's checkpoint lock before THREATS.lock
+        JOURNAL.reset(THREATS.lock, clear)
+    else:
+        with THREATS.lock:
+            clear()
     STATS["tracks_received"] = 0
     STATS["threats_emitted"] = 0
     STATS["by_priority"] = {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
@@ -0,0 +1,88 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import struct
+
+import numpy as np
+
+from iamd_common.codec import dumps, loads
+from iamd_common.snapshot import Snapshot
+from .records import Threat
+from .scoring import Features
+from .store import ThreatStore
+
+# Scoring inputs per threat: speed, alt, confidence, contact code, has_ais
+_FEATURES = struct.Struct("<5d")
+
+# WAL record kinds: U + features + threat JSON, D + track_id
+UPSERT = b"U"
+DELETE = b"D"
+
+
+def _features(row: Iterable[float]) -> Features:
+    speed, alt, conf, code, has_ais = row
+    return float(speed), float(alt), float(conf), int(code), bool(has_ais)
+
+
+def encode_changes(store: ThreatStore, features: Dict[str, Features], track_ids: Iterable[str]) -> List[bytes]:
+    """WAL records for threats that changed: upsert if held, else delete. Hold store.lock."""
+    out: List[bytes] = []
+    for tid in track_ids:
+        threat = store.get(tid)
+        f = features.get(tid)
+        if threat is None or f is None:
+            out.append(DELETE + tid.encode())
+        else:
+            out.append(UPSERT + _FEATURES.pack(*f) + dumps(threat.to_doc()))
+    return out
+
+
+def capture(store: ThreatStore, features: Dict[str, Features]) -> Tuple[List[Threat], np.ndarray]:
+    """Threats oldest first (by reference) and their features (runs under store.lock)."""
+    ids = [tid for tid in store.track_ids() if tid in features]
+    rows = np.array([features[tid] for tid in ids], dtype=np.float64).reshape(len(ids), 5)
+    return [store.get(tid) for tid in ids], rows
+
+
+def build(captured: Tuple[List[Threat], np.ndarray]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    threats, rows = captured
+    return {"threats": len(threats)}, {
+        "features": np.ascontiguousarray(rows),
+        "docs": b"\n".join(dumps(t.to_doc()) for t in threats),
+    }
+
+
+def restore(
+    store: ThreatStore,
+    features: Dict[str, Features],
+    snapshot: Optional[Snapshot],
+    records: Iterable[bytes],
+) -> int:
+    """
+    Rebuild the store and feature map from a snapshot plus WAL records,
+    keeping upsert recency. Returns the number of threats.
+    """
+    latest: Dict[str, Tuple[Threat, Features]] = {}
+    if snapshot is not None and snapshot.meta.get("threats"):
+        rows = snapshot.array("features").tolist()
+        docs = bytes(snapshot.raw("docs")).split(b"\n")
+        for doc, row in zip(docs, rows):
+            threat = Threat.from_doc(loads(doc))
+            latest[threat.track_id] = (threat, _features(row))
+
+    for rec in records:
+        kind = rec[:1]
+        if kind == UPSERT:
+            threat = Threat.from_doc(loads(rec[1 + _FEATURES.size:]))
+            tid = threat.track_id
+            latest.pop(tid, None)   # re-inserted as most recent
+            latest[tid] = (threat, _features(_FEATURES.unpack_from(rec, 1)))
+        elif kind == DELETE:
+            latest.pop(rec[1:].decode(), None)
+
+    with store.lock:
+        store.clear()
+        features.clear()
+        for tid, (threat, f) in latest.items():
+            features[tid] = f
+            for evicted in store.upsert(threat):
+                features.pop(evicted, None)
+        return len(store)
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Tuple
+import sys
+
+from .scoring import RATIONALE_TEXT
+
+# Few distinct rationale combinations exist; share one tuple each
+_CODES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def intern(s: Optional[str]) -> Optional[str]:
+    return sys.intern(s) if s else s
+
+
+def codes(seq: Sequence[str]) -> Tuple[str, ...]:
+    key = tuple(sys.intern(str(c)) for c in seq)
+    return _CODES.setdefault(key, key)
+
+
+def threat_id(track_id: str) -> str:
+    # Deterministic ID so the same track always maps to the same threat record
+    # Example: TRK-000001 -> THR-000001
+    if track_id.startswith("TRK-"):
+        return "THR-" + track_id.split("TRK-", 1)[1]
+    return f"THR-{track_id}"
+
+
+def opt_float(v: Any) -> Optional[float]:
+    return None if v is None else float(v)
+
+
+class Threat:
+    """
+    One active threat, compact: slotted, update time as an epoch, label /
+    contact / priority / action strings interned and rationale codes as a
+    shared tuple. threat_id and rationale text are derived, and the JSON
+    document is built by to_doc() only at the API / WAL / audit edge.
+    """
+
+    __slots__ = (
+        "track_id", "label", "contact_type",
+        "priority", "score", "codes", "action",
+        "updated_at", "lat", "lon", "alt_m",
+    )
+
+    def __init__(
+        self,
+        track_id: str,
+        label: str,
+        contact_type: str,
+        score: float,
+        rationale_codes: Tuple[str, ...],
+        priority: str,
+        action: str,
+        updated_at: float,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        alt_m: Optional[float] = None,
+    ):
+        self.track_id = track_id
+        self.label = intern(label)
+        self.contact_type = intern(contact_type)
+        self.score = score
+        self.codes = rationale_codes
+        self.priority = intern(priority)
+        self.action = intern(action)
+        self.updated_at = updated_at
+        self.lat = lat
+        self.lon = lon
+        self.alt_m = alt_m
+
+    def to_doc(self) -> Dict[str, Any]:
+        return {
+            "threat_id": threat_id(self.track_id),
+            "track_id": self.track_id,
+            "label": self.label,
+            "contact_type": self.contact_type,
+            "priority": self.priority,
+            "score": self.score,
+            "rationale": [RATIONALE_TEXT[c] for c in self.codes],
+            "rationale_codes": list(self.codes),
+            "recommended_action": self.action,
+            "last_update_utc": iso(self.updated_at),
+
+            # For plotting / display (derived from current track state)
+            "state": {"lat": self.lat, "lon": self.lon, "alt_m": self.alt_m},
+        }
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "Threat":
+        st = doc.get("state") or {}
+        updated = doc.get("last_update_utc")
+        return cls(
+            doc["track_id"],
+            doc.get("label"),
+            doc.get("contact_type") or "UNKNOWN",
+            float(doc.get("score", 0.0)),
+            codes(doc.get("rationale_codes") or ()),
+            doc.get("priority", "LOW"),
+            doc.get("recommended_action", "TRACK"),
+            datetime.fromisoformat(updated).timestamp() if updated else 0.0,
+            opt_float(st.get("lat")),
+            opt_float(st.get("lon")),
+            opt_float(st.get("alt_m")),
+        )
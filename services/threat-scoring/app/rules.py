@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import hashlib
+import os
+import threading
+
+import yaml
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+
+class ScoringRules(BaseModel):
+    """
+    Validated scoring thresholds from rules.yaml.
+    Unknown keys are rejected so a typo cannot silently disable a rule.
+    """
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    closing_rate_threshold_mps: float = Field(gt=0.0)
+    min_track_confidence: float = Field(ge=0.0, le=1.0)
+    altitude_suspicious_m: float = Field(ge=0.0)
+
+
+class ActiveRules(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    rules: ScoringRules
+    version: int
+    sha256: str
+    path: str
+    mtime: float
+    loaded_at_utc: str
+
+
+class RulesError(ValueError):
+    pass
+
+
+def compile_rules(raw: bytes) -> ScoringRules:
+    try:
+        data = yaml.safe_load(raw)
+    except yaml.YAMLError as e:
+        raise RulesError(f"Invalid YAML: {e}")
+    if not isinstance(data, dict):
+        raise RulesError("Rules file must be a mapping")
+    try:
+        return ScoringRules(**data)
+    except ValidationError as e:
+        raise RulesError(str(e))
+
+
+class RulesCache:
+    """
+    Compiled rules held in memory; scoring reads `current` and never disk.
+
+    reload() re-reads the file and swaps in a new version atomically. A file
+    that fails to parse or validate is rejected and the previous version
+    stays active. reload_if_changed() only stats the file, for cheap polling.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._current: Optional[ActiveRules] = None
+        self._seen_mtime: Optional[float] = None
+        self.reloads = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self.reload()
+        if self._current is None:
+            raise RulesError(f"Cannot load rules from {path}: {self.last_error}")
+
+    @property
+    def current(self) -> ActiveRules:
+        return self._current
+
+    @property
+    def rules(self) -> ScoringRules:
+        return self._current.rules
+
+    def reload(self) -> bool:
+        """Load the file now. Returns True if a new version became active."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                self._seen_mtime = mtime
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                rules = compile_rules(raw)
+            except (OSError, RulesError) as e:
+                self.rejected += 1
+                self.last_error = str(e)
+                return False
+
+            digest = hashlib.sha256(raw).hexdigest()
+            prev = self._current
+            if prev is not None and prev.sha256 == digest:
+                # Touched but unchanged: keep version, remember new mtime
+                self._current = prev.model_copy(update={"mtime": mtime})
+                self.last_error = None
+                return False
+
+            self._current = ActiveRules(
+                rules=rules,
+                version=(prev.version + 1) if prev else 1,
+                sha256=digest,
+                path=self.path,
+                mtime=mtime,
+                loaded_at_utc=datetime.now(timezone.utc).isoformat(),
+            )
+            self.reloads += 1
+            self.last_error = None
+            return True
+
+    def reload_if_changed(self) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            self.last_error = str(e)
+            return False
+        # Compare with the last mtime seen (good or bad) so a rejected edit
+        # is reported once, not on every poll
+        if mtime == self._seen_mtime:
+            return False
+        return self.reload()
+
+    def describe(self) -> Dict[str, Any]:
+        cur = self._current
+        return {
+            "version": cur.version,
+            "sha256": cur.sha256,
+            "path": cur.path,
+            "loaded_at_utc": cur.loaded_at_utc,
+            "rules": cur.rules.model_dump(),
+            "reloads": self.reloads,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
@@ -1,37 +1,166 @@
-import random
-from typing import Any, Dict, Tuple, List
-
-RATIONALES = [
-    "High closing speed exceeds threshold",
-    "No AIS match (identity/attribution gap)",
-    "Altitude profile inconsistent with declared route",
-    "Emissions/identity mismatch across sensors",
-    "Rapid heading change within short interval",
-    "Surface contact without positive ID",
-    "Intermittent track quality / sensor disagreement",
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .rules import ScoringRules
+
+# Rationale codes (shared with cop-dashboard RATIONALE_MAP) -> display text
+RATIONALE_TEXT = {
+    "closing_rate_gt_threshold": "High closing speed exceeds threshold",
+    "altitude_high": "High altitude profile",
+    "surface_contact": "Surface contact without positive ID",
+    "no_ais_match": "No AIS match (identity/attribution gap)",
+    "low_track_confidence": "Intermittent track quality / sensor disagreement",
+}
+
+# Bit position of each rule in the vectorized flag mask
+RATIONALE_BITS = list(RATIONALE_TEXT)
+
+CONTACT_TYPES = ["UNKNOWN", "AIR", "SEA", "BENIGN"]
+_CONTACT_CODE = {c: i for i, c in enumerate(CONTACT_TYPES)}
+AIR, SEA, BENIGN = _CONTACT_CODE["AIR"], _CONTACT_CODE["SEA"], _CONTACT_CODE["BENIGN"]
+
+# Below this altitude an unclassified contact is treated as surface
+SURFACE_ALT_M = 50.0
+
+# Weights in hundredths of a point so scalar and batch paths agree exactly
+BASE = 10
+WEIGHTS = {
+    "closing_rate_gt_threshold": 65,
+    "altitude_high": 30,
+    "surface_contact": 25,
+    "no_ais_match": 30,
+    "low_track_confidence": 10,
+}
+
+# (min score, priority, recommended action), checked top-down
+PRIORITY_BANDS = [
+    (71, "HIGH", "ESCALATE"),
+    (36, "MEDIUM", "REVIEW"),
+    (0, "LOW", "TRACK"),
 ]
 
-def score_track(track: Dict[str, Any], rules: Dict[str, Any]) -> Tuple[float, List[str], str, str]:
-    # Weighted random priority
-    priority = random.choices(
-        population=["LOW", "MEDIUM", "HIGH"],
-        weights=[0.55, 0.30, 0.15],
-        k=1
-    )[0]
-
-    # Score ranges per priority
-    if priority == "LOW":
-        score = round(random.uniform(0.05, 0.35), 2)
-        action = "TRACK"
-    elif priority == "MEDIUM":
-        score = round(random.uniform(0.36, 0.70), 2)
-        action = "REVIEW"
-    else:
-        score = round(random.uniform(0.71, 0.95), 2)
-        action = "ESCALATE"
-
-    # 1–3 rationale items
-    n = random.randint(1, 3)
-    rationale = random.sample(RATIONALES, n)
-
-    return score, rationale, priority, action
+Features = Tuple[float, float, float, int, bool]
+
+
+def track_features(track: Dict[str, Any]) -> Features:
+    """
+    Extract (speed_mps, alt_m, confidence, contact_code, has_ais) from a track.
+
+    Ground speed stands in for closing rate: tracks carry no bearing to a
+    defended asset, so any contact moving faster than the threshold counts.
+    """
+    v = track.get("velocity") or {}
+    s = track.get("state") or {}
+    speed = math.hypot(float(v.get("vx_mps") or 0.0), float(v.get("vy_mps") or 0.0))
+    alt = float(s.get("alt_m") or 0.0)
+    conf = float(track.get("track_confidence", 1.0) or 0.0)
+    contact = _CONTACT_CODE.get(str(track.get("contact_type") or "UNKNOWN").upper(), 0)
+    has_ais = any(str(src).upper().startswith("AIS") for src in track.get("sources") or [])
+    return speed, alt, conf, contact, has_ais
+
+
+def _band(points: int) -> Tuple[str, str]:
+    for floor, priority, action in PRIORITY_BANDS:
+        if points >= floor:
+            return priority, action
+    return PRIORITY_BANDS[-1][1], PRIORITY_BANDS[-1][2]
+
+
+def score_features(f: Features, rules: ScoringRules) -> Tuple[float, List[str], str, str]:
+    speed, alt, conf, contact, has_ais = f
+
+    surface = contact == SEA or (contact != AIR and alt <= SURFACE_ALT_M)
+    hits = {
+        "closing_rate_gt_threshold": speed > rules.closing_rate_threshold_mps,
+        "altitude_high": alt > rules.altitude_suspicious_m,
+        "surface_contact": surface,
+        "no_ais_match": surface and not has_ais,
+        "low_track_confidence": conf < rules.min_track_confidence,
+    }
+    codes = [c for c in RATIONALE_BITS if hits[c]]
+
+    points = BASE + sum(WEIGHTS[c] for c in codes)
+    if contact == BENIGN:
+        points //= 2
+    points = min(100, points)
+
+    priority, action = _band(points)
+    return points / 100.0, codes, priority, action
+
+
+def score_track(track: Dict[str, Any], rules: ScoringRules) -> Tuple[float, List[str], str, str]:
+    """Return (score, rationale_codes, priority, recommended_action)."""
+    return score_features(track_features(track), rules)
+
+
+def score_columns(
+    speed: np.ndarray,
+    alt: np.ndarray,
+    conf: np.ndarray,
+    contact: np.ndarray,
+    has_ais: np.ndarray,
+    rules: ScoringRules,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized score_features over column arrays.
+
+    Returns (points int16 0..100, rationale bitmask uint8, band index into
+    PRIORITY_BANDS). Same rules and weights as the scalar path.
+    """
+    surface = (contact == SEA) | ((contact != AIR) & (alt <= SURFACE_ALT_M))
+    hits = {
+        "closing_rate_gt_threshold": speed > rules.closing_rate_threshold_mps,
+        "altitude_high": alt > rules.altitude_suspicious_m,
+        "surface_contact": surface,
+        "no_ais_match": surface & ~has_ais,
+        "low_track_confidence": conf < rules.min_track_confidence,
+    }
+
+    points = np.full(speed.shape, BASE, dtype=np.int16)
+    flags = np.zeros(speed.shape, dtype=np.uint8)
+    for bit, code in enumerate(RATIONALE_BITS):
+        hit = hits[code]
+        points += hit.astype(np.int16) * WEIGHTS[code]
+        flags |= hit.astype(np.uint8) << bit
+
+    points = np.where(contact == BENIGN, points // 2, points)
+    points = np.minimum(points, 100).astype(np.int16)
+
+    band = np.full(speed.shape, len(PRIORITY_BANDS) - 1, dtype=np.int8)
+    for i in range(len(PRIORITY_BANDS) - 1, -1, -1):
+        band = np.where(points >= PRIORITY_BANDS[i][0], i, band).astype(np.int8)
+    return points, flags, band
+
+
+def features_to_columns(features: Iterable[Features]) -> Tuple[np.ndarray, ...]:
+    # One C-level conversion of the row tuples, then column views
+    table = np.array(list(features), dtype=np.float64).reshape(-1, 5)
+    return (
+        table[:, 0],
+        table[:, 1],
+        table[:, 2],
+        table[:, 3].astype(np.int8),
+        table[:, 4].astype(bool),
+    )
+
+
+def decode_flags(flags: int) -> List[str]:
+    return [code for bit, code in enumerate(RATIONALE_BITS) if flags & (1 << bit)]
+
+
+# Every possible bitmask decoded once
+_FLAG_CODES = [decode_flags(m) for m in range(1 << len(RATIONALE_BITS))]
+
+
+def score_many(features: List[Features], rules: ScoringRules) -> List[Tuple[float, List[str], str, str]]:
+    """Batch counterpart of score_features(), evaluated as one column pass."""
+    if not features:
+        return []
+    points, flags, band = score_columns(*features_to_columns(features), rules)
+    out = []
+    for p, fl, b in zip(points.tolist(), flags.tolist(), band.tolist()):
+        _, priority, action = PRIORITY_BANDS[b]
+        out.append((p / 100.0, list(_FLAG_CODES[fl]), priority, action))
+    return out
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from .records import Threat
+
+PRIORITIES = ("HIGH", "MEDIUM", "LOW")
+
+# Scores are emitted in hundredths (see scoring.py), so 0.00..1.00 maps onto
+# 101 buckets. Ordering inside a bucket is update recency.
+_BUCKETS = 101
+
+
+def _bucket(score: Any) -> int:
+    try:
+        b = int(round(float(score) * 100))
+    except (TypeError, ValueError):
+        b = 0
+    return min(_BUCKETS - 1, max(0, b))
+
+
+class ThreatStore:
+    """
+    Bounded one-threat-per-track store.
+
+    - Recency index: OrderedDict in upsert order. Every upsert stamps
+      updated_at with "now", so the front entry is always the oldest and
+      eviction is O(1).
+    - Score index: one recency-ordered bucket per hundredth of score, so
+      top-K (score desc, then most recent) walks buckets from the top and
+      costs O(K) rather than a full sort.
+    - Priority counters adjusted on every upsert, rescore and eviction.
+
+    Values are compact Threat records (records.py); to_doc() at the edge.
+
+    Handlers run in the threadpool, so public methods hold one lock;
+    `lock` is exposed for callers that need several calls to be atomic.
+    """
+
+    def __init__(self, capacity: int = 10):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self._lock = threading.RLock()
+        self._by_track: "OrderedDict[str, Threat]" = OrderedDict()
+        self._score_buckets: List["OrderedDict[str, None]"] = [OrderedDict() for _ in range(_BUCKETS)]
+        self._bucket_of: Dict[str, int] = {}
+        self._priority_of: Dict[str, str] = {}
+        self._top = -1    # highest non-empty bucket (upper bound)
+        self._by_priority: Dict[str, int] = {p: 0 for p in PRIORITIES}
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    def __len__(self) -> int:
+        return len(self._by_track)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._by_track
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_track)
+
+    def get(self, track_id: str) -> Optional[Threat]:
+        return self._by_track.get(track_id)
+
+    def values(self) -> List[Threat]:
+        with self._lock:
+            return list(self._by_track.values())
+
+    def track_ids(self) -> List[str]:
+        """Snapshot of track ids, oldest update first."""
+        with self._lock:
+            return list(self._by_track)
+
+    def upsert(self, threat: Threat) -> List[str]:
+        """
+        Insert or replace the threat for threat.track_id as most recent.
+        Returns the track ids evicted to stay within capacity.
+        """
+        track_id = threat.track_id
+        with self._lock:
+            if track_id in self._by_track:
+                self._unindex(track_id)
+                self._by_track.move_to_end(track_id)
+            self._by_track[track_id] = threat
+            self._index(track_id)
+
+            evicted: List[str] = []
+            while len(self._by_track) > self.capacity:
+                oldest = next(iter(self._by_track))
+                self.remove(oldest)
+                evicted.append(oldest)
+            return evicted
+
+    def reindex(self, track_id: str) -> None:
+        """
+        Refresh score/priority indexes after editing a stored threat in place.
+        Recency is kept; reindex many threats oldest-first to keep bucket order.
+        """
+        with self._lock:
+            if track_id in self._by_track:
+                self._unindex(track_id)
+                self._index(track_id)
+
+    def remove(self, track_id: str) -> Optional[Threat]:
+        with self._lock:
+            if track_id not in self._by_track:
+                return None
+            self._unindex(track_id)
+            return self._by_track.pop(track_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_track.clear()
+            for bucket in self._score_buckets:
+                bucket.clear()
+            self._bucket_of.clear()
+            self._priority_of.clear()
+            self._top = -1
+            self._by_priority = {p: 0 for p in PRIORITIES}
+
+    def top(self, k: int) -> List[Threat]:
+        """Highest score first, then most recent: same order as a full sort."""
+        out: List[Threat] = []
+        with self._lock:
+            b = self._top
+            while b >= 0 and len(out) < k:
+                bucket = self._score_buckets[b]
+                if not bucket and b == self._top:
+                    # Lazily lower the top pointer past emptied buckets
+                    self._top -= 1
+                for track_id in reversed(bucket):
+                    out.append(self._by_track[track_id])
+                    if len(out) >= k:
+                        break
+                b -= 1
+        return out
+
+    def by_priority(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._by_priority)
+
+    def _index(self, track_id: str) -> None:
+        threat = self._by_track[track_id]
+        b = _bucket(threat.score)
+        self._score_buckets[b][track_id] = None
+        self._bucket_of[track_id] = b
+        if b > self._top:
+            self._top = b
+
+        p = threat.priority
+        self._priority_of[track_id] = p
+        self._by_priority[p] = self._by_priority.get(p, 0) + 1
+
+    def _unindex(self, track_id: str) -> None:
+        b = self._bucket_of.pop(track_id, None)
+        if b is not None:
+            self._score_buckets[b].pop(track_id, None)
+
+        # Index-time values, so in-place edits before reindex() are handled
+        p = self._priority_of.pop(track_id, None)
+        if p is not None:
+            self._by_priority[p] -= 1
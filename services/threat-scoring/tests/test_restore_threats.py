@@ -0,0 +1,71 @@
+"""Snapshot + WAL restore rebuilds the same threats, features and order."""
+import os
+
+import pytest
+
+from iamd_common import snapshot
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "rules.yaml")
+
+
+def _track(i):
+    return {
+        "track_id": f"T-{i % 25}",
+        "contact_type": ["AIR", "SEA", "UNKNOWN", "BENIGN"][i % 4],
+        "state": {"lat": 30.0 + i * 0.01, "lon": -120.0, "alt_m": float(i * 400 % 12000)},
+        "velocity": {"vx_mps": float(i * 7 % 400), "vy_mps": 0.0},
+        "track_confidence": (i % 10) / 10.0,
+        "sources": ["AIS-1"] if i % 3 == 0 else ["RADAR-1"],
+    }
+
+
+def _picture(ts):
+    ids = ts.THREATS.track_ids()
+    return ids, [ts.THREATS.get(tid).to_doc() for tid in ids], {tid: ts.FEATURES_BY_TRACK[tid] for tid in ids}
+
+
+@pytest.mark.parametrize("checkpoint_at", [None, 0, 40, 80])
+def test_restore_matches_live_state(load_app, monkeypatch, tmp_path, checkpoint_at):
+    monkeypatch.setenv("RULES_PATH", RULES_PATH)
+    monkeypatch.setattr(snapshot, "STATE_DIR", str(tmp_path))
+    ts = load_app("threat-scoring")
+    ts.restore_state()
+
+    # Upserts, capacity evictions (logged as deletes) and a rescore
+    for i in range(0, 100, 10):
+        if i == checkpoint_at:
+            ts.JOURNAL.checkpoint(ts.THREATS.lock, lambda: ts.persist.capture(ts.THREATS, ts.FEATURES_BY_TRACK),
+                                  ts.persist.build)
+        ts._score_batch([_track(j) for j in range(i, i + 10)])
+        if i == 50:
+            ts.rescore_all(ts.RULES.rules.model_copy(update={"closing_rate_threshold_mps": 50.0}))
+    ts.JOURNAL.close(checkpoint=False)
+    ids, docs, features = _picture(ts)
+    assert len(ids) == ts.THREAT_CAPACITY
+
+    restored = load_app("threat-scoring")
+    assert restored.restore_state() == len(ids)
+    assert _picture(restored) == (ids, docs, features)
+    assert [t.track_id for t in restored.THREATS.top(5)] == [t.track_id for t in ts.THREATS.top(5)]
+    restored.JOURNAL.close(checkpoint=False)
+
+
+def test_reset_clears_journal_alongside_checkpoints(load_app, monkeypatch, tmp_path):
+    monkeypatch.setenv("RULES_PATH", RULES_PATH)
+    monkeypatch.setattr(snapshot, "STATE_DIR", str(tmp_path))
+    ts = load_app("threat-scoring")
+    ts.restore_state()
+    ts.JOURNAL.start(ts.THREATS.lock, lambda: ts.persist.capture(ts.THREATS, ts.FEATURES_BY_TRACK), ts.persist.build)
+
+    # Snapshot thread checkpointing as fast as it can while /reset runs
+    ts.JOURNAL.interval_s = 0.0
+    for i in range(0, 200, 10):
+        ts._score_batch([_track(j) for j in range(i, i + 10)])
+        ts.reset()
+        assert len(ts.THREATS) == 0
+    ts._score_batch([_track(j) for j in range(5)])
+    ts.JOURNAL.close()
+
+    restored = load_app("threat-scoring")
+    assert restored.restore_state() == 5
+    restored.JOURNAL.close(checkpoint=False)
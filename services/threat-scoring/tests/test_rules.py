@@ -0,0 +1,87 @@
+"""rules.yaml is compiled once and hot-reloaded; a bad edit never replaces good rules."""
+import os
+
+import pytest
+
+GOOD = b"closing_rate_threshold_mps: 250\nmin_track_confidence: 0.65\naltitude_suspicious_m: 15000\n"
+
+
+@pytest.fixture
+def rules(load_app):
+    return load_app("threat-scoring", "rules")
+
+
+def _write(path, raw, mtime):
+    path.write_bytes(raw)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.parametrize("raw", [
+    b"closing_rate_threshold_mps: [1\n",                      # not YAML
+    b"- 250\n",                                               # not a mapping
+    GOOD + b"closing_rate_threshhold_mps: 1\n",               # typo'd key
+    GOOD.replace(b"0.65", b"1.5"),                            # out of range
+    b"closing_rate_threshold_mps: 250\n",                     # missing keys
+])
+def test_compile_rejects(rules, raw):
+    with pytest.raises(rules.RulesError):
+        rules.compile_rules(raw)
+
+
+def test_reload_swaps_versions_and_keeps_the_last_good_one(rules, tmp_path):
+    path = tmp_path / "rules.yaml"
+    _write(path, GOOD, 1000)
+    cache = rules.RulesCache(str(path))
+    assert cache.current.version == 1 and cache.rules.closing_rate_threshold_mps == 250
+
+    # Polling an untouched file does not even read it
+    assert not cache.reload_if_changed()
+
+    _write(path, GOOD.replace(b"250", b"300"), 1001)
+    assert cache.reload_if_changed()
+    assert cache.current.version == 2 and cache.rules.closing_rate_threshold_mps == 300
+
+    _write(path, b"closing_rate_threshold_mps: -1\n", 1002)
+    assert not cache.reload_if_changed()
+    assert cache.rules.closing_rate_threshold_mps == 300 and cache.last_error
+    # The rejected edit is reported once, not on every poll
+    assert not cache.reload_if_changed()
+    assert cache.rejected == 1
+
+    # Touched back to identical content: same version, new mtime
+    _write(path, GOOD.replace(b"250", b"300"), 1003)
+    assert not cache.reload_if_changed()
+    assert cache.current.version == 2 and cache.current.mtime == 1003
+    assert cache.last_error is None and cache.describe()["reloads"] == 2
+
+
+def test_unloadable_rules_fail_startup(rules, tmp_path):
+    with pytest.raises(rules.RulesError):
+        rules.RulesCache(str(tmp_path / "missing.yaml"))
+
+
+def test_reload_endpoint_rescores_active_threats(load_app, monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    path = tmp_path / "rules.yaml"
+    _write(path, GOOD, 1000)
+    monkeypatch.setenv("RULES_PATH", str(path))
+    main = load_app("threat-scoring")
+    main.ingest_track({
+        "track_id": "T-1",
+        "contact_type": "AIR",
+        "state": {"lat": 0.0, "lon": 0.0, "alt_m": 9000.0},
+        "velocity": {"vx_mps": 200.0, "vy_mps": 0.0},
+        "track_confidence": 0.9,
+    })
+    assert "closing_rate_gt_threshold" not in main.THREATS.get("T-1").codes
+
+    with TestClient(main.app) as client:
+        _write(path, b"- not rules\n", 1001)
+        r = client.post("/rules/reload")
+        assert r.status_code == 422 and r.json()["detail"]["active"]["version"] == 1
+
+        _write(path, GOOD.replace(b"250", b"150"), 1002)
+        body = client.post("/rules/reload").json()
+    assert body["reloaded"] and body["version"] == 2 and body["rescore"]["rescored"] == 1
+    assert "closing_rate_gt_threshold" in main.THREATS.get("T-1").codes
@@ -0,0 +1,72 @@
+"""score_many against score_features, and rescore_all against concurrent ingest."""
+import os
+
+import numpy as np
+import pytest
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "rules.yaml")
+
+
+def _features(rng, n, rules):
+    # Thresholds themselves show up often, so the > / < / <= edges are exercised
+    speed = rng.choice([0.0, rules.closing_rate_threshold_mps, rules.closing_rate_threshold_mps + 0.5, 400.0], n)
+    alt = rng.choice([0.0, 50.0, 50.5, rules.altitude_suspicious_m, rules.altitude_suspicious_m + 1.0], n)
+    conf = rng.choice([0.0, rules.min_track_confidence, 1.0], n)
+    contact = rng.integers(0, 4, n)
+    has_ais = rng.random(n) < 0.5
+    return [
+        (float(s), float(a), float(c), int(k), bool(h))
+        for s, a, c, k, h in zip(speed, alt, conf, contact, has_ais)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_score_many_matches_score_features(load_app, seed):
+    scoring = load_app("threat-scoring", "scoring")
+    rules = load_app("threat-scoring", "rules").ScoringRules(
+        closing_rate_threshold_mps=250.0, min_track_confidence=0.5, altitude_suspicious_m=8000.0
+    )
+    features = _features(np.random.default_rng(seed), 200, rules)
+
+    assert scoring.score_many(features, rules) == [scoring.score_features(f, rules) for f in features]
+
+
+def test_score_many_empty(load_app):
+    scoring = load_app("threat-scoring", "scoring")
+    rules = load_app("threat-scoring", "rules").ScoringRules(
+        closing_rate_threshold_mps=250.0, min_track_confidence=0.5, altitude_suspicious_m=8000.0
+    )
+    assert scoring.score_many([], rules) == []
+
+
+def _track(track_id, vx):
+    return {
+        "track_id": track_id,
+        "contact_type": "AIR",
+        "state": {"lat": 0.0, "lon": 0.0, "alt_m": 9000.0},
+        "velocity": {"vx_mps": vx, "vy_mps": 0.0},
+        "track_confidence": 0.9,
+    }
+
+
+def test_rescore_skips_tracks_reingested_meanwhile(load_app, monkeypatch):
+    monkeypatch.setenv("RULES_PATH", RULES_PATH)
+    main = load_app("threat-scoring")
+    main.ingest_track(_track("T-1", 10.0))
+    main.ingest_track(_track("T-2", 10.0))
+    rules = main.RULES.rules.model_copy(update={"closing_rate_threshold_mps": 1.0})
+
+    # T-2 is re-ingested while the batch is being scored, with its own result
+    real_score_many = main.score_many
+
+    def score_then_ingest(features, r):
+        out = real_score_many(features, r)
+        main.ingest_track(_track("T-2", 11.0))
+        main.THREATS.get("T-2").score = 0.42
+        return out
+
+    monkeypatch.setattr(main, "score_many", score_then_ingest)
+    assert main.rescore_all(rules)["rescored"] == 1
+
+    assert "closing_rate_gt_threshold" in main.THREATS.get("T-1").codes
+    assert main.THREATS.get("T-2").score == 0.42
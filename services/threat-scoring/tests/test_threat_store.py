@@ -0,0 +1,70 @@
+"""ThreatStore's indexes agree with a full sort over a plain dict."""
+import random
+
+import pytest
+
+PRIORITIES = ("HIGH", "MEDIUM", "LOW")
+
+
+def _expected_top(live, k):
+    # live: track_id -> (score, priority), in recency order (oldest first)
+    recency = {tid: n for n, tid in enumerate(live)}
+    ranked = sorted(live, key=lambda tid: (round(live[tid][0] * 100), recency[tid]), reverse=True)
+    return ranked[:k]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_upserts_rescores_and_removals(load_app, seed):
+    store_mod = load_app("threat-scoring", "store")
+    records = load_app("threat-scoring", "records")
+    rng = random.Random(seed)
+    store = store_mod.ThreatStore(capacity=30)
+    live = {}
+
+    for step in range(600):
+        op = rng.random()
+        tid = f"T-{rng.randrange(60)}"
+        if op < 0.75:
+            score, priority = rng.randrange(101) / 100, rng.choice(PRIORITIES)
+            evicted = store.upsert(records.Threat(tid, tid, "AIR", score, (), priority, "MONITOR", float(step)))
+            live.pop(tid, None)
+            live[tid] = (score, priority)
+            expected_evicted = list(live)[:max(0, len(live) - 30)]
+            for gone in expected_evicted:
+                del live[gone]
+            assert evicted == expected_evicted
+        elif op < 0.9 and live:
+            # Rescore everything in place, oldest first, as rescore_all does
+            for t in list(live):
+                score, priority = rng.randrange(101) / 100, rng.choice(PRIORITIES)
+                threat = store.get(t)
+                threat.score, threat.priority = score, priority
+                store.reindex(t)
+                live[t] = (score, priority)
+        else:
+            assert (store.remove(tid) is not None) == (tid in live)
+            live.pop(tid, None)
+
+        k = rng.choice([1, 5, 30, 100])
+        assert [t.track_id for t in store.top(k)] == _expected_top(live, k)
+        assert store.track_ids() == list(live)
+        counts = {p: sum(1 for _, pr in live.values() if pr == p) for p in PRIORITIES}
+        assert store.by_priority() == counts
+
+
+def test_clear_resets_indexes(load_app):
+    store_mod = load_app("threat-scoring", "store")
+    records = load_app("threat-scoring", "records")
+    store = store_mod.ThreatStore(capacity=3)
+    for i in range(5):
+        store.upsert(records.Threat(f"T-{i}", "x", "AIR", 0.9, (), "HIGH", "INTERCEPT", float(i)))
+    store.clear()
+    assert len(store) == 0 and store.top(10) == []
+    assert store.by_priority() == {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
+    store.upsert(records.Threat("T-9", "x", "AIR", 0.1, (), "LOW", "MONITOR", 9.0))
+    assert [t.track_id for t in store.top(10)] == ["T-9"]
+
+
+def test_capacity_must_be_positive(load_app):
+    with pytest.raises(ValueError):
+        load_app("threat-scoring", "store").ThreatStore(capacity=0)
@@ -0,0 +1,128 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def _hungarian(cost: np.ndarray) -> np.ndarray:
+    """
+    Min-cost assignment for a dense n x m matrix (n <= m, all finite).
+    Shortest augmenting path with potentials; the inner column scan is
+    vectorized. Returns the assigned column for each row.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.intp)     # p[j] = row (1-based) owning column j
+    way = np.zeros(m + 1, dtype=np.intp)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(masked.argmin()) + 1
+            delta = masked[j1 - 1]
+
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    out = np.full(n, -1, dtype=np.intp)
+    for j in range(1, m + 1):
+        if p[j]:
+            out[p[j] - 1] = j - 1
+    return out
+
+
+def _components(rows: np.ndarray, cols: np.ndarray, n_rows: int, n_cols: int) -> List[np.ndarray]:
+    """Group pair indices into independent clusters (union-find over rows + cols)."""
+    parent = list(range(n_rows + n_cols))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        a, b = find(r), find(n_rows + c)
+        if a != b:
+            parent[a] = b
+
+    groups: Dict[int, List[int]] = {}
+    for k, r in enumerate(rows.tolist()):
+        groups.setdefault(find(r), []).append(k)
+    return [np.array(g, dtype=np.intp) for g in groups.values()]
+
+
+def assign(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    cost: np.ndarray,
+    n_rows: int,
+    n_cols: int,
+    miss_cost: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Global nearest-neighbour assignment over a sparse gated cost matrix.
+
+    (rows[k], cols[k], cost[k]) are the gated pairs; anything absent is
+    forbidden. Each row gets at most one column and each column at most
+    one row; leaving a row unassigned costs miss_cost, so a pair is only
+    taken if it beats that. The matrix is split into independent clusters
+    first, so the dense solver only ever sees small blocks.
+
+    Returns (col_of_row, cost_of_row) with -1 / inf for unassigned rows.
+    """
+    col_of_row = np.full(n_rows, -1, dtype=np.intp)
+    cost_of_row = np.full(n_rows, np.inf)
+    keep = cost < miss_cost
+    rows, cols, cost = rows[keep], cols[keep], cost[keep]
+    if len(rows) == 0:
+        return col_of_row, cost_of_row
+
+    for group in _components(rows, cols, n_rows, n_cols):
+        gr, gc, gcost = rows[group], cols[group], cost[group]
+
+        if len(group) == 1:
+            col_of_row[gr[0]] = gc[0]
+            cost_of_row[gr[0]] = gcost[0]
+            continue
+
+        r_ids, r_loc = np.unique(gr, return_inverse=True)
+        c_ids, c_loc = np.unique(gc, return_inverse=True)
+        nr, nc = len(r_ids), len(c_ids)
+
+        # Dense block plus one private "miss" column per row; forbidden
+        # cells get a cost no optimal solution can afford.
+        big = (miss_cost + float(gcost.max())) * (nr + 1) + 1.0
+        block = np.full((nr, nc + nr), big)
+        block[r_loc, c_loc] = gcost
+        block[np.arange(nr), nc + np.arange(nr)] = miss_cost
+
+        chosen = _hungarian(block)
+        for i, j in enumerate(chosen.tolist()):
+            if j < nc and block[i, j] < big:
+                col_of_row[r_ids[i]] = c_ids[j]
+                cost_of_row[r_ids[i]] = block[i, j]
+
+    return col_of_row, cost_of_row
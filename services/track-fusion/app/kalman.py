@@ -0,0 +1,370 @@
+from typing import Dict, List, Sequence, Tuple, Union
+import math
+
+import numpy as np
+
+# 1 deg latitude ~ 111 km (same scale as the correlation distance)
+M_PER_DEG = 111_000.0
+
+# Re-anchor a track's local frame once it drifts this far from its origin
+REANCHOR_M = 50_000.0
+
+# chi-square 99% for 3 degrees of freedom (position innovation)
+GATE_CHI2_3DOF = 11.345
+
+Kinematics = Tuple[float, float, float, float, float, float]
+Times = Union[float, np.ndarray]
+
+
+class KalmanBank:
+    """
+    Constant-velocity Kalman filters for every live track, stored as one
+    struct-of-arrays bank instead of per-track objects.
+
+    State per slot is [x_east, y_north, z_up, vx, vy, vz] in metres / m/s,
+    in a local tangent frame anchored at the track's first fix (re-anchored
+    as it travels). Arrays:
+
+        x       (cap, 6)     state
+        P       (cap, 6, 6)  covariance
+        t       (cap,)       epoch the state is valid for
+        anchor  (cap, 3)     lat0, lon0, cos(lat0)
+
+    Predict and gate are vectorized over any set of slots; the measurement
+    is the full observed position + velocity (H = I), while gating uses
+    the position block only (3-dof Mahalanobis distance).
+
+    Times are the plots' own (feed) epochs, not arrival times. Wherever a
+    time t is taken it may be one epoch or one per slot / row; a time
+    earlier than a filter's state (a late plot) predicts over dt = 0.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        pos_sigma_m: float = 250.0,
+        alt_sigma_m: float = 150.0,
+        vel_sigma_mps: float = 25.0,
+        accel_sigma_mps2: float = 8.0,
+    ):
+        self.pos_sigma_m = pos_sigma_m
+        self.alt_sigma_m = alt_sigma_m
+        self.vel_sigma_mps = vel_sigma_mps
+        self.accel_var = accel_sigma_mps2 ** 2
+
+        self.x = np.zeros((capacity, 6))
+        self.P = np.zeros((capacity, 6, 6))
+        self.t = np.zeros(capacity)
+        self.anchor = np.zeros((capacity, 3))
+
+        self._slot: Dict[str, int] = {}
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._slot
+
+    # -- slot management ---------------------------------------------------
+
+    def _grow(self) -> None:
+        old = self.x.shape[0]
+        new = old * 2
+        self.x = np.concatenate([self.x, np.zeros((old, 6))])
+        self.P = np.concatenate([self.P, np.zeros((old, 6, 6))])
+        self.t = np.concatenate([self.t, np.zeros(old)])
+        self.anchor = np.concatenate([self.anchor, np.zeros((old, 3))])
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def slots(self, track_ids: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self._slot[tid] for tid in track_ids), dtype=np.intp, count=len(track_ids))
+
+    def track_ids(self) -> List[str]:
+        return list(self._slot)
+
+    def live(self) -> Tuple[List[str], np.ndarray]:
+        """Track ids and their slots, in one pass."""
+        return list(self._slot), np.fromiter(self._slot.values(), dtype=np.intp, count=len(self._slot))
+
+    def remove(self, track_id: str) -> None:
+        slot = self._slot.pop(track_id, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def clear(self) -> None:
+        cap = self.x.shape[0]
+        self._slot.clear()
+        self._free = list(range(cap - 1, -1, -1))
+
+    def load(self, track_ids: Sequence[str], x: np.ndarray, P: np.ndarray, t: np.ndarray, anchor: np.ndarray) -> np.ndarray:
+        """Bulk-set filter state for tracks (restore); returns their slots."""
+        for tid in track_ids:
+            if tid in self._slot:
+                continue
+            if not self._free:
+                self._grow()
+            self._slot[tid] = self._free.pop()
+        slots = self.slots(track_ids)
+        self.x[slots] = x
+        self.P[slots] = P
+        self.t[slots] = t
+        self.anchor[slots] = anchor
+        return slots
+
+    # -- noise models ------------------------------------------------------
+
+    def _R(self, confidence: float) -> np.ndarray:
+        # Lower sensor confidence -> wider measurement noise
+        scale = 1.0 / max(0.2, min(1.0, confidence))
+        hp = (self.pos_sigma_m * scale) ** 2
+        vp = (self.alt_sigma_m * scale) ** 2
+        vv = (self.vel_sigma_mps * scale) ** 2
+        return np.diag([hp, hp, vp, vv, vv, vv])
+
+    def _R_pos(self, confidence: np.ndarray) -> np.ndarray:
+        scale = 1.0 / np.clip(confidence, 0.2, 1.0)
+        out = np.zeros(confidence.shape + (3, 3))
+        out[..., 0, 0] = out[..., 1, 1] = (self.pos_sigma_m * scale) ** 2
+        out[..., 2, 2] = (self.alt_sigma_m * scale) ** 2
+        return out
+
+    # -- frames ------------------------------------------------------------
+
+    def _to_local(self, slots: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        a = self.anchor[slots]
+        x = (lon - a[..., 1]) * M_PER_DEG * a[..., 2]
+        y = (lat - a[..., 0]) * M_PER_DEG
+        return x, y
+
+    def _set_anchor(self, slot: int, lat: float, lon: float) -> None:
+        self.anchor[slot] = (lat, lon, max(1e-6, math.cos(math.radians(lat))))
+
+    # -- filter ------------------------------------------------------------
+
+    def init(self, track_id: str, k: Kinematics, t: float, confidence: float = 1.0) -> int:
+        """Start a filter at an observed (lat, lon, alt, vx, vy, vz)."""
+        if track_id in self._slot:
+            self.remove(track_id)
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self._slot[track_id] = slot
+
+        lat, lon, alt, vx, vy, vz = k
+        self._set_anchor(slot, lat, lon)
+        self.x[slot] = (0.0, 0.0, alt, vx, vy, vz)
+        self.P[slot] = self._R(confidence)
+        self.t[slot] = t
+        return slot
+
+    def predicted(self, slots: np.ndarray, t: Times) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict slots to time t without committing. Returns (x, P)."""
+        dt = np.maximum(0.0, t - self.t[slots])
+        x = self.x[slots].copy()
+        P = self.P[slots].copy()
+
+        x[:, :3] += dt[:, None] * x[:, 3:]
+
+        # F P F^T for F = [[I, dt I], [0, I]], using the block structure
+        d = dt[:, None, None]
+        A = P[:, :3, :3]
+        B = P[:, :3, 3:]
+        C = P[:, 3:, :3]
+        D = P[:, 3:, 3:]
+        A_new = A + d * (B + C) + d * d * D
+        B_new = B + d * D
+        C_new = C + d * D
+        P[:, :3, :3] = A_new
+        P[:, :3, 3:] = B_new
+        P[:, 3:, :3] = C_new
+
+        # Discrete white-noise acceleration, per axis
+        q = self.accel_var
+        eye = np.eye(3)
+        P[:, :3, :3] += (q * dt ** 4 / 4.0)[:, None, None] * eye
+        P[:, :3, 3:] += (q * dt ** 3 / 2.0)[:, None, None] * eye
+        P[:, 3:, :3] += (q * dt ** 3 / 2.0)[:, None, None] * eye
+        P[:, 3:, 3:] += (q * dt ** 2)[:, None, None] * eye
+        return x, P
+
+    def predict(self, slots: np.ndarray, t: Times) -> None:
+        """Predict slots to time t and commit (coasting)."""
+        if len(slots) == 0:
+            return
+        x, P = self.predicted(slots, t)
+        self.x[slots] = x
+        self.P[slots] = P
+        self.t[slots] = np.maximum(self.t[slots], t)
+
+    def gate_matrix(
+        self,
+        track_ids: Sequence[str],
+        lat: np.ndarray,
+        lon: np.ndarray,
+        alt: np.ndarray,
+        confidence: np.ndarray,
+        t: float,
+    ) -> np.ndarray:
+        """
+        Squared Mahalanobis distances between m observations and k tracks,
+        all predicted to time t in one pass. Returns an (m, k) array.
+        """
+        m = len(lat)
+        k = len(track_ids)
+        if m == 0 or k == 0:
+            return np.zeros((m, k))
+        slots = self.slots(track_ids)
+        xp, Pp = self.predicted(slots, t)
+
+        # Observation j expressed in track i's local frame: (m, k)
+        ox, oy = self._to_local(slots[None, :], lat[:, None], lon[:, None])
+        v = np.stack([ox - xp[None, :, 0], oy - xp[None, :, 1], alt[:, None] - xp[None, :, 2]], axis=-1)
+
+        S = Pp[None, :, :3, :3] + self._R_pos(confidence)[:, None, :, :]
+        sol = np.linalg.solve(S, v[..., None])[..., 0]
+        return np.einsum("mki,mki->mk", v, sol)
+
+    def gate_pairs(
+        self,
+        track_ids: Sequence[str],
+        lat: np.ndarray,
+        lon: np.ndarray,
+        alt: np.ndarray,
+        confidence: np.ndarray,
+        t: Times,
+    ) -> np.ndarray:
+        """
+        Squared Mahalanobis distances for explicit pairs: observation k
+        (lat[k], lon[k], alt[k]) against track_ids[k]. With one scan time
+        each distinct track is predicted once, so a sparse scan costs
+        O(pairs), not O(m * k); with a time per pair each pair is.
+        """
+        if len(track_ids) == 0:
+            return np.zeros(0)
+        if np.ndim(t) == 0:
+            uniq, inv = np.unique(self.slots(track_ids), return_inverse=True)
+            xp, Pp = self.predicted(uniq, t)
+            xp, Pp, slots = xp[inv], Pp[inv], uniq[inv]
+        else:
+            slots = self.slots(track_ids)
+            xp, Pp = self.predicted(slots, np.asarray(t, dtype=float))
+
+        ox, oy = self._to_local(slots, lat, lon)
+        v = np.stack([ox - xp[:, 0], oy - xp[:, 1], alt - xp[:, 2]], axis=-1)
+        S = Pp[:, :3, :3] + self._R_pos(confidence)
+        sol = np.linalg.solve(S, v[..., None])[..., 0]
+        return np.einsum("ki,ki->k", v, sol)
+
+    def reach_m(self, slots: np.ndarray, t: float, confidence: float, chi2: float = GATE_CHI2_3DOF) -> np.ndarray:
+        """
+        Per slot, the farthest horizontal distance from the filter's
+        current position at which a plot at time t can still pass the
+        gate: travel to t plus the gate radius sqrt(chi2 * lambda), with
+        lambda a Gershgorin bound on S's largest eigenvalue. A lower
+        confidence widens R, so pass the scan's lowest.
+        """
+        if len(slots) == 0:
+            return np.zeros(0)
+        dt = np.maximum(0.0, t - self.t[slots])
+        x = self.x[slots]
+        P = self.P[slots]
+        # Position block of the predicted covariance only (see predicted())
+        d = dt[:, None, None]
+        S = P[:, :3, :3] + d * (P[:, :3, 3:] + P[:, 3:, :3]) + d * d * P[:, 3:, 3:]
+        S += (self.accel_var * dt ** 4 / 4.0)[:, None, None] * np.eye(3)
+        S += self._R_pos(np.full(len(slots), confidence))
+        lam = (np.abs(S).sum(axis=2) - np.abs(np.diagonal(S, axis1=1, axis2=2)) + np.diagonal(S, axis1=1, axis2=2)).max(axis=1)
+        return dt * np.hypot(x[:, 3], x[:, 4]) + np.sqrt(chi2 * lam)
+
+    def gate(self, track_ids: Sequence[str], k: Kinematics, confidence: float, t: float) -> np.ndarray:
+        """Squared Mahalanobis distance from one observation to each track."""
+        lat, lon, alt = k[0], k[1], k[2]
+        return self.gate_matrix(
+            track_ids,
+            np.array([lat]), np.array([lon]), np.array([alt]), np.array([confidence]),
+            t,
+        )[0]
+
+    def update(self, track_id: str, k: Kinematics, confidence: float, t: float) -> float:
+        """
+        Predict to t, then fold in an observed (lat, lon, alt, vx, vy, vz).
+        Returns the position innovation's squared Mahalanobis distance.
+        """
+        return float(self.update_many([track_id], np.array([k], dtype=float), np.array([confidence]), t)[0])
+
+    def update_many(
+        self,
+        track_ids: Sequence[str],
+        z: np.ndarray,
+        confidence: np.ndarray,
+        t: Times,
+    ) -> np.ndarray:
+        """
+        Vectorized predict + update: row i of z (lat, lon, alt, vx, vy, vz)
+        is folded into track_ids[i]. Track ids must be distinct. Returns the
+        position innovation's squared Mahalanobis distance per row.
+        """
+        slots = self.slots(track_ids)
+        xp, Pp = self.predicted(slots, t)
+
+        ox, oy = self._to_local(slots, z[:, 0], z[:, 1])
+        zl = np.column_stack([ox, oy, z[:, 2:]])
+
+        scale = 1.0 / np.clip(confidence, 0.2, 1.0)
+        R = np.zeros_like(Pp)
+        R[:, 0, 0] = R[:, 1, 1] = (self.pos_sigma_m * scale) ** 2
+        R[:, 2, 2] = (self.alt_sigma_m * scale) ** 2
+        R[:, 3, 3] = R[:, 4, 4] = R[:, 5, 5] = (self.vel_sigma_mps * scale) ** 2
+
+        v = zl - xp
+        S = Pp + R
+        sol = np.linalg.solve(S[:, :3, :3], v[:, :3, None])[..., 0]
+        d2 = np.einsum("ni,ni->n", v[:, :3], sol)
+
+        K = np.linalg.solve(S, Pp).transpose(0, 2, 1)   # P S^-1 (S, P symmetric)
+        self.x[slots] = xp + np.einsum("nij,nj->ni", K, v)
+        P = Pp - K @ Pp
+        self.P[slots] = 0.5 * (P + P.transpose(0, 2, 1))
+        self.t[slots] = np.maximum(self.t[slots], t)
+
+        far = np.hypot(self.x[slots, 0], self.x[slots, 1]) >= REANCHOR_M
+        for slot in slots[far].tolist():
+            self._reanchor(slot)
+        return d2
+
+    def _reanchor(self, slot: int) -> None:
+        lat, lon = self._geo(slot)
+        self._set_anchor(slot, lat, lon)
+        self.x[slot, 0] = 0.0
+        self.x[slot, 1] = 0.0
+
+    # -- read back ---------------------------------------------------------
+
+    def _geo(self, slot: int) -> Tuple[float, float]:
+        lat0, lon0, c = self.anchor[slot]
+        return (
+            float(lat0 + self.x[slot, 1] / M_PER_DEG),
+            float(lon0 + self.x[slot, 0] / (M_PER_DEG * c)),
+        )
+
+    def kinematics(self, track_id: str) -> Kinematics:
+        """Current (lat, lon, alt, vx, vy, vz) estimate."""
+        slot = self._slot[track_id]
+        lat, lon = self._geo(slot)
+        x = self.x[slot]
+        return lat, lon, float(x[2]), float(x[3]), float(x[4]), float(x[5])
+
+    def kinematics_many(self, slots: np.ndarray) -> np.ndarray:
+        """(n, 6) array of lat, lon, alt, vx, vy, vz for the given slots."""
+        a = self.anchor[slots]
+        x = self.x[slots]
+        out = np.empty((len(slots), 6))
+        out[:, 0] = a[:, 0] + x[:, 1] / M_PER_DEG
+        out[:, 1] = a[:, 1] + x[:, 0] / (M_PER_DEG * a[:, 2])
+        out[:, 2:] = x[:, 2:]
+        return out
+
+    def position_sigma_m(self, track_id: str) -> float:
+        slot = self._slot[track_id]
+        return float(math.sqrt(max(0.0, self.P[slot, 0, 0] + self.P[slot, 1, 1])))
@@ -1,35 +1,343 @@
-from fastapi import FastAPI, Header, HTTPException
-from typing import Dict, Any, Optional
+from fastapi import FastAPI, Header, HTTPException, Depends, Request, Response, Query
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, Set, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+import asyncio
+import time
 import uuid
 import os
-import requests
-import math
 
-from iamd_common.auth import verify_token
-from iamd_common.log import audit
+import numpy as np
 
-app = FastAPI(title="track-fusion", version="0.2.0")
+from iamd_common.auth import auth_stats, verify_token
+from iamd_common.log import audit, audit_stats
+from iamd_common.batch import decode_batch, BatchDecodeError
+from iamd_common.clients import get_client
+from iamd_common.codec import FastJSONResponse, JSONDecodeError, loads
+from iamd_common.bus import OBSERVATIONS, TRACKS as TRACKS_TOPIC, Consumer, bus_enabled, get_bus
+from iamd_common.metrics import CONTENT_TYPE, DROPS, ERRORS, ITEMS, render, sampled, stage
+from iamd_common.times import parse_time, parse_ts
+from iamd_common.snapshot import STATE_DIR, StateJournal
+from . import persist
+from .assignment import assign
+from .kalman import KalmanBank, GATE_CHI2_3DOF
+from .records import Track, intern, iso, sources
+from .spatial import KM_PER_DEG
+from .store import TrackStore
+from .maintenance import MaintenanceConfig, run_maintenance, enforce_cap
+from .sharding import ShardMap, shard_index_from_hostname
 
 THREAT_URL = os.getenv("THREAT_URL", "http://threat-scoring:8003")
 
-# In-memory stores (demo-safe)
-TRACKS: Dict[str, Dict[str, Any]] = {}
+# Pooled keep-alive client for forwarding
+THREAT = get_client("threat-scoring", THREAT_URL)
+
+# PIPELINE_TRANSPORT=bus: consume observations from the bus and publish
+# changed tracks to it instead of calling threat-scoring
+BUS = get_bus() if bus_enabled() else None
+BUS_FORWARD_TIMEOUT_S = float(os.getenv("BUS_FORWARD_TIMEOUT_S", "30"))
+
+# Proximity correlation threshold (km); also the spatial grid cell size
+CORRELATION_KM = 2.0
+GRID_CELL_KM = float(os.getenv("GRID_CELL_KM", str(CORRELATION_KM)))
+
+# Track aging / eviction (see maintenance.py)
+MAINT_INTERVAL_S = float(os.getenv("TRACK_MAINT_INTERVAL_S", "1.0"))
+MAINT = MaintenanceConfig(
+    coast_after_s=float(os.getenv("TRACK_COAST_AFTER_S", "2.0")),
+    stale_after_s=float(os.getenv("TRACK_STALE_AFTER_S", "10.0")),
+    decay_per_s=float(os.getenv("TRACK_CONFIDENCE_DECAY_PER_S", "0.01")),
+    ttl_s=float(os.getenv("TRACK_TTL_S", "300")),
+    max_tracks=int(os.getenv("MAX_TRACKS", "50000")),
+)
+
+# Batch association: "gnn" (scan-level assignment) or "sequential"
+ASSOCIATION_MODES = ("gnn", "sequential")
+ASSOCIATION_MODE = os.getenv("ASSOCIATION_MODE", "gnn")
+# gnn: one sensor's plots within this many seconds of feed time form one scan
+# (0 = plots sharing a ts_utc)
+ASSOCIATION_SCAN_WINDOW_S = float(os.getenv("ASSOCIATION_SCAN_WINDOW_S", "0"))
+
+# Constant-velocity Kalman filter per track (see kalman.py)
+KF_GATE_CHI2 = float(os.getenv("KF_GATE_CHI2", str(GATE_CHI2_3DOF)))
+KF_GATE_MARGIN_KM = float(os.getenv("KF_GATE_MARGIN_KM", "1.0"))
+KF = KalmanBank(
+    pos_sigma_m=float(os.getenv("KF_POS_SIGMA_M", "250")),
+    alt_sigma_m=float(os.getenv("KF_ALT_SIGMA_M", "150")),
+    vel_sigma_mps=float(os.getenv("KF_VEL_SIGMA_MPS", "25")),
+    accel_sigma_mps2=float(os.getenv("KF_ACCEL_SIGMA_MPS2", "8")),
+)
+# Plots look up tracks in the grid within this radius; tracks whose gate
+# reaches further (fast, or unobserved for a while) are checked directly
+_SEARCH_KM = CORRELATION_KM + KF_GATE_MARGIN_KM
+
+# In-memory stores (demo-safe); TRACKS keeps spatial + update-time indexes
+TRACKS = TrackStore(cell_km=GRID_CELL_KM, kf=KF)
 OBJECT_TO_TRACK: Dict[str, str] = {}
 
+# Snapshot + WAL of TRACKS under STATE_DIR (empty disables); OBJECT_TO_TRACK
+# is rebuilt from the restored tracks
+JOURNAL = StateJournal(STATE_DIR, "tracks") if STATE_DIR else None
+_DIRTY: Dict[str, None] = {}   # track ids changed since the last WAL write
+
+# Sharded mode: FUSION_SHARDS lists every shard's base URL in index order and
+# each shard owns the geohash cells that hash to its index (see sharding.py).
+# Any shard accepts observations and routes them; reads merge all shards.
+FUSION_SHARDS = [u.strip() for u in os.getenv("FUSION_SHARDS", "").split(",") if u.strip()]
+
+
+def _shard_index() -> int:
+    raw = os.getenv("FUSION_SHARD_INDEX")
+    if raw:
+        return int(raw)
+    # StatefulSet pods: track-fusion-<ordinal>
+    return shard_index_from_hostname(os.getenv("HOSTNAME", "")) or 0
+
+
+SHARDS = ShardMap(
+    len(FUSION_SHARDS),
+    _shard_index(),
+    precision=int(os.getenv("FUSION_GEOHASH_PRECISION", "4")),
+    margin_km=float(os.getenv("FUSION_HANDOVER_MARGIN_KM", "3")),
+) if FUSION_SHARDS else None
+PEERS = {
+    i: get_client(f"track-fusion-shard-{i}", url)
+    for i, url in enumerate(FUSION_SHARDS)
+    if SHARDS is not None and i != SHARDS.index
+}
+_FANOUT = ThreadPoolExecutor(max_workers=max(1, len(PEERS)), thread_name_prefix="fusion-shards") if PEERS else None
+HANDOVER_BATCH_MAX = int(os.getenv("FUSION_HANDOVER_BATCH_MAX", "500"))
+# Adopted anonymous tracks replace a local duplicate within the plot gate
+_ADOPT_GATE = (_SEARCH_KM, KF_GATE_CHI2)
+
+# object_id -> shard: where this shard sent an object's plots last (routing
+# affinity), and where its handed-over tracks went (redirects for late plots)
+AFFINITY_MAX = 100_000
+AFFINITY: "OrderedDict[str, int]" = OrderedDict()
+MOVED: "OrderedDict[str, int]" = OrderedDict()
+
+# Hot-path metric children, resolved once
+_DECODE = stage("decode")
+_CORRELATION = stage("correlation")
+_FORWARD = stage("forward_threat_scoring")
+_MAINTENANCE = stage("maintenance")
+_OBSERVATIONS = ITEMS.labels("correlation")
+_MALFORMED = ERRORS.labels("correlation", "malformed_observation")
+_FORWARD_FAILED = ERRORS.labels("forward_threat_scoring", "unreachable")
+_FORWARD_DROPPED = DROPS.labels("forward_threat_scoring", "send_failed")
+_UNAUTHORIZED = DROPS.labels("bus_consume_observations", "unauthorized")
+_ROUTE = stage("route")
+_SHARD_FAILED = ERRORS.labels("route", "shard_unreachable")
+_REQUEUED = ITEMS.labels("bus_requeue_observations")
+_HANDED_OVER = ITEMS.labels("handover")
+
+sampled("iamd_tracks_active", "Live tracks in the store", lambda: len(TRACKS))
+
 STATS = {
     "observations_ingested": 0,
     "tracks_created": 0,
     "tracks_updated": 0,
     "active_tracks": 0,
-    "last_update_utc": None,
+    "tracks_coasted": 0,
+    "tracks_expired": 0,
+    "tracks_evicted_cap": 0,
+    "maintenance_runs": 0,
+    "last_maintenance_ms": None,
+    "last_update_utc": None,   # epoch here, ISO-8601 in /stats
+    "tracks_handed_out": 0,
+    "tracks_handed_in": 0,
 }
 
 
+def _changed(track_id: str) -> None:
+    if JOURNAL is not None:
+        _DIRTY[track_id] = None
+
+
+def _persist() -> None:
+    """Append changed tracks to the WAL; coasting is not logged (recomputed after restore)."""
+    if JOURNAL is None or not _DIRTY:
+        return
+    with TRACKS.lock:
+        changed = list(_DIRTY)
+        _DIRTY.clear()
+        JOURNAL.append(persist.encode_changes(TRACKS, changed))
+
+
+def restore_state() -> int:
+    """Load TRACKS from the last snapshot + WAL tail. Returns live tracks."""
+    if JOURNAL is None:
+        return 0
+    count = JOURNAL.restore(lambda snap, records: persist.restore(TRACKS, OBJECT_TO_TRACK, snap, records))
+    STATS["active_tracks"] = count
+    return count
+
+
+def _on_track_dropped(track: Track, reason: str) -> None:
+    _changed(track.track_id)
+    audit({
+        "event_id": str(uuid.uuid4()),
+        "ts_utc": datetime.now(timezone.utc).isoformat(),
+        "source_service": "track-fusion",
+        "actor": "system",
+        "action": "TRACK_DROPPED",
+        "details": {
+            "track_id": track.track_id,
+            "object_id": track.object_id,
+            "reason": reason,
+        }
+    })
+
+
+def _remember(table: "OrderedDict[str, int]", object_id: str, shard: int) -> None:
+    table[object_id] = shard
+    table.move_to_end(object_id)
+    if len(table) > AFFINITY_MAX:
+        table.popitem(last=False)
+
+
+def _handover() -> int:
+    """
+    Send tracks that moved into another shard's cells to that shard.
+    They leave this store first; any the peer does not ack by track_id are
+    taken back. Adoption keeps the fresher copy of a track_id, so a send
+    that timed out after the peer adopted it resolves on the next pass.
+    """
+    outgoing: Dict[int, List[Dict[str, Any]]] = {}
+    with TRACKS.lock:
+        ids = list(TRACKS.iter_ids())
+        if not ids:
+            return 0
+        tracks = [TRACKS[tid] for tid in ids]
+        targets = SHARDS.handover_targets([t.lat for t in tracks], [t.lon for t in tracks])
+        by_target: Dict[int, List[str]] = {}
+        for i in np.flatnonzero(targets >= 0).tolist():
+            by_target.setdefault(int(targets[i]), []).append(ids[i])
+        for k, tids in by_target.items():
+            tids = tids[:HANDOVER_BATCH_MAX]
+            outgoing[k] = persist.export(TRACKS, tids)
+            for tid in tids:
+                object_id = TRACKS.remove(tid).object_id
+                if object_id:
+                    if OBJECT_TO_TRACK.get(object_id) == tid:
+                        del OBJECT_TO_TRACK[object_id]
+                    _remember(MOVED, object_id, k)
+                    _remember(AFFINITY, object_id, k)
+                _changed(tid)
+
+    moved = 0
+    for k, entries in outgoing.items():
+        acked: Set[str] = set()
+        try:
+            r = PEERS[k].post("/tracks:handover", json={"from_shard": SHARDS.index, "tracks": entries}, timeout=5)
+            if r.status_code == 200:
+                acked = set(loads(r.content).get("track_ids") or [])
+        except Exception:
+            pass
+        moved += sum(1 for e in entries if e["track"]["track_id"] in acked)
+        back = [e for e in entries if e["track"]["track_id"] not in acked]
+        if not back:
+            continue
+        _SHARD_FAILED.inc()
+        with TRACKS.lock:
+            adopted, replaced, _ = persist.adopt(TRACKS, OBJECT_TO_TRACK, back, *_ADOPT_GATE)
+            for tid in adopted + replaced:
+                _changed(tid)
+            for e in back:
+                MOVED.pop(e["track"].get("object_id") or "", None)
+
+    if moved:
+        STATS["tracks_handed_out"] += moved
+        _HANDED_OVER.inc(moved)
+        audit({
+            "event_id": str(uuid.uuid4()),
+            "ts_utc": _utc_now(),
+            "source_service": "track-fusion",
+            "actor": "system",
+            "action": "TRACKS_HANDED_OVER",
+            "details": {"from_shard": SHARDS.index, "count": moved, "to_shards": sorted(outgoing)},
+        })
+    return moved
+
+
+def maintenance_pass(now: Optional[float] = None) -> Dict[str, int]:
+    start = time.perf_counter()
+    counts = run_maintenance(TRACKS, OBJECT_TO_TRACK, MAINT, now=now, on_drop=_on_track_dropped)
+    if SHARDS is not None:
+        counts["handed_over"] = _handover()
+        counts["live"] = len(TRACKS)
+    STATS["tracks_coasted"] += counts["coasted"]
+    STATS["tracks_expired"] += counts["expired"]
+    STATS["tracks_evicted_cap"] += counts["capped"]
+    STATS["maintenance_runs"] += 1
+    elapsed = time.perf_counter() - start
+    _MAINTENANCE.observe(elapsed)
+    STATS["last_maintenance_ms"] = round(elapsed * 1000.0, 3)
+    STATS["active_tracks"] = counts["live"]
+    _persist()
+    return counts
+
+
+async def _maintenance_loop() -> None:
+    while True:
+        await asyncio.sleep(MAINT_INTERVAL_S)
+        try:
+            # Off the event loop: the pass holds the store lock, not the loop
+            await asyncio.to_thread(maintenance_pass)
+        except Exception:
+            # Never let one bad pass stop aging
+            pass
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    if JOURNAL is not None:
+        restore_state()
+        JOURNAL.start(TRACKS.lock, lambda: persist.capture(TRACKS), persist.build)
+    task = asyncio.create_task(_maintenance_loop())
+    if CONSUMER is not None:
+        CONSUMER.start()
+    yield
+    task.cancel()
+    if CONSUMER is not None:
+        CONSUMER.stop()
+    if JOURNAL is not None:
+        JOURNAL.close()
+
+
+app = FastAPI(title="track-fusion", version="0.2.0", lifespan=_lifespan)
+
+
 def _utc_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _iso(ts: float) -> str:
+    return iso(ts)
+
+
+def _parse_since(since: Optional[str]) -> Optional[float]:
+    # Parsed once per request
+    try:
+        return parse_time(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be epoch seconds or ISO-8601")
+
+
+def _parse_bbox(bbox: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    if not bbox:
+        return None
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lat,min_lon,max_lat,max_lon")
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="bbox min must not exceed max")
+    return min_lat, min_lon, max_lat, max_lon
+
+
 def _require_auth(auth_header: Optional[str]) -> Dict[str, Any]:
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing bearer token")
@@ -40,113 +348,513 @@ def _require_auth(auth_header: Optional[str]) -> Dict[str, Any]:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
-def _distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    # simple local approximation (fine for demo scope)
-    return math.sqrt(((lat1 - lat2) * 111.0) ** 2 + ((lon1 - lon2) * 111.0) ** 2)
-
-
 def _new_track_id() -> str:
     return f"TRK-{str(uuid.uuid4())[:8]}"
 
 
+async def _read_body(request: Request) -> bytes:
+    return await request.body()
+
+
+def _has_required_fields(obs: Any) -> bool:
+    return isinstance(obs, dict) and "position" in obs and "quality" in obs and "sensor_id" in obs
+
+
 @app.get("/health")
 def health():
-    return {"ok": True, "tracks": len(TRACKS)}
+    return {
+        "ok": True,
+        "tracks": len(TRACKS),
+        "audit": audit_stats(),
+        "auth": auth_stats(),
+        "state": JOURNAL.stats if JOURNAL is not None else None,
+        "bus": CONSUMER.stats if CONSUMER is not None else None,
+    }
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    return Response(content=render(), media_type=CONTENT_TYPE)
+
+
+def _sharded(scope: str) -> bool:
+    # scope=local: this shard only (peer-to-peer calls and debugging)
+    return SHARDS is not None and scope != "local"
+
+
+def _fan_out(method: str, path: str, **kwargs: Any) -> Dict[int, Any]:
+    """Same call on every peer shard in parallel; JSON body per shard, None if it failed."""
+    def call(k: int) -> Any:
+        try:
+            r = getattr(PEERS[k], method)(path, **kwargs)
+        except Exception:
+            _SHARD_FAILED.inc()
+            return None
+        if r.status_code != 200:
+            _SHARD_FAILED.inc()
+            return None
+        return loads(r.content)
+
+    futures = {k: _FANOUT.submit(call, k) for k in PEERS}
+    return {k: f.result() for k, f in futures.items()}
 
 
 @app.get("/tracks")
-def get_tracks():
-    tracks = list(TRACKS.values())
+def get_tracks(
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    bbox: Optional[str] = None,
+    scope: str = Query("cluster"),
+):
+    """
+    Newest-first tracks (default: latest 10).
+
+    - since: only tracks updated after this time (epoch or ISO-8601)
+    - bbox: min_lat,min_lon,max_lat,max_lon map viewport
+    - cursor: value of X-Next-Cursor from the previous page (per shard)
+
+    Sharded: merges every shard's newest-first page; use since (not
+    cursor) to page through the merged picture.
+    """
+    since_ts = _parse_since(since)
+    box = _parse_bbox(bbox)
+    headers: Dict[str, str] = {}
+
+    if _sharded(scope):
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor paging is per shard (scope=local); use since")
+        params: Dict[str, Any] = {"limit": limit, "scope": "local"}
+        if since:
+            params["since"] = since
+        if bbox:
+            params["bbox"] = bbox
+        local = TRACKS.in_bbox(*box, limit=limit, since_ts=since_ts) if box else TRACKS.newest(limit, since_ts=since_ts)[0]
+        merged = [t.to_doc() for t in local]
+        missing: List[int] = []
+        for k, page in sorted(_fan_out("get", "/tracks", params=params).items()):
+            if page is None:
+                missing.append(k)
+            else:
+                merged.extend(page)
+        if missing:
+            headers["X-Shards-Missing"] = ",".join(str(k) for k in missing)
+        merged.sort(key=lambda t: t.get("last_update_utc") or "", reverse=True)
+        # A handover that timed out can leave a track on two shards until the
+        # next pass; show the newest copy once
+        seen: Set[str] = set()
+        page = []
+        for t in merged:
+            if t["track_id"] not in seen:
+                seen.add(t["track_id"])
+                page.append(t)
+        return FastJSONResponse(page[:limit], headers=headers)
+
+    if box is not None:
+        return FastJSONResponse([t.to_doc() for t in TRACKS.in_bbox(*box, limit=limit, since_ts=since_ts)])
+
+    before_seq: Optional[int] = None
+    if cursor:
+        try:
+            before_seq = int(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    # newest first
-    tracks.sort(key=lambda t: t.get("last_update_utc", ""), reverse=True)
+    tracks, next_cursor = TRACKS.newest(limit, before_seq=before_seq, since_ts=since_ts)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return FastJSONResponse([t.to_doc() for t in tracks], headers=headers)
 
-    # cap to latest 10
-    return tracks[:10]
 
+def _stats_doc() -> Dict[str, Any]:
+    last = STATS["last_update_utc"]
+    return {**STATS, "last_update_utc": _iso(last) if last is not None else None}
 
 
 @app.get("/stats")
-def stats():
+def stats(scope: str = Query("cluster")):
     STATS["active_tracks"] = len(TRACKS)
-    return STATS
+    if SHARDS is None:
+        return _stats_doc()
+    local = {**_stats_doc(), "shard": SHARDS.index}
+    if not _sharded(scope):
+        return local
+
+    # Counters add up across shards; times report the latest / slowest
+    parts = [local] + [p for _, p in sorted(_fan_out("get", "/stats", params={"scope": "local"}).items()) if p]
+    merged: Dict[str, Any] = {}
+    for key, value in STATS.items():
+        values = [p.get(key) for p in parts if p.get(key) is not None]
+        if key in ("last_update_utc", "last_maintenance_ms"):
+            merged[key] = max(values, default=None)
+        elif isinstance(value, (int, float)):
+            merged[key] = sum(values)
+        else:
+            merged[key] = value
+    merged["shards"] = {
+        "count": SHARDS.count,
+        "reporting": len(parts),
+        "active_tracks": {str(p.get("shard")): p.get("active_tracks") for p in parts},
+    }
+    return merged
 
 
 @app.post("/reset")
-def reset():
-    TRACKS.clear()
-    OBJECT_TO_TRACK.clear()
+def reset(scope: str = Query("cluster")):
+    def clear() -> None:
+        TRACKS.clear()
+        OBJECT_TO_TRACK.clear()
+        AFFINITY.clear()
+        MOVED.clear()
+        _DIRTY.clear()
+
+    if JOURNAL is not None:
+        # Takes the snapshot thread's checkpoint lock before TRACKS.lock
+        JOURNAL.reset(TRACKS.lock, clear)
+    else:
+        with TRACKS.lock:
+            clear()
     STATS["observations_ingested"] = 0
     STATS["tracks_created"] = 0
     STATS["tracks_updated"] = 0
     STATS["active_tracks"] = 0
+    STATS["tracks_coasted"] = 0
+    STATS["tracks_expired"] = 0
+    STATS["tracks_evicted_cap"] = 0
+    STATS["tracks_handed_out"] = 0
+    STATS["tracks_handed_in"] = 0
     STATS["last_update_utc"] = None
+    if _sharded(scope):
+        _fan_out("post", "/reset", params={"scope": "local"})
     return {"ok": True}
 
 
-@app.post("/observations")
-def ingest_observation(obs: Dict[str, Any], authorization: Optional[str] = Header(None)):
-    _ = _require_auth(authorization)
+@app.post("/tracks:handover")
+def receive_handover(body: Dict[str, Any]):
+    """
+    Adopt tracks a peer shard handed over (they entered this shard's
+    cells). Acks every track_id now held here, including re-sends.
+    """
+    entries = body.get("tracks") or []
+    try:
+        with TRACKS.lock:
+            adopted, replaced, kept = persist.adopt(TRACKS, OBJECT_TO_TRACK, entries, *_ADOPT_GATE)
+            for tid in adopted + replaced:
+                _changed(tid)
+            for e in entries:
+                MOVED.pop(e["track"].get("object_id") or "", None)
+            _persist()
+    except (KeyError, TypeError, ValueError, IndexError) as e:
+        raise HTTPException(status_code=400, detail=f"Malformed handover: {e}")
+    STATS["tracks_handed_in"] += len(adopted)
+    return {"ok": True, "adopted": len(adopted), "replaced": len(replaced), "track_ids": adopted + kept}
 
-    # validate
-    if "position" not in obs or "quality" not in obs or "sensor_id" not in obs:
-        raise HTTPException(status_code=400, detail="Observation missing required fields")
 
+def _observed(obs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse the fields correlation needs; raises on malformed input.
+    t is the plot's ts_utc (feed time), which the Kalman filters run on;
+    receive time only when the plot carries none.
+    """
     pos = obs["position"]
     lat = float(pos["lat"])
     lon = float(pos["lon"])
     alt = float(pos.get("alt_m", 0.0))
 
-    sensor_id = str(obs["sensor_id"])
-    confidence = float(obs["quality"].get("confidence", 0.5))
+    vel = obs.get("velocity") or {}
+    velocity = {
+        "vx_mps": float(vel.get("vx_mps", 0.0)),
+        "vy_mps": float(vel.get("vy_mps", 0.0)),
+        "vz_mps": float(vel.get("vz_mps", 0.0)),
+    }
 
-    # >>> These fields are what lets COP label dots as AIR/SEA/BENIGN
-    object_id = obs.get("object_id")          # unique per contact per click
-    label = obs.get("label")                  # e.g. "AIR-01"
-    contact_type = obs.get("contact_type")    # "AIR" | "SEA" | "BENIGN"
+    return {
+        "lat": lat,
+        "lon": lon,
+        "alt": alt,
+        "velocity": velocity,
+        "k": (lat, lon, alt, velocity["vx_mps"], velocity["vy_mps"], velocity["vz_mps"]),
+        "sensor_id": str(obs["sensor_id"]),
+        "confidence": float(obs["quality"].get("confidence", 0.5)),
+        # >>> These fields are what lets COP label dots as AIR/SEA/BENIGN
+        "object_id": obs.get("object_id"),          # unique per contact per click
+        "label": obs.get("label"),                  # e.g. "AIR-01"
+        "contact_type": obs.get("contact_type"),    # "AIR" | "SEA" | "BENIGN"
+        "t": parse_ts(obs.get("ts_utc")) or time.time(),
+    }
 
-    STATS["observations_ingested"] += 1
-    STATS["last_update_utc"] = _utc_now()
 
-    # 1) strong correlation: object_id mapping
-    match_track_id: Optional[str] = None
+def _mapped_track(p: Dict[str, Any]) -> Optional[str]:
+    # strong correlation: object_id mapping
+    object_id = p["object_id"]
     if object_id and object_id in OBJECT_TO_TRACK:
         mapped = OBJECT_TO_TRACK[object_id]
         if mapped in TRACKS:
-            match_track_id = mapped
+            return mapped
+    return None
 
-    # 2) fallback correlation: spatial proximity (weak)
-    if not match_track_id:
-        for tid, trk in TRACKS.items():
-            st = trk.get("state", {})
-            d = _distance_km(float(st.get("lat", 0.0)), float(st.get("lon", 0.0)), lat, lon)
-            if d < 2.0:  # km threshold
-                match_track_id = tid
-                break
 
-    now = _utc_now()
+# Tracks whose gate reaches past _SEARCH_KM: ids, lat, lon, reach (km)
+Wide = Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]
+
+
+def _wide_tracks(t: float, confidence: float) -> Wide:
+    """
+    Tracks that can gate a plot of this confidence at time t from farther
+    than _SEARCH_KM away (predicted travel plus the covariance gate), so
+    the grid lookup alone would miss them. Called under TRACKS.lock, once
+    per scan or batch with its latest time and lowest confidence.
+    """
+    ids, slots = TRACKS.kf.live()
+    reach = TRACKS.kf.reach_m(slots, t, confidence, KF_GATE_CHI2) / 1000.0
+    wide = np.flatnonzero(reach > _SEARCH_KM)
+    k = TRACKS.kf.kinematics_many(slots[wide])
+    return [ids[i] for i in wide], k[:, 0], k[:, 1], reach[wide]
+
+
+def _candidates(p: Dict[str, Any], wide: Wide) -> List[str]:
+    """Grid neighbours of a plot, plus the wide tracks within their reach of it."""
+    cands = list(TRACKS.index.candidates(p["lat"], p["lon"], _SEARCH_KM))
+    ids, lat, lon, reach = wide
+    if ids:
+        # Scaled at the more poleward latitude, so the distance never overshoots
+        c = np.cos(np.radians(np.maximum(np.abs(lat), abs(p["lat"]))))
+        dlon = (lon - p["lon"] + 180.0) % 360.0 - 180.0
+        near = np.flatnonzero(np.hypot(lat - p["lat"], dlon * c) * KM_PER_DEG <= reach)
+        if len(near):
+            # (a wide set kept across a batch may name tracks evicted since)
+            seen = set(cands)
+            cands.extend(ids[i] for i in near if ids[i] not in seen and ids[i] in TRACKS)
+    return cands
+
+
+def _associate(
+    p: Dict[str, Any],
+    scan_tracks: Optional[Set[str]] = None,
+    wide: Optional[Wide] = None,
+) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Sequential association for one observation: object_id mapping, else the
+    nearest track (Mahalanobis) inside the gate. Returns (track_id or None,
+    d2 or None).
+
+    scan_tracks restricts the gate to tracks started earlier in the same
+    scan, skipping any this sensor already reported (a sensor sees each
+    target once per scan). wide is _wide_tracks for the plot's batch;
+    computed for this plot alone when not given.
+    """
+    mapped = _mapped_track(p)
+    if mapped:
+        return mapped, None
+
+    # fallback correlation: Mahalanobis gate against nearby tracks
+    # all candidates predicted to now in one pass; smallest distance wins
+    if scan_tracks is not None:
+        cands = [
+            tid for tid in scan_tracks
+            if tid in TRACKS and p["sensor_id"] not in TRACKS[tid].sources
+        ]
+    else:
+        cands = _candidates(p, wide if wide is not None else _wide_tracks(p["t"], p["confidence"]))
+    cands.sort(key=TRACKS.index.seq)
+    if cands:
+        dists = TRACKS.kf.gate(cands, p["k"], p["confidence"], p["t"])
+        best = int(dists.argmin())
+        if dists[best] < KF_GATE_CHI2:
+            return cands[best], float(dists[best])
+    return None, None
+
+
+def _correlate(obs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Correlate one observation into TRACKS (create or update the track).
+    Returns {"track_id", "created"}.
+    """
+    p = _observed(obs)
+    with TRACKS.lock:
+        match_track_id, d2 = _associate(p)
+        return _apply(p, match_track_id, d2)
+
+
+def _scans(plots: List[Dict[str, Any]]) -> List[List[int]]:
+    """
+    Split a batch of parsed observations into sensor scans: one sensor's
+    plots within ASSOCIATION_SCAN_WINDOW_S of the scan's first plot (feed
+    time). Returns index lists, in time order.
+    """
+    by_sensor: Dict[str, List[int]] = {}
+    for i, p in enumerate(plots):
+        by_sensor.setdefault(p["sensor_id"], []).append(i)
+
+    scans: List[List[int]] = []
+    for idx in by_sensor.values():
+        idx.sort(key=lambda i: plots[i]["t"])
+        start = plots[idx[0]]["t"]
+        current: List[int] = []
+        for i in idx:
+            if plots[i]["t"] - start > ASSOCIATION_SCAN_WINDOW_S:
+                scans.append(current)
+                current = []
+                start = plots[i]["t"]
+            current.append(i)
+        scans.append(current)
+    scans.sort(key=lambda scan: plots[scan[0]]["t"])
+    return scans
+
+
+def _correlate_scans(plots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """_correlate_scan over each sensor scan of a batch, in time order."""
+    out: List[Optional[Dict[str, Any]]] = [None] * len(plots)
+    for idx in _scans(plots):
+        for i, r in zip(idx, _correlate_scan([plots[i] for i in idx])):
+            out[i] = r
+    return out
+
+
+def _correlate_scan(scan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Scan-level association (global nearest neighbour) for parsed
+    observations from one sensor scan (see _scans). Returns
+    {"track_id", "created"} per observation, in input order.
+
+    1) object_id mappings are honoured as-is;
+    2) the rest are gated against spatial-prefilter candidates (tracks
+       not already claimed by step 1), the sparse gated cost matrix is
+       computed in one vectorized pass and solved as a one-to-one
+       assignment that minimises total Mahalanobis distance; tracks that
+       received one plot are then Kalman-updated in a single batch;
+    3) plots left unassigned start new tracks (a sensor sees each target
+       once per scan, so they never join one another).
+    """
+    with TRACKS.lock:
+        match: List[Optional[str]] = [_mapped_track(p) for p in scan]
+        d2: List[Optional[float]] = [None] * len(scan)
+        claimed = {tid for tid in match if tid}
+
+        pending = [i for i, tid in enumerate(match) if not tid]
+        wide = _wide_tracks(
+            max(scan[i]["t"] for i in pending),
+            min(scan[i]["confidence"] for i in pending),
+        ) if pending else None
+        rows: List[int] = []
+        cols: List[int] = []
+        col_ids: List[str] = []
+        col_of: Dict[str, int] = {}
+        for r, i in enumerate(pending):
+            p = scan[i]
+            for tid in _candidates(p, wide):
+                if tid in claimed:
+                    continue
+                c = col_of.get(tid)
+                if c is None:
+                    c = col_of[tid] = len(col_ids)
+                    col_ids.append(tid)
+                rows.append(r)
+                cols.append(c)
+
+        if rows:
+            r_arr = np.array(rows, dtype=np.intp)
+            c_arr = np.array(cols, dtype=np.intp)
+            obs_arr = np.array([
+                [scan[i]["lat"], scan[i]["lon"], scan[i]["alt"], scan[i]["confidence"], scan[i]["t"]]
+                for i in pending
+            ])
+            o = obs_arr[r_arr]
+            cost = TRACKS.kf.gate_pairs([col_ids[c] for c in cols], o[:, 0], o[:, 1], o[:, 2], o[:, 3], o[:, 4])
+            col_of_row, cost_of_row = assign(r_arr, c_arr, cost, len(pending), len(col_ids), KF_GATE_CHI2)
+            for r, i in enumerate(pending):
+                if col_of_row[r] >= 0:
+                    match[i] = col_ids[col_of_row[r]]
+                    d2[i] = float(cost_of_row[r])
+
+        # One vectorized Kalman update for every track that got exactly one plot
+        hits: Dict[str, int] = {}
+        for tid in match:
+            if tid:
+                hits[tid] = hits.get(tid, 0) + 1
+        batch = [
+            i for i, tid in enumerate(match)
+            if tid and hits[tid] == 1 and _same_object(scan[i], TRACKS[tid])
+        ]
+        if batch:
+            fused = TRACKS.kf.update_many(
+                [match[i] for i in batch],
+                np.array([scan[i]["k"] for i in batch]),
+                np.array([scan[i]["confidence"] for i in batch]),
+                np.array([scan[i]["t"] for i in batch]),
+            )
+            for i, v in zip(batch, fused.tolist()):
+                d2[i] = v
+        filtered = set(batch)
+
+        out: List[Dict[str, Any]] = []
+        created_here: Set[str] = set()
+        for i, p in enumerate(scan):
+            tid = match[i]
+            if tid and tid not in TRACKS:
+                tid = None   # evicted by the cap earlier in this scan
+            if not tid:
+                tid, d2[i] = _associate(p, scan_tracks=created_here)
+            r = _apply(p, tid, d2[i], filtered=i in filtered)
+            if r["created"]:
+                created_here.add(r["track_id"])
+            out.append(r)
+        return out
+
+
+def _same_object(p: Dict[str, Any], track: Track) -> bool:
+    # Only filter in a measurement of the same object (or an anonymous plot
+    # that passed the gate)
+    return not p["object_id"] or p["object_id"] == track.object_id
+
+
+def _apply(
+    p: Dict[str, Any],
+    match_track_id: Optional[str],
+    d2: Optional[float],
+    filtered: bool = False,
+) -> Dict[str, Any]:
+    """
+    Create a track, or fold the observation into match_track_id.
+    filtered: the Kalman update was already applied (batched by the scan).
+    """
+    k = p["k"]
+    t = p["t"]
+    sensor_id = p["sensor_id"]
+    confidence = p["confidence"]
+    object_id = p["object_id"]
+    label = p["label"]
+    contact_type = p["contact_type"]
+
+    STATS["observations_ingested"] += 1
+    STATS["last_update_utc"] = time.time()
 
     if not match_track_id:
         track_id = _new_track_id()
 
-        track = {
-            "track_id": track_id,
-            "object_id": object_id,
-            "last_update_utc": now,
-            "state": {"lat": lat, "lon": lon, "alt_m": alt},
-            "sources": [sensor_id],
-            "track_confidence": max(0.0, min(1.0, confidence)),
+        track = Track(
+            track_id,
+            object_id,
+            k,
+            sources((sensor_id,)),
+            max(0.0, min(1.0, confidence)),
             # >>> labeling fields for radar/UI
-            "label": label or (object_id or track_id),
-            "contact_type": contact_type or "UNKNOWN",
-        }
+            label or (object_id or track_id),
+            contact_type or "UNKNOWN",
+        )
 
-        TRACKS[track_id] = track
+        now = _iso(TRACKS.add(track))
+        TRACKS.kf.init(track_id, k, t, confidence)
         STATS["tracks_created"] += 1
+        created = True
 
         if object_id:
             OBJECT_TO_TRACK[object_id] = track_id
 
+        # Hard memory cap between maintenance passes
+        if len(TRACKS) > MAINT.max_tracks:
+            STATS["tracks_evicted_cap"] += enforce_cap(TRACKS, OBJECT_TO_TRACK, MAINT.max_tracks, _on_track_dropped)
+
         audit({
             "event_id": str(uuid.uuid4()),
             "ts_utc": now,
@@ -156,36 +864,40 @@ def ingest_observation(obs: Dict[str, Any], authorization: Optional[str] = Heade
             "details": {
                 "track_id": track_id,
                 "object_id": object_id,
-                "label": track["label"],
-                "contact_type": track["contact_type"],
+                "label": track.label,
+                "contact_type": track.contact_type,
             }
         })
 
     else:
         track = TRACKS[match_track_id]
 
-        # Only update position if this observation belongs to same object
-        if object_id and object_id == track.get("object_id"):
-            track["state"] = {"lat": lat, "lon": lon, "alt_m": alt}
+        if _same_object(p, track):
+            if not filtered:
+                d2 = TRACKS.kf.update(match_track_id, k, confidence, t)
+            est = TRACKS.kf.kinematics(match_track_id)
+            track.set_kinematics(est)
+            TRACKS.move(match_track_id, est[0], est[1])
+            track.history_len += 1
 
-        track["last_update_utc"] = now
+        now = _iso(TRACKS.touch(match_track_id))
 
-        track["track_confidence"] = max(
-            0.0,
-            min(1.0, float(track.get("track_confidence", 0.5)) + 0.05)
-        )
+        # Confidence grows with how well the plot fit the prediction
+        fit = max(0.0, 1.0 - (d2 or 0.0) / KF_GATE_CHI2)
+        conf = track.confidence
+        track.confidence = max(0.0, min(1.0, conf + 0.2 * fit * (1.0 - conf)))
 
-        if sensor_id not in track.get("sources", []):
-            track.setdefault("sources", []).append(sensor_id)
+        track.add_source(sensor_id)
 
         # >>> preserve/update label/type when present
         if label:
-            track["label"] = label
+            track.label = intern(label)
         if contact_type:
-            track["contact_type"] = contact_type
+            track.contact_type = intern(contact_type)
 
         STATS["tracks_updated"] += 1
         track_id = match_track_id
+        created = False
 
         audit({
             "event_id": str(uuid.uuid4()),
@@ -196,20 +908,376 @@ def ingest_observation(obs: Dict[str, Any], authorization: Optional[str] = Heade
             "details": {
                 "track_id": track_id,
                 "object_id": object_id,
-                "label": track.get("label"),
-                "contact_type": track.get("contact_type"),
+                "label": track.label,
+                "contact_type": track.contact_type,
             }
         })
 
-    # forward to threat-scoring (best effort)
+    _changed(track_id)
+    return {"track_id": track_id, "created": created}
+
+
+def _route_targets(items: List[Any], authorization: Optional[str]) -> List[int]:
+    """
+    Shard per raw observation: this shard if it holds the object's track,
+    else where the object was last sent, else the owner of its cell. A plot
+    near a cell edge goes to the neighbouring cell's shard instead when
+    that shard holds a track it gates with: tracks are handed over only
+    margin_km inside their new cell (ShardMap.neighbours). Malformed items
+    stay here and are rejected by the local path.
+    """
+    out = [SHARDS.index] * len(items)
+    geo: List[int] = []
+    lat: List[float] = []
+    lon: List[float] = []
+    for i, obs in enumerate(items):
+        object_id = obs.get("object_id") if isinstance(obs, dict) else None
+        if object_id:
+            if object_id in OBJECT_TO_TRACK:
+                continue
+            k = AFFINITY.get(object_id)
+            if k is not None:
+                out[i] = k
+                continue
+        try:
+            pos = obs["position"]
+            lat.append(float(pos["lat"]))
+            lon.append(float(pos["lon"]))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+        geo.append(i)
+    if geo:
+        offer: Dict[int, List[int]] = {}
+        for i, k, near in zip(geo, SHARDS.owners(lat, lon).tolist(), SHARDS.neighbours(lat, lon).tolist()):
+            out[i] = k
+            for n in set(near) - {-1}:
+                offer.setdefault(n, []).append(i)
+        futures = {
+            n: _FANOUT.submit(_claimed_by_peer, n, [items[i] for i in idx], authorization)
+            for n, idx in offer.items() if n != SHARDS.index
+        }
+        claimed_by: Dict[int, int] = {}
+        for n in sorted(offer):
+            idx = offer[n]
+            claimed = _claim_local([items[i] for i in idx]) if n == SHARDS.index else futures[n].result()
+            for pos in claimed:
+                claimed_by.setdefault(idx[pos], n)
+        for i, n in claimed_by.items():
+            out[i] = n
+    return out
+
+
+def _claimed_by_peer(k: int, items: List[Any], authorization: Optional[str]) -> List[int]:
+    # A failed check leaves the plots with their cell's owner
     try:
-        requests.post(
-            f"{THREAT_URL}/tracks",
-            json=TRACKS[track_id],
-            headers={"Authorization": authorization},
-            timeout=3,
-        )
+        r = PEERS[k].post("/observations:claim", json=items, headers={"Authorization": authorization}, timeout=5)
     except Exception:
-        pass
+        _SHARD_FAILED.inc()
+        return []
+    if r.status_code != 200:
+        _SHARD_FAILED.inc()
+        return []
+    return [pos for pos in loads(r.content).get("claimed") or [] if isinstance(pos, int) and 0 <= pos < len(items)]
+
+
+def _claim_local(items: List[Any]) -> List[int]:
+    """Positions of the plots that map to or gate a track held here."""
+    plots: List[Tuple[int, Dict[str, Any]]] = []
+    for i, obs in enumerate(items):
+        if not _has_required_fields(obs):
+            continue
+        try:
+            plots.append((i, _observed(obs)))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+    if not plots:
+        return []
+    with TRACKS.lock:
+        wide = _wide_tracks(max(p["t"] for _, p in plots), min(p["confidence"] for _, p in plots))
+        return [i for i, p in plots if _associate(p, wide=wide)[0] is not None]
+
+
+def _route_batch(items: List[Any], authorization: Optional[str], association: str) -> Dict[str, Any]:
+    """
+    Split a batch by owning shard, correlate the local part here and the
+    rest on peers (in parallel), and put results back in input order.
+    Plots for tracks that were just handed over come back as moved_to and
+    are re-sent once to the new owner.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    tracks_changed = 0
+    pending: Dict[int, List[int]] = {}
+    for i, k in enumerate(_route_targets(items, authorization)):
+        pending.setdefault(k, []).append(i)
+
+    for attempt in range(2):
+        def send(k: int, idx: List[int]) -> Optional[Dict[str, Any]]:
+            try:
+                r = PEERS[k].post(
+                    "/observations:batch",
+                    params={"scope": "local", "association": association},
+                    json=[items[i] for i in idx],
+                    headers={"Authorization": authorization},
+                    timeout=10,
+                )
+            except Exception:
+                _SHARD_FAILED.inc()
+                return None
+            if r.status_code != 200:
+                _SHARD_FAILED.inc()
+                return None
+            return loads(r.content)
+
+        futures = {k: _FANOUT.submit(send, k, idx) for k, idx in pending.items() if k != SHARDS.index}
+        bodies: Dict[int, Optional[Dict[str, Any]]] = {}
+        if SHARDS.index in pending:
+            bodies[SHARDS.index] = _ingest_local([items[i] for i in pending[SHARDS.index]], authorization, association)
+        for k, f in futures.items():
+            bodies[k] = f.result()
+
+        retry: Dict[int, List[int]] = {}
+        for k, body in bodies.items():
+            idx = pending[k]
+            if body is None:
+                for i in idx:
+                    results[i] = {"index": i, "ok": False, "error": f"Fusion shard {k} unavailable", "unavailable": True}
+                continue
+            tracks_changed += int(body.get("tracks_changed", 0))
+            for r in body.get("results", []):
+                pos = r.get("index")
+                if not isinstance(pos, int) or not 0 <= pos < len(idx):
+                    continue
+                i = idx[pos]
+                obs = items[i]
+                object_id = obs.get("object_id") if isinstance(obs, dict) else None
+                moved = r.get("moved_to")
+                if attempt == 0 and isinstance(moved, int) and 0 <= moved < SHARDS.count and moved != k:
+                    retry.setdefault(moved, []).append(i)
+                    if object_id:
+                        _remember(AFFINITY, object_id, moved)
+                    continue
+                if r.get("ok") and object_id and k != SHARDS.index:
+                    _remember(AFFINITY, object_id, k)
+                results[i] = {**r, "index": i, "shard": k}
+        if not retry:
+            break
+        pending = retry
+
+    for i, r in enumerate(results):
+        if r is None:
+            results[i] = {"index": i, "ok": False, "error": "No result from fusion shard"}
+    return {
+        "ok": True,
+        "count": len(items),
+        "accepted": sum(1 for r in results if r.get("ok")),
+        "tracks_changed": tracks_changed,
+        "results": results,
+    }
+
+
+def _forward(tracks: List[Track], authorization: Optional[str], path: str = "/tracks:batch") -> None:
+    """
+    Hand changed tracks to threat-scoring: one POST, or one bus message
+    (waiting up to BUS_FORWARD_TIMEOUT_S while the topic is full). Never
+    raises; a failed forward counts every track it loses.
+    """
+    t0 = time.perf_counter()
+    docs = [t.to_doc() for t in tracks]
+    try:
+        if BUS is not None:
+            BUS.publish(TRACKS_TOPIC, [{"tracks": docs}], timeout_s=BUS_FORWARD_TIMEOUT_S)
+        else:
+            body: Any = docs[0] if path == "/tracks" else docs
+            r = THREAT.post(path, json=body, headers={"Authorization": authorization}, timeout=3)
+            if r.status_code != 200:
+                raise RuntimeError(f"threat-scoring returned {r.status_code}")
+    except Exception:
+        _FORWARD_FAILED.inc()
+        _FORWARD_DROPPED.inc(len(tracks))
+    _FORWARD.observe(time.perf_counter() - t0)
+
+
+@app.post("/observations")
+def ingest_observation(
+    raw: bytes = Depends(_read_body),
+    authorization: Optional[str] = Header(None),
+    scope: str = Query("cluster"),
+):
+    _ = _require_auth(authorization)
+
+    try:
+        obs = loads(raw)
+    except JSONDecodeError:
+        _MALFORMED.inc()
+        raise HTTPException(status_code=400, detail="Observation is not valid JSON")
+
+    # validate
+    if not _has_required_fields(obs):
+        _MALFORMED.inc()
+        raise HTTPException(status_code=400, detail="Observation missing required fields")
+
+    if _sharded(scope):
+        t0 = time.perf_counter()
+        r = _route_batch([obs], authorization, ASSOCIATION_MODE)["results"][0]
+        _ROUTE.observe(time.perf_counter() - t0)
+        if not r.get("ok"):
+            raise HTTPException(status_code=502, detail=r.get("error", "Fusion shard failed"))
+        return {"ok": True, "track_id": r["track_id"]}
+
+    t0 = time.perf_counter()
+    track_id = _correlate(obs)["track_id"]
+    _persist()
+    _CORRELATION.observe(time.perf_counter() - t0)
+    _OBSERVATIONS.inc()
+
+    _forward([TRACKS[track_id]], authorization, "/tracks")
 
     return {"ok": True, "track_id": track_id}
+
+
+@app.post("/observations:batch")
+def ingest_observation_batch(
+    raw: bytes = Depends(_read_body),
+    authorization: Optional[str] = Header(None),
+    association: str = Query(ASSOCIATION_MODE),
+    scope: str = Query("cluster"),
+):
+    """
+    Correlate a scan of observations (JSON array or NDJSON) in one pass and
+    forward every changed track to threat-scoring as a single batch.
+
+    - association=gnn: scan-level one-to-one assignment (default)
+    - association=sequential: one observation at a time, in order
+    - sharded: items are routed to their owning shards (scope=local skips routing)
+    """
+    _ = _require_auth(authorization)
+
+    if association not in ASSOCIATION_MODES:
+        raise HTTPException(status_code=400, detail=f"association must be one of {', '.join(ASSOCIATION_MODES)}")
+
+    t0 = time.perf_counter()
+    try:
+        items = decode_batch(raw)
+    except BatchDecodeError as e:
+        ERRORS.labels("decode", "bad_batch").inc()
+        raise HTTPException(status_code=400, detail=str(e))
+    t1 = time.perf_counter()
+    _DECODE.observe(t1 - t0)
+
+    if _sharded(scope):
+        out = _route_batch(items, authorization, association)
+        _ROUTE.observe(time.perf_counter() - t1)
+        return FastJSONResponse(out)
+    return FastJSONResponse(_ingest_local(items, authorization, association))
+
+
+@app.post("/observations:claim")
+def claim_observations(
+    raw: bytes = Depends(_read_body),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Which of these plots (near this shard's cells, offered by a routing
+    shard) map to or gate a track held here. Nothing is correlated.
+    """
+    _ = _require_auth(authorization)
+    try:
+        items = decode_batch(raw)
+    except BatchDecodeError as e:
+        ERRORS.labels("decode", "bad_batch").inc()
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"claimed": _claim_local(items)}
+
+
+def _ingest_local(items: List[Any], authorization: Optional[str], association: str) -> Dict[str, Any]:
+    t1 = time.perf_counter()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    changed: Dict[str, None] = {}   # ordered set of touched track ids
+
+    scan: List[Dict[str, Any]] = []
+    scan_index: List[int] = []
+    malformed = 0
+    for i, obs in enumerate(items):
+        if not _has_required_fields(obs):
+            results[i] = {"index": i, "ok": False, "error": "Observation missing required fields"}
+            malformed += 1
+            continue
+        # Plots for a track handed over since the sender routed them
+        object_id = obs.get("object_id")
+        if object_id and object_id in MOVED and object_id not in OBJECT_TO_TRACK:
+            results[i] = {"index": i, "ok": False, "error": "Track moved to another shard", "moved_to": MOVED[object_id]}
+            continue
+        try:
+            scan.append(_observed(obs))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            results[i] = {"index": i, "ok": False, "error": f"Malformed observation: {e}"}
+            malformed += 1
+            continue
+        scan_index.append(i)
+
+    if association == "gnn":
+        correlated = _correlate_scans(scan)
+    else:
+        correlated = []
+        if scan:
+            # Reach to the batch's latest plot, from where each track is now:
+            # a track filtered on the way stays inside it
+            with TRACKS.lock:
+                wide = _wide_tracks(max(p["t"] for p in scan), min(p["confidence"] for p in scan))
+        for p in scan:
+            with TRACKS.lock:
+                correlated.append(_apply(p, *_associate(p, wide=wide)))
+
+    _persist()
+
+    for i, r in zip(scan_index, correlated):
+        changed[r["track_id"]] = None
+        results[i] = {"index": i, "ok": True, **r}
+    _CORRELATION.observe(time.perf_counter() - t1)
+    _OBSERVATIONS.inc(len(correlated))
+    if malformed:
+        _MALFORMED.inc(malformed)
+
+    # one forward per scan
+    if changed:
+        _forward([TRACKS[tid] for tid in changed if tid in TRACKS], authorization)
+
+    return {
+        "ok": True,
+        "count": len(items),
+        "accepted": len(correlated),
+        "tracks_changed": len(changed),
+        "results": results,
+    }
+
+
+def _consume_observations(msg: Dict[str, Any]) -> None:
+    """One queued scan from sensor-ingest (PIPELINE_TRANSPORT=bus)."""
+    authorization = msg.get("authorization")
+    items = msg.get("items") or []
+    try:
+        _require_auth(authorization)
+    except HTTPException:
+        # Not retried: the token will not get any better
+        _UNAUTHORIZED.inc(len(items))
+        return
+    if SHARDS is None:
+        _ingest_local(items, authorization, ASSOCIATION_MODE)
+        return
+    t0 = time.perf_counter()
+    out = _route_batch(items, authorization, ASSOCIATION_MODE)
+    _ROUTE.observe(time.perf_counter() - t0)
+    failed = [r["index"] for r in out["results"] if r.get("unavailable")]
+    if not failed:
+        return
+    if len(failed) == len(items):
+        # Nothing was correlated: redelivered with backoff as it is
+        raise RuntimeError("fusion shard unavailable")
+    # Correlation is not idempotent, so only the unavailable shards' plots
+    # go round again, as a new message. If that cannot be queued the whole
+    # scan is redelivered (and the other shards see their part twice).
+    BUS.publish(OBSERVATIONS, [{"items": [items[i] for i in failed], "authorization": authorization}])
+    _REQUEUED.inc(len(failed))
+
+
+CONSUMER = Consumer(BUS, OBSERVATIONS, _consume_observations) if BUS is not None else None
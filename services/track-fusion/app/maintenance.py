@@ -0,0 +1,143 @@
+from typing import Callable, Dict, List, Optional
+import time
+
+import numpy as np
+
+from .records import Track
+from .store import TrackStore
+
+
+class MaintenanceConfig:
+    """
+    Track aging knobs (seconds unless noted).
+
+    coast_after_s     Kalman-predict a track forward once it has been
+                      silent this long
+    stale_after_s     start decaying track_confidence after this
+    decay_per_s       confidence lost per second of staleness
+    ttl_s             drop a track this long after its last observation
+    max_tracks        hard cap; least recently updated tracks go first
+    """
+
+    def __init__(
+        self,
+        coast_after_s: float = 2.0,
+        stale_after_s: float = 10.0,
+        decay_per_s: float = 0.01,
+        ttl_s: float = 300.0,
+        max_tracks: int = 50000,
+    ):
+        self.coast_after_s = coast_after_s
+        self.stale_after_s = stale_after_s
+        self.decay_per_s = decay_per_s
+        self.ttl_s = ttl_s
+        self.max_tracks = max_tracks
+
+
+def _drop(store: TrackStore, object_map: Dict[str, str], track_id: str) -> Optional[Track]:
+    track = store.remove(track_id)
+    if track is None:
+        return None
+    object_id = track.object_id
+    if object_id and object_map.get(object_id) == track_id:
+        del object_map[object_id]
+    return track
+
+
+def enforce_cap(
+    store: TrackStore,
+    object_map: Dict[str, str],
+    max_tracks: int,
+    on_drop: Optional[Callable[[Track, str], None]] = None,
+) -> int:
+    """Evict least recently updated tracks until at most max_tracks remain."""
+    excess = len(store) - max_tracks
+    if excess <= 0:
+        return 0
+    dropped = 0
+    with store.lock:
+        for track_id, _ in store.oldest(excess):
+            track = _drop(store, object_map, track_id)
+            if track is not None:
+                dropped += 1
+                if on_drop:
+                    on_drop(track, "CAPACITY")
+    return dropped
+
+
+def run_maintenance(
+    store: TrackStore,
+    object_map: Dict[str, str],
+    cfg: MaintenanceConfig,
+    now: Optional[float] = None,
+    on_drop: Optional[Callable[[Track, str], None]] = None,
+) -> Dict[str, int]:
+    """
+    One aging pass: expire, cap, then coast and decay what is left.
+    Returns counts for this pass.
+    """
+    now = time.time() if now is None else now
+    expired = 0
+
+    with store.lock:
+        # 1) TTL: walk oldest-first and stop at the first track still alive
+        while True:
+            batch = store.oldest(256)
+            if not batch:
+                break
+            alive = False
+            for track_id, updated in batch:
+                if now - updated < cfg.ttl_s:
+                    alive = True
+                    break
+                track = _drop(store, object_map, track_id)
+                if track is not None:
+                    expired += 1
+                    if on_drop:
+                        on_drop(track, "TTL")
+            if alive:
+                break
+
+        # 2) hard memory cap
+        capped = enforce_cap(store, object_map, cfg.max_tracks, on_drop)
+
+        # 3) coast + confidence decay for silent tracks
+        silent_ids: List[str] = []
+        for track_id in store.iter_ids():
+            if now - store.updated_at(track_id) < cfg.coast_after_s:
+                continue
+            # dt is time since the state was last advanced, i.e. one pass interval
+            if now - store.state_at(track_id) <= 0 or track_id not in store.kf:
+                continue
+            silent_ids.append(track_id)
+
+        coasted = 0
+        decayed = 0
+        if silent_ids:
+            # One vectorized Kalman predict for every coasting track. Filters
+            # run on plot (feed) time, so each advances by the wall time
+            # since its state was last advanced, not to the wall clock.
+            slots = store.kf.slots(silent_ids)
+            _, state_at = store.times(silent_ids)
+            store.kf.predict(slots, store.kf.t[slots] + (now - np.array(state_at)))
+            kin = store.kf.kinematics_many(slots).tolist()
+
+            for track_id, k in zip(silent_ids, kin):
+                track = store[track_id]
+                dt = now - track.state_at
+                track.set_kinematics(k)
+                if k[3] or k[4]:
+                    coasted += 1
+                store.move(track_id, k[0], k[1], state_ts=now)
+
+                if now - track.updated_at >= cfg.stale_after_s:
+                    track.confidence = max(0.0, track.confidence - cfg.decay_per_s * dt)
+                    decayed += 1
+
+    return {
+        "expired": expired,
+        "capped": capped,
+        "coasted": coasted,
+        "decayed": decayed,
+        "live": len(store),
+    }
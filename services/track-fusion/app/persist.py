@@ -0,0 +1,190 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from iamd_common.codec import dumps, loads
+from iamd_common.snapshot import Snapshot
+from .records import Track
+from .store import TrackStore
+
+# One float64 row per track: Kalman x (6), P (36), t, anchor (3), then the
+# store's updated_at and state_at. Same layout in snapshots and the WAL.
+ROW = 48
+_ROW_BYTES = ROW * 8
+_X, _P, _T, _ANCHOR, _UPDATED, _STATE = slice(0, 6), slice(6, 42), 42, slice(43, 46), 46, 47
+
+# WAL record kinds: U + row + track_id + "\n" + track JSON, D + track_id
+UPSERT = b"U"
+DELETE = b"D"
+
+
+def _rows(store: TrackStore, track_ids: List[str]) -> np.ndarray:
+    kf = store.kf
+    slots = kf.slots(track_ids)
+    n = len(track_ids)
+    out = np.empty((n, ROW))
+    out[:, _X] = kf.x[slots]
+    out[:, _P] = kf.P[slots].reshape(n, 36)
+    out[:, _T] = kf.t[slots]
+    out[:, _ANCHOR] = kf.anchor[slots]
+    out[:, _UPDATED], out[:, _STATE] = store.times(track_ids)
+    return out
+
+
+def encode_changes(store: TrackStore, track_ids: Iterable[str]) -> List[bytes]:
+    """WAL records for tracks that changed: full state if live, else a delete. Hold store.lock."""
+    live: List[str] = []
+    out: List[bytes] = []
+    for tid in track_ids:
+        if tid in store:
+            live.append(tid)
+        else:
+            out.append(DELETE + tid.encode())
+    if live:
+        for tid, row in zip(live, _rows(store, live)):
+            out.append(UPSERT + row.tobytes() + tid.encode() + b"\n" + dumps(store[tid].to_doc()))
+    return out
+
+
+def capture(store: TrackStore) -> Tuple[List[str], np.ndarray, List[Track]]:
+    """Filter state copied, records by reference (runs under store.lock)."""
+    ids = list(store.iter_ids())
+    return ids, _rows(store, ids), [store[tid] for tid in ids]
+
+
+def build(captured: Tuple[List[str], np.ndarray, List[Track]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Snapshot sections from capture(); serializes outside the store lock."""
+    ids, rows, tracks = captured
+    # Records may have moved on since capture; those changes are in the
+    # new WAL and win on replay
+    return {"tracks": len(ids), "row": ROW}, {
+        "rows": np.ascontiguousarray(rows),
+        "ids": "\n".join(ids).encode(),
+        "docs": b"\n".join(dumps(t.to_doc()) for t in tracks),
+    }
+
+
+def restore(
+    store: TrackStore,
+    object_map: Dict[str, str],
+    snapshot: Optional[Snapshot],
+    records: Iterable[bytes],
+) -> int:
+    """
+    Rebuild the store from a snapshot plus WAL records (replaces its
+    contents). The object_id map is derived from the restored tracks.
+    Returns the number of live tracks.
+    """
+    latest: Dict[str, Tuple[bytes, np.ndarray]] = {}
+    if snapshot is not None and snapshot.meta.get("tracks"):
+        rows = snapshot.array("rows")
+        ids = bytes(snapshot.raw("ids")).decode().split("\n")
+        docs = bytes(snapshot.raw("docs")).split(b"\n")
+        for i, (tid, doc) in enumerate(zip(ids, docs)):
+            latest[tid] = (doc, rows[i])
+
+    for rec in records:
+        kind = rec[:1]
+        if kind == UPSERT:
+            row = np.frombuffer(rec, dtype=np.float64, count=ROW, offset=1)
+            tid, doc = rec[1 + _ROW_BYTES:].split(b"\n", 1)
+            latest[tid.decode()] = (doc, row)
+        elif kind == DELETE:
+            latest.pop(rec[1:].decode(), None)
+
+    with store.lock:
+        store.clear()
+        object_map.clear()
+        if not latest:
+            return 0
+
+        ids = list(latest)
+        table = np.empty((len(ids), ROW))
+        for i, tid in enumerate(ids):
+            table[i] = latest[tid][1]
+        # Oldest first, so the update-time log comes back in order
+        order = np.argsort(table[:, _UPDATED], kind="stable")
+        table = table[order]
+        ids = [ids[i] for i in order]
+
+        for tid, updated, state_at in zip(ids, table[:, _UPDATED].tolist(), table[:, _STATE].tolist()):
+            track = Track.from_doc(loads(latest[tid][0]), updated, state_at)
+            store.restore(track)
+            object_id = track.object_id
+            if object_id:
+                object_map[object_id] = tid
+        store.kf.load(ids, table[:, _X], table[:, _P].reshape(-1, 6, 6), table[:, _T], table[:, _ANCHOR])
+        return len(ids)
+
+
+def export(store: TrackStore, track_ids: List[str]) -> List[Dict[str, Any]]:
+    """Tracks with their filter rows, to hand over to another shard. Hold store.lock."""
+    rows = _rows(store, track_ids).tolist()
+    return [{"track": store[tid].to_doc(), "kf": row} for tid, row in zip(track_ids, rows)]
+
+
+def adopt(
+    store: TrackStore,
+    object_map: Dict[str, str],
+    entries: List[Dict[str, Any]],
+    gate_km: float = 0.0,
+    gate_chi2: float = 0.0,
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Insert tracks exported by another shard (or taken back after a failed
+    handover). Idempotent by track_id: a copy already held here that is at
+    least as fresh is kept (a re-sent handover, or one that timed out after
+    the peer adopted it).
+
+    A local track started from plots that arrived mid-handover is replaced:
+    the one holding the same object_id, or, for an anonymous track and
+    gate_km > 0, the best anonymous local track within gate_chi2 of it.
+
+    Returns (adopted ids, replaced ids, kept ids).
+    """
+    ids: List[str] = []
+    rows: List[List[float]] = []
+    replaced: List[str] = []
+    kept: List[str] = []
+    with store.lock:
+        for entry in entries:
+            row = entry["kf"]
+            track = Track.from_doc(entry["track"], row[_UPDATED], row[_STATE])
+            tid = track.track_id
+            if tid in store and store.updated_at(tid) >= row[_UPDATED]:
+                kept.append(tid)
+                continue
+            object_id = track.object_id
+            if object_id:
+                dup = object_map.get(object_id)
+            elif gate_km > 0 and tid not in store:
+                dup = _gated_duplicate(store, track, row[_T], gate_km, gate_chi2, set(ids))
+            else:
+                dup = None
+            if dup and dup != tid and store.remove(dup) is not None:
+                replaced.append(dup)
+            store.restore(track)
+            if object_id:
+                object_map[object_id] = tid
+            ids.append(tid)
+            rows.append(row)
+        if ids:
+            table = np.array(rows, dtype=np.float64).reshape(len(ids), ROW)
+            store.kf.load(ids, table[:, _X], table[:, _P].reshape(-1, 6, 6), table[:, _T], table[:, _ANCHOR])
+    return ids, replaced, kept
+
+
+def _gated_duplicate(
+    store: TrackStore, track: Track, t: float, gate_km: float, gate_chi2: float, exclude: Set[str]
+) -> Optional[str]:
+    # The incoming estimate gated like a plot against nearby anonymous tracks
+    cands = [
+        tid for tid in store.index.candidates(track.lat, track.lon, gate_km)
+        if tid not in exclude and not store[tid].object_id
+    ]
+    if not cands:
+        return None
+    k = (track.lat, track.lon, track.alt_m, track.vx, track.vy, track.vz)
+    dists = store.kf.gate(cands, k, track.confidence, t)
+    best = int(dists.argmin())
+    return cands[best] if dists[best] < gate_chi2 else None
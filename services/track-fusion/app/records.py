@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+import sys
+
+# Source lists repeat across tracks (a handful of sensors); share one tuple each
+_SOURCES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def intern(s: Optional[str]) -> Optional[str]:
+    return sys.intern(s) if s else s
+
+
+def sources(ids: Iterable[str]) -> Tuple[str, ...]:
+    key = tuple(sys.intern(str(s)) for s in ids)
+    return _SOURCES.setdefault(key, key)
+
+
+class Track:
+    """
+    One live track, compact: slotted, kinematics as plain floats, update
+    and state times as epochs, sensor / label / contact strings interned
+    and source lists shared. The JSON document the API, WAL, bus and
+    threat-scoring see is built by to_doc() only at those edges.
+    """
+
+    __slots__ = (
+        "track_id", "object_id",
+        "lat", "lon", "alt_m", "vx", "vy", "vz",
+        "sources", "history_len", "confidence", "label", "contact_type",
+        "updated_at", "state_at",
+    )
+
+    def __init__(
+        self,
+        track_id: str,
+        object_id: Optional[str],
+        k: Sequence[float],
+        sources: Tuple[str, ...],
+        confidence: float,
+        label: str,
+        contact_type: str,
+        history_len: int = 1,
+        updated_at: float = 0.0,
+        state_at: float = 0.0,
+    ):
+        self.track_id = track_id
+        self.object_id = object_id
+        self.set_kinematics(k)
+        self.sources = sources
+        self.history_len = history_len
+        self.confidence = confidence
+        self.label = intern(label)
+        self.contact_type = intern(contact_type)
+        self.updated_at = updated_at
+        self.state_at = state_at
+
+    def set_kinematics(self, k: Sequence[float]) -> None:
+        """(lat, lon, alt, vx, vy, vz) estimate."""
+        self.lat, self.lon, self.alt_m, self.vx, self.vy, self.vz = (float(v) for v in k)
+
+    def add_source(self, sensor_id: str) -> None:
+        if sensor_id not in self.sources:
+            self.sources = sources(self.sources + (sensor_id,))
+
+    def to_doc(self) -> Dict[str, Any]:
+        return {
+            "track_id": self.track_id,
+            "object_id": self.object_id,
+            "last_update_utc": iso(self.updated_at),
+            "state": {"lat": self.lat, "lon": self.lon, "alt_m": self.alt_m},
+            "velocity": {"vx_mps": self.vx, "vy_mps": self.vy, "vz_mps": self.vz},
+            "sources": list(self.sources),
+            "history_len": self.history_len,
+            "track_confidence": self.confidence,
+            "label": self.label,
+            "contact_type": self.contact_type,
+        }
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any], updated_at: float = 0.0, state_at: float = 0.0) -> "Track":
+        st = doc.get("state") or {}
+        vel = doc.get("velocity") or {}
+        track_id = doc["track_id"]
+        return cls(
+            track_id,
+            doc.get("object_id"),
+            (
+                float(st.get("lat", 0.0)), float(st.get("lon", 0.0)), float(st.get("alt_m") or 0.0),
+                float(vel.get("vx_mps", 0.0)), float(vel.get("vy_mps", 0.0)), float(vel.get("vz_mps", 0.0)),
+            ),
+            sources(doc.get("sources") or ()),
+            float(doc.get("track_confidence", 0.5)),
+            doc.get("label") or (doc.get("object_id") or track_id),
+            doc.get("contact_type") or "UNKNOWN",
+            int(doc.get("history_len", 0)),
+            updated_at,
+            state_at,
+        )
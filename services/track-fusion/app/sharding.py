@@ -0,0 +1,123 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+# 1 deg latitude ~ 111 km (same scale as the correlation distance)
+KM_PER_DEG = 111.0
+
+# Knuth multiplicative hash; high bits spread neighbouring cells over shards
+_MIX = 2654435761
+
+
+class ShardMap:
+    """
+    Geographic partition of the picture over `count` fusion shards.
+
+    Cells are the geohash grid at `precision` characters (4 ~ 39 x 20 km
+    at the equator): 5 * precision bits split between longitude and
+    latitude. Cell c belongs to shard hash(c) % count, so every process
+    computes the same owner without coordination, and a different count
+    reassigns cells deterministically (tracks then move by handover).
+
+    A track is handed to its cell's owner only once it is margin_km clear
+    of every cell its current shard owns, so tracks jittering along a
+    boundary do not bounce between shards; routing offers plots in that
+    band to the neighbouring shards first (neighbours). Everything is
+    vectorized over arrays of positions.
+    """
+
+    def __init__(self, count: int, index: int, precision: int = 4, margin_km: float = 3.0):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"shard index {index} out of range for {count} shards")
+        self.count = count
+        self.index = index
+        self.precision = precision
+        self.margin_km = margin_km
+
+        bits = 5 * precision
+        self._lat_n = 1 << (bits // 2)
+        self._lon_n = 1 << ((bits + 1) // 2)
+        self.cell_h_deg = 180.0 / self._lat_n
+        self.cell_w_deg = 360.0 / self._lon_n
+
+    def _grid(self, lat: np.ndarray, lon: np.ndarray):
+        qlat = (lat + 90.0) / self.cell_h_deg
+        qlon = (lon + 180.0) / self.cell_w_deg
+        ilat = np.clip(np.floor(qlat), 0, self._lat_n - 1).astype(np.int64)
+        ilon = (np.floor(qlon).astype(np.int64)) % self._lon_n
+        return qlat, qlon, ilon * self._lat_n + ilat
+
+    def _owner_of(self, cell: np.ndarray) -> np.ndarray:
+        return (((cell * _MIX) & 0xFFFFFFFF) >> 16) % self.count
+
+    def owners(self, lat: Sequence[float], lon: Sequence[float]) -> np.ndarray:
+        """Owning shard per position."""
+        if self.count == 1:
+            return np.zeros(len(lat), dtype=np.int64)
+        _, _, cell = self._grid(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+        return self._owner_of(cell)
+
+    def owner(self, lat: float, lon: float) -> int:
+        return int(self.owners([lat], [lon])[0])
+
+    def _around(self, lat: np.ndarray, lon: np.ndarray, km: float):
+        """
+        Owner of each position's cell, and the owners of the 8 cells around
+        it that lie within km of the position (-1 for the others): (n, 8).
+        """
+        qlat, qlon, cell = self._grid(lat, lon)
+        ilat, ilon = cell % self._lat_n, cell // self._lat_n
+        flat = qlat - np.floor(qlat)
+        flon = qlon - np.floor(qlon)
+        h_km = self.cell_h_deg * KM_PER_DEG
+        w_km = self.cell_w_deg * KM_PER_DEG * np.maximum(1e-6, np.cos(np.radians(lat)))
+        near_s, near_n = flat * h_km < km, (1.0 - flat) * h_km < km
+        near_w, near_e = flon * w_km < km, (1.0 - flon) * w_km < km
+
+        out = np.full((len(lat), 8), -1, dtype=np.int64)
+        col = 0
+        for dlat, lat_ok in ((-1, near_s), (0, None), (1, near_n)):
+            for dlon, lon_ok in ((-1, near_w), (0, None), (1, near_e)):
+                if not dlat and not dlon:
+                    continue
+                ok = (ilat + dlat >= 0) & (ilat + dlat < self._lat_n)
+                if lat_ok is not None:
+                    ok &= lat_ok
+                if lon_ok is not None:
+                    ok &= lon_ok
+                nlat = np.clip(ilat + dlat, 0, self._lat_n - 1)
+                nlon = (ilon + dlon) % self._lon_n
+                out[:, col] = np.where(ok, self._owner_of(nlon * self._lat_n + nlat), -1)
+                col += 1
+        return self._owner_of(cell), out
+
+    def handover_targets(self, lat: Sequence[float], lon: Sequence[float]) -> np.ndarray:
+        """Shard each track should move to, or -1 to keep it here."""
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        if self.count == 1:
+            return np.full(len(lat), -1, dtype=np.int64)
+        owner, around = self._around(lat, lon, self.margin_km)
+        near_here = (around == self.index).any(axis=1)
+        return np.where((owner != self.index) & ~near_here, owner, -1)
+
+    def neighbours(self, lat: Sequence[float], lon: Sequence[float]) -> np.ndarray:
+        """
+        Other shards owning a cell within 2 * margin_km of each position,
+        -1 elsewhere; shape (n, 8). A track stays on its shard until it is
+        margin_km clear of that shard's cells (and keeps moving until the
+        next handover pass), so in that band a plot's track may still live
+        on one of these shards.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        if self.count == 1:
+            return np.full((len(lat), 8), -1, dtype=np.int64)
+        owner, around = self._around(lat, lon, 2.0 * self.margin_km)
+        return np.where(around != owner[:, None], around, -1)
+
+
+def shard_index_from_hostname(hostname: str) -> Optional[int]:
+    """StatefulSet ordinal: "track-fusion-2" -> 2."""
+    tail = hostname.rsplit("-", 1)[-1]
+    return int(tail) if tail.isdigit() else None
@@ -0,0 +1,114 @@
+from typing import Dict, Iterator, Set, Tuple
+import math
+
+# Flat-earth scale (km per degree), as in the Kalman local frame.
+KM_PER_DEG = 111.0
+
+Cell = Tuple[int, int]
+
+
+class GridIndex:
+    """
+    Uniform lat/lon bucket grid over track positions.
+
+    Cells are square in degrees (cell_km / 111). A radius query covers
+    r / 111 degrees of latitude and r / (111 cos(lat)) of longitude, so
+    tracks within r km are found at any latitude. Correlation then only
+    touches neighbouring buckets instead of every live track.
+
+    Each track also keeps an insertion sequence number so callers can
+    reproduce "first match in TRACKS order" semantics from a candidate set.
+    """
+
+    def __init__(self, cell_km: float = 2.0):
+        if cell_km <= 0:
+            raise ValueError("cell_km must be positive")
+        self.cell_km = cell_km
+        self._cell_deg = cell_km / KM_PER_DEG
+        self._buckets: Dict[Cell, Set[str]] = {}
+        self._cells: Dict[str, Cell] = {}
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._cells
+
+    def cell_of(self, lat: float, lon: float) -> Cell:
+        return (math.floor(lat / self._cell_deg), math.floor(lon / self._cell_deg))
+
+    def seq(self, track_id: str) -> int:
+        return self._seq[track_id]
+
+    def upsert(self, track_id: str, lat: float, lon: float) -> None:
+        cell = self.cell_of(lat, lon)
+        old = self._cells.get(track_id)
+        if old == cell:
+            return
+        if old is not None:
+            self._discard(track_id, old)
+        else:
+            self._seq[track_id] = self._next_seq
+            self._next_seq += 1
+        self._cells[track_id] = cell
+        self._buckets.setdefault(cell, set()).add(track_id)
+
+    def remove(self, track_id: str) -> None:
+        cell = self._cells.pop(track_id, None)
+        if cell is None:
+            return
+        self._seq.pop(track_id, None)
+        self._discard(track_id, cell)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._cells.clear()
+        self._seq.clear()
+        self._next_seq = 0
+
+    def candidates(self, lat: float, lon: float, radius_km: float) -> Iterator[str]:
+        """
+        Yield track ids in every cell that may hold a track within radius_km
+        (flat-earth, longitude scaled by cos(lat) as in the Kalman frame).
+        Superset only: callers still apply the exact distance check.
+        """
+        reach_deg = radius_km / KM_PER_DEG
+        # A degree of longitude is shortest at the ring's most poleward latitude
+        c = math.cos(math.radians(min(90.0, abs(lat) + reach_deg)))
+        dlon = 180.0 if c <= reach_deg / 180.0 else reach_deg / c
+        yield from self._walk(lat - reach_deg, lon - dlon, lat + reach_deg, lon + dlon)
+
+    def in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> Iterator[str]:
+        """
+        Yield track ids in every cell overlapping the box (superset; callers
+        filter exactly).
+        """
+        yield from self._walk(min_lat, min_lon, max_lat, max_lon)
+
+    def _walk(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> Iterator[str]:
+        # Walks whichever is smaller: the covered cells or the occupied buckets
+        i0, j0 = self.cell_of(min_lat, min_lon)
+        i1, j1 = self.cell_of(max_lat, max_lon)
+        n_cells = (i1 - i0 + 1) * (j1 - j0 + 1)
+        if n_cells <= 0:
+            return
+        if n_cells <= len(self._buckets):
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    bucket = self._buckets.get((i, j))
+                    if bucket:
+                        yield from bucket
+        else:
+            for (i, j), bucket in self._buckets.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    yield from bucket
+
+    def _discard(self, track_id: str, cell: Cell) -> None:
+        bucket = self._buckets.get(cell)
+        if bucket is None:
+            return
+        bucket.discard(track_id)
+        if not bucket:
+            del self._buckets[cell]
@@ -0,0 +1,220 @@
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+import threading
+import time
+
+from .kalman import KalmanBank
+from .records import Track
+from .spatial import GridIndex
+
+
+class TrackStore:
+    """
+    Live tracks keyed by track_id, with a spatial index and an update-time index.
+
+    - Spatial: GridIndex over current positions (correlation, bbox queries).
+    - Kinematics: a KalmanBank holding every track's filter state; slots
+      are freed with the track. Callers init/update filters themselves.
+    - Time: an append-only log of (seq, track_id) touches. seq increases
+      with every update and each track remembers its latest seq, so the
+      log is already sorted newest-last; superseded entries are skipped on
+      read and compacted away once they outnumber live ones. Update and
+      state times are epoch floats on the Track records themselves.
+
+    Values are compact Track records (records.py); convert with to_doc()
+    at the API edge. The store is dict-like for reads (tracks[tid], tid in
+    tracks, len).
+    Writers hold `lock` across a read-modify-write so correlation of
+    concurrent requests cannot create duplicate tracks.
+    """
+
+    def __init__(self, cell_km: float = 2.0, kf: Optional[KalmanBank] = None):
+        self.lock = threading.RLock()
+        self.index = GridIndex(cell_km=cell_km)
+        self.kf = kf if kf is not None else KalmanBank()
+        self._tracks: Dict[str, Track] = {}
+        self._seq: Dict[str, int] = {}
+        self._log_seq: List[int] = []
+        self._log_tid: List[str] = []
+        self._next_seq = 1
+        self._last_ts = 0.0
+
+    # -- dict-like reads ---------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._tracks
+
+    def __getitem__(self, track_id: str) -> Track:
+        return self._tracks[track_id]
+
+    def get(self, track_id: str) -> Optional[Track]:
+        return self._tracks.get(track_id)
+
+    def values(self) -> List[Track]:
+        with self.lock:
+            return list(self._tracks.values())
+
+    def items(self) -> List[Tuple[str, Track]]:
+        with self.lock:
+            return list(self._tracks.items())
+
+    def updated_at(self, track_id: str) -> float:
+        return self._tracks[track_id].updated_at
+
+    def state_at(self, track_id: str) -> float:
+        """Time the track's kinematic state is valid for (last observed or coasted)."""
+        return self._tracks[track_id].state_at
+
+    def times(self, track_ids: List[str]) -> Tuple[List[float], List[float]]:
+        """(updated_at, state_at) for many tracks at once."""
+        tracks = [self._tracks[tid] for tid in track_ids]
+        return [t.updated_at for t in tracks], [t.state_at for t in tracks]
+
+    # -- writes ------------------------------------------------------------
+
+    def add(self, track: Track) -> float:
+        """Insert a new track at its position. Returns its update time (epoch)."""
+        with self.lock:
+            track_id = track.track_id
+            self._tracks[track_id] = track
+            self.index.upsert(track_id, track.lat, track.lon)
+            ts = self._touch(track_id)
+            track.state_at = ts
+            return ts
+
+    def restore(self, track: Track) -> None:
+        """Re-insert a persisted track with its original times (oldest first)."""
+        with self.lock:
+            track_id = track.track_id
+            self._tracks[track_id] = track
+            self.index.upsert(track_id, track.lat, track.lon)
+            self._touch(track_id, track.updated_at)
+
+    def move(self, track_id: str, lat: float, lon: float, state_ts: Optional[float] = None) -> None:
+        """Re-index a track whose state moved; state_ts defaults to now."""
+        with self.lock:
+            self.index.upsert(track_id, lat, lon)
+            self._tracks[track_id].state_at = time.time() if state_ts is None else state_ts
+
+    def touch(self, track_id: str) -> float:
+        """Mark a track as updated now. Returns the update time (epoch)."""
+        with self.lock:
+            return self._touch(track_id)
+
+    def remove(self, track_id: str) -> Optional[Track]:
+        with self.lock:
+            track = self._tracks.pop(track_id, None)
+            if track is None:
+                return None
+            self.index.remove(track_id)
+            self.kf.remove(track_id)
+            self._seq.pop(track_id, None)
+            self._maybe_compact()
+            return track
+
+    def clear(self) -> None:
+        with self.lock:
+            self._tracks.clear()
+            self.index.clear()
+            self.kf.clear()
+            self._seq.clear()
+            self._log_seq.clear()
+            self._log_tid.clear()
+
+    # -- queries -----------------------------------------------------------
+
+    def newest(
+        self,
+        limit: int,
+        before_seq: Optional[int] = None,
+        since_ts: Optional[float] = None,
+    ) -> Tuple[List[Track], Optional[int]]:
+        """
+        Newest-first page of tracks.
+
+        before_seq is the cursor from a previous page; since_ts keeps only
+        tracks updated strictly after that epoch. Returns (tracks,
+        next_cursor) where next_cursor is None on the last page.
+        """
+        out: List[Track] = []
+        last_seq: Optional[int] = None
+        with self.lock:
+            pos = len(self._log_seq) if before_seq is None else bisect_left(self._log_seq, before_seq)
+            for i in range(pos - 1, -1, -1):
+                seq = self._log_seq[i]
+                tid = self._log_tid[i]
+                if self._seq.get(tid) != seq:
+                    continue  # superseded by a later update
+                trk = self._tracks[tid]
+                if since_ts is not None and trk.updated_at <= since_ts:
+                    return out, None
+                if len(out) >= limit:
+                    return out, last_seq
+                out.append(trk)
+                last_seq = seq
+        return out, None
+
+    def in_bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        limit: int,
+        since_ts: Optional[float] = None,
+    ) -> List[Track]:
+        """Newest-first tracks whose current position lies inside the box."""
+        hits: List[Tuple[int, Track]] = []
+        with self.lock:
+            for tid in self.index.in_bbox(min_lat, min_lon, max_lat, max_lon):
+                trk = self._tracks[tid]
+                if not (min_lat <= trk.lat <= max_lat and min_lon <= trk.lon <= max_lon):
+                    continue
+                if since_ts is not None and trk.updated_at <= since_ts:
+                    continue
+                hits.append((self._seq[tid], trk))
+        hits.sort(key=lambda h: h[0], reverse=True)
+        return [trk for _, trk in hits[:limit]]
+
+    def oldest(self, limit: int) -> List[Tuple[str, float]]:
+        """Up to `limit` (track_id, updated_at) pairs, least recently updated first."""
+        out: List[Tuple[str, float]] = []
+        with self.lock:
+            for seq, tid in zip(self._log_seq, self._log_tid):
+                if self._seq.get(tid) != seq:
+                    continue
+                out.append((tid, self._tracks[tid].updated_at))
+                if len(out) >= limit:
+                    break
+        return out
+
+    def iter_ids(self) -> Iterator[str]:
+        with self.lock:
+            ids = list(self._tracks)
+        return iter(ids)
+
+    # -- internals ---------------------------------------------------------
+
+    def _touch(self, track_id: str, ts: Optional[float] = None) -> float:
+        # Clamp to non-decreasing so log order and time order always agree
+        ts = max(time.time() if ts is None else ts, self._last_ts)
+        self._last_ts = ts
+        seq = self._next_seq
+        self._next_seq += 1
+        self._tracks[track_id].updated_at = ts
+        self._seq[track_id] = seq
+        self._log_seq.append(seq)
+        self._log_tid.append(track_id)
+        self._maybe_compact()
+        return ts
+
+    def _maybe_compact(self) -> None:
+        if len(self._log_seq) <= 2 * len(self._seq) + 64:
+            return
+        # Log is already in seq order: keep only each track's latest entry
+        keep = [i for i, (s, t) in enumerate(zip(self._log_seq, self._log_tid)) if self._seq.get(t) == s]
+        self._log_seq = [self._log_seq[i] for i in keep]
+        self._log_tid = [self._log_tid[i] for i in keep]
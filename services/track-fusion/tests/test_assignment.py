@@ -0,0 +1,54 @@
+"""assignment.assign against brute force on small random cases."""
+import itertools
+
+import numpy as np
+import pytest
+
+MISS = 11.345
+
+
+def _brute_force(rows, cols, cost, n_rows, n_cols, miss_cost):
+    """Minimum total cost over every one-to-one choice (a miss costs miss_cost)."""
+    pairs = {}
+    for r, c, x in zip(rows.tolist(), cols.tolist(), cost.tolist()):
+        if x < miss_cost:
+            pairs[(r, c)] = x
+    best = n_rows * miss_cost
+    for choice in itertools.product(range(-1, n_cols), repeat=n_rows):
+        taken = [c for c in choice if c >= 0]
+        if len(taken) != len(set(taken)):
+            continue
+        if any(c >= 0 and (r, c) not in pairs for r, c in enumerate(choice)):
+            continue
+        total = sum(pairs[(r, c)] if c >= 0 else miss_cost for r, c in enumerate(choice))
+        best = min(best, total)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_assign_matches_brute_force(load_app, seed):
+    assign = load_app("track-fusion", "assignment").assign
+    rng = np.random.default_rng(seed)
+    n_rows = int(rng.integers(1, 6))
+    n_cols = int(rng.integers(1, 6))
+    mask = rng.random((n_rows, n_cols)) < 0.6
+    rows, cols = np.nonzero(mask)
+    cost = rng.random(len(rows)) * MISS * 1.2
+
+    col_of_row, cost_of_row = assign(rows, cols, cost, n_rows, n_cols, MISS)
+
+    # A valid one-to-one choice using only gated pairs
+    chosen = col_of_row[col_of_row >= 0]
+    assert len(chosen) == len(set(chosen.tolist()))
+    pairs = {(r, c): x for r, c, x in zip(rows.tolist(), cols.tolist(), cost.tolist())}
+    total = 0.0
+    for r in range(n_rows):
+        c = int(col_of_row[r])
+        if c < 0:
+            assert cost_of_row[r] == np.inf
+            total += MISS
+        else:
+            assert cost_of_row[r] == pairs[(r, c)] < MISS
+            total += pairs[(r, c)]
+
+    assert total == pytest.approx(_brute_force(rows, cols, cost, n_rows, n_cols, MISS))
@@ -0,0 +1,40 @@
+"""Batch association: scans are split per sensor and ts_utc."""
+from iamd_common.scenario import ScenarioGenerator
+
+CONTACTS = 20
+
+
+def _feed(count: int = 10301, seed: int = 1):
+    gen = ScenarioGenerator(contacts=CONTACTS, duration_s=3600, seed=seed)
+    out = []
+    for obs in gen.observations():
+        out.append(obs)
+        if len(out) >= count:
+            return out
+    return out
+
+
+def _tracks_created(tf, feed, association: str, batch: int = 250) -> int:
+    for i in range(0, len(feed), batch):
+        tf._ingest_local(feed[i:i + batch], None, association)
+    return tf.STATS["tracks_created"]
+
+
+def test_gnn_no_worse_than_sequential(load_app):
+    feed = _feed()
+    gnn = _tracks_created(load_app("track-fusion"), feed, "gnn")
+    sequential = _tracks_created(load_app("track-fusion"), feed, "sequential")
+    assert gnn <= sequential
+    assert gnn <= CONTACTS * 1.1
+
+
+def test_batch_split_into_sensor_scans(load_app):
+    tf = load_app("track-fusion")
+    plots = [
+        {"sensor_id": "A", "t": 2.0},
+        {"sensor_id": "B", "t": 1.0},
+        {"sensor_id": "A", "t": 1.0},
+        {"sensor_id": "A", "t": 2.0},
+        {"sensor_id": "B", "t": 1.0},
+    ]
+    assert tf._scans(plots) == [[2], [1, 4], [0, 3]]
@@ -0,0 +1,75 @@
+"""A scan consumed from the bus is not correlated twice when one shard is down."""
+import pytest
+
+from iamd_common.bus import OBSERVATIONS, InProcessBus
+from iamd_common.scenario import ScenarioGenerator
+
+SHARD_URLS = "http://track-fusion-0:8002,http://track-fusion-1:8002"
+
+
+def _feed(count: int):
+    gen = ScenarioGenerator(contacts=40, duration_s=3600, seed=2)
+    out = []
+    for obs in gen.observations():
+        out.append(obs)
+        if len(out) >= count:
+            break
+    return out
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, body):
+        from iamd_common.codec import dumps
+        self.content = dumps(body)
+
+
+@pytest.fixture
+def shards(load_app, monkeypatch):
+    monkeypatch.setenv("FUSION_SHARDS", SHARD_URLS)
+    monkeypatch.setenv("FUSION_SHARD_INDEX", "0")
+    local = load_app("track-fusion")
+    monkeypatch.setenv("FUSION_SHARD_INDEX", "1")
+    peer = load_app("track-fusion")
+    monkeypatch.setattr(local, "BUS", InProcessBus())
+    return local, peer
+
+
+def test_only_the_unavailable_shards_plots_are_requeued(shards, monkeypatch):
+    from iamd_common.auth import issue_token
+
+    local, peer = shards
+    up = {"peer": False}
+
+    def post(path, params=None, json=None, headers=None, timeout=None):
+        if not up["peer"]:
+            raise ConnectionError("shard 1 down")
+        if path == "/observations:claim":
+            return _Response({"claimed": []})
+        return _Response(peer._ingest_local(json, None, params["association"]))
+
+    monkeypatch.setattr(local.PEERS[1], "post", post)
+    feed = _feed(200)
+    targets = local._route_targets(feed, None)
+    assert 0 < targets.count(1) < len(feed)
+
+    msg = {"items": feed, "authorization": "Bearer " + issue_token("test", "operator")}
+    local._consume_observations(msg)
+    ingested = local.STATS["observations_ingested"]
+    assert ingested == targets.count(0)
+
+    # The requeued message holds just shard 1's plots; while it is down the
+    # message fails as a whole and shard 0 is not touched
+    (requeued,) = local.BUS.consume(OBSERVATIONS, 10, 0)
+    expected = [obs["observation_id"] for obs, k in zip(feed, targets) if k == 1]
+    assert [obs["observation_id"] for obs in requeued.payload["items"]] == expected
+    with pytest.raises(RuntimeError):
+        local._consume_observations(requeued.payload)
+    assert local.STATS["observations_ingested"] == ingested
+
+    up["peer"] = True
+    local._consume_observations(requeued.payload)
+    assert local.STATS["observations_ingested"] == ingested
+    assert peer.STATS["observations_ingested"] == len(expected)
+    assert not local.BUS.consume(OBSERVATIONS, 10, 0)
@@ -0,0 +1,45 @@
+"""The Kalman filters run on the plots' ts_utc, not on arrival time."""
+from iamd_common.scenario import ScenarioGenerator
+
+CONTACTS = 20
+
+
+def _feed(count: int = 3000):
+    gen = ScenarioGenerator(contacts=CONTACTS, duration_s=3600, seed=1)
+    out = []
+    for obs in gen.observations():
+        out.append(obs)
+        if len(out) >= count:
+            return out
+    return out
+
+
+def _ingest(tf, feed, batch: int = 250):
+    for i in range(0, len(feed), batch):
+        tf._ingest_local(feed[i:i + batch], None, "sequential")
+    return tf.STATS["tracks_created"]
+
+
+def test_fast_feed_keeps_one_track_per_contact(load_app):
+    # Minutes of feed time arrive in well under a second of wall time
+    created = _ingest(load_app("track-fusion"), _feed())
+    assert created <= CONTACTS * 1.2
+
+
+def test_feed_time_beats_arrival_time(load_app):
+    feed = _feed()
+    on_feed_time = _ingest(load_app("track-fusion"), feed)
+    untimed = [{k: v for k, v in obs.items() if k != "ts_utc"} for obs in feed]
+    on_arrival_time = _ingest(load_app("track-fusion"), untimed)
+    assert on_feed_time * 3 < on_arrival_time
+
+
+def test_late_plot_does_not_rewind_filter(load_app):
+    tf = load_app("track-fusion")
+    feed = _feed(200)
+    _ingest(tf, feed)
+    t_before = tf.TRACKS.kf.t.copy()
+    late = dict(feed[50])
+    late["ts_utc"] = "2000-01-01T00:00:00Z"
+    tf._ingest_local([late], None, "sequential")
+    assert (tf.TRACKS.kf.t[: len(t_before)] >= t_before).all()
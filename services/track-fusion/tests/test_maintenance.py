@@ -0,0 +1,82 @@
+"""Aging pass: TTL expiry, the hard cap, coasting and confidence decay."""
+import math
+
+import pytest
+
+NOW = 10_000.0
+CFG = dict(coast_after_s=2.0, stale_after_s=10.0, decay_per_s=0.01, ttl_s=300.0)
+
+
+@pytest.fixture
+def aging(load_app):
+    maint = load_app("track-fusion", "maintenance")
+    records = load_app("track-fusion", "records")
+    store = load_app("track-fusion", "store").TrackStore()
+    object_map = {}
+
+    def add(tid, silent_s, vx=0.0, confidence=0.9):
+        # Restored oldest first, state last advanced when it was observed
+        t = NOW - silent_s
+        k = (50.0, 10.0, 1000.0, vx, 0.0, 0.0)
+        store.restore(records.Track(tid, "obj-" + tid, k, ("R1",), confidence, tid, "AIR", updated_at=t, state_at=t))
+        store.kf.init(tid, k, t)
+        object_map["obj-" + tid] = tid
+
+    def run(now=NOW, **kw):
+        dropped = []
+        counts = maint.run_maintenance(
+            store, object_map, maint.MaintenanceConfig(**{**CFG, **kw}), now=now,
+            on_drop=lambda track, reason: dropped.append((track.track_id, reason)),
+        )
+        return counts, dropped
+
+    return store, object_map, add, run
+
+
+def test_expire_coast_and_decay(aging):
+    store, object_map, add, run = aging
+    add("expired", 400.0)
+    add("stale", 30.0)
+    add("coasting", 5.0, vx=100.0)
+    add("fresh", 0.5, vx=100.0)
+
+    counts, dropped = run()
+    assert dropped == [("expired", "TTL")]
+    assert "expired" not in store and "obj-expired" not in object_map
+    assert counts == {"expired": 1, "capped": 0, "coasted": 1, "decayed": 1, "live": 3}
+
+    # 5 s at 100 m/s east, on the Kalman's local scale
+    moved_m = (store["coasting"].lon - 10.0) * 111_000.0 * math.cos(math.radians(50.0))
+    assert moved_m == pytest.approx(500.0, rel=1e-3)
+    assert store["stale"].confidence == pytest.approx(0.9 - 0.01 * 30.0)
+    assert store["fresh"].lon == 10.0 and store["fresh"].confidence == 0.9
+
+    # Coasting does not count as an update: the track still expires on time
+    assert store.updated_at("coasting") == NOW - 5.0
+
+    # A second pass at the same instant has nothing left to advance
+    lon = store["coasting"].lon
+    counts, _ = run()
+    assert counts["coasted"] == 0 and store["coasting"].lon == lon
+
+    # ... and one a second later decays by that second only
+    run(now=NOW + 1.0)
+    assert store["stale"].confidence == pytest.approx(0.9 - 0.01 * 31.0)
+
+
+def test_cap_drops_least_recently_updated(aging):
+    store, object_map, add, run = aging
+    for i, silent in enumerate([50.0, 40.0, 30.0, 20.0, 1.0]):
+        add(f"T-{i}", silent)
+    counts, dropped = run(max_tracks=3)
+    assert dropped == [("T-0", "CAPACITY"), ("T-1", "CAPACITY")]
+    assert counts["capped"] == 2 and sorted(store.iter_ids()) == ["T-2", "T-3", "T-4"]
+    assert sorted(object_map) == ["obj-T-2", "obj-T-3", "obj-T-4"]
+    assert sorted(store.kf.track_ids()) == ["T-2", "T-3", "T-4"]
+
+
+def test_confidence_never_goes_negative(aging):
+    store, _, add, run = aging
+    add("T-1", 200.0, confidence=0.5)
+    run(decay_per_s=1.0)
+    assert store["T-1"].confidence == 0.0
@@ -0,0 +1,90 @@
+"""Snapshot + WAL restore rebuilds the same track picture."""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from iamd_common import snapshot
+from iamd_common.scenario import ScenarioGenerator
+
+
+def _feed(count: int):
+    gen = ScenarioGenerator(contacts=30, duration_s=3600, seed=3)
+    out = []
+    for obs in gen.observations():
+        out.append(obs)
+        if len(out) >= count:
+            break
+    return out
+
+
+def _picture(tf):
+    ids = sorted(tf.TRACKS.iter_ids())
+    docs = {tid: tf.TRACKS[tid].to_doc() for tid in ids}
+    return ids, docs, tf.persist._rows(tf.TRACKS, ids)
+
+
+@pytest.mark.parametrize("checkpoint_at", [None, 0, 400, 800])
+def test_restore_matches_live_state(load_app, monkeypatch, tmp_path, checkpoint_at):
+    monkeypatch.setattr(snapshot, "STATE_DIR", str(tmp_path))
+    tf = load_app("track-fusion")
+    tf.restore_state()
+    feed = _feed(800)
+
+    for i in range(0, len(feed), 100):
+        if i == checkpoint_at:
+            tf.JOURNAL.checkpoint(tf.TRACKS.lock, lambda: tf.persist.capture(tf.TRACKS), tf.persist.build)
+        tf._ingest_local(feed[i:i + 100], None, "gnn")
+        if i == 300:
+            # Dropped tracks are logged as deletes
+            for tid in sorted(tf.TRACKS.iter_ids())[:3]:
+                tf._on_track_dropped(tf.TRACKS.remove(tid), "expired")
+            tf._persist()
+    if checkpoint_at == len(feed):
+        tf.JOURNAL.checkpoint(tf.TRACKS.lock, lambda: tf.persist.capture(tf.TRACKS), tf.persist.build)
+    tf.JOURNAL.close(checkpoint=False)
+    ids, docs, rows = _picture(tf)
+    assert len(ids) > 10
+
+    restored = load_app("track-fusion")
+    assert restored.restore_state() == len(ids)
+    from_snapshot = restored.JOURNAL.stats["restored_from_generation"] is not None
+    assert from_snapshot == (checkpoint_at is not None)
+    r_ids, r_docs, r_rows = _picture(restored)
+    assert r_ids == ids
+    assert r_docs == docs
+    np.testing.assert_array_equal(r_rows, rows)
+    restored.JOURNAL.close(checkpoint=False)
+
+
+def test_reset_during_checkpoint_does_not_deadlock(load_app, monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "STATE_DIR", str(tmp_path))
+    tf = load_app("track-fusion")
+    tf.restore_state()
+    journal = tf.JOURNAL
+
+    def checkpoint():
+        journal.checkpoint(tf.TRACKS.lock, lambda: tf.persist.capture(tf.TRACKS), tf.persist.build)
+
+    for _ in range(20):
+        tf._ingest_local(_feed(100), None, "gnn")
+        # The snapshot thread holds its checkpoint lock and waits for
+        # TRACKS.lock while /reset arrives
+        tf.TRACKS.lock.acquire()
+        snapshotter = threading.Thread(target=checkpoint, daemon=True)
+        snapshotter.start()
+        while not journal._checkpoint_lock.locked():
+            time.sleep(0.001)
+        resetter = threading.Thread(target=tf.reset, kwargs={"scope": "local"}, daemon=True)
+        resetter.start()
+        time.sleep(0.005)
+        tf.TRACKS.lock.release()
+
+        snapshotter.join(timeout=10)
+        resetter.join(timeout=10)
+        assert not snapshotter.is_alive() and not resetter.is_alive(), "checkpoint and reset deadlocked"
+        assert len(tf.TRACKS) == 0
+
+    journal.close(checkpoint=False)
+    assert load_app("track-fusion").restore_state() == 0
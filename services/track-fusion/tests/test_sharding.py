@@ -0,0 +1,95 @@
+"""Sharded track-fusion keeps the single-shard picture (anonymous plots)."""
+import numpy as np
+import pytest
+
+from iamd_common.scenario import ScenarioGenerator
+
+CONTACTS = 20
+BATCH = 20      # ~1 s of feed time per batch, one maintenance pass after each
+
+
+def _feed(count: int = 3000):
+    gen = ScenarioGenerator(contacts=CONTACTS, duration_s=3600, seed=1)
+    out = []
+    for obs in gen.observations():
+        assert "object_id" not in obs
+        out.append(obs)
+        if len(out) >= count:
+            return out
+    return out
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    # InProcessPipeline rewires the environment; restore it afterwards
+    for key in ("STATE_DIR", "AUDIT_DATA_DIR", "PIPELINE_TRANSPORT", "BUS_URL", "AUDIT_URL",
+                "THREAT_URL", "TRACK_FUSION_URL", "RULES_PATH", "JWT_SECRET"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("TRACK_MAINT_INTERVAL_S", "3600")
+    from bench.inproc import InProcessPipeline
+
+    with InProcessPipeline(data_dir=str(tmp_path), fusion_shards=4) as pipe:
+        yield pipe
+
+
+def test_sharded_picture_matches_single_shard(load_app, pipeline):
+    from iamd_common.auth import issue_token
+
+    feed = _feed()
+    single = load_app("track-fusion")
+    for i in range(0, len(feed), BATCH):
+        single._ingest_local(feed[i:i + BATCH], None, "gnn")
+        single.maintenance_pass()
+
+    shards = [pipeline.modules[f"track-fusion-{k}"] for k in range(4)]
+    headers = {"Authorization": "Bearer " + issue_token("test", "operator")}
+    for i in range(0, len(feed), BATCH):
+        r = pipeline.clients["track-fusion"].post("/observations:batch", json=feed[i:i + BATCH], headers=headers)
+        assert r.status_code == 200
+        assert r.json()["accepted"] == len(feed[i:i + BATCH])
+        for shard in shards:
+            shard.maintenance_pass()
+
+    assert sum(s.STATS["tracks_handed_out"] for s in shards) > 0
+    assert sum(len(s.TRACKS) for s in shards) == len(single.TRACKS) == CONTACTS
+
+
+def _entries(tf, obs):
+    track_id = tf._ingest_local([obs], None, "gnn")["results"][0]["track_id"]
+    with tf.TRACKS.lock:
+        return tf.persist.export(tf.TRACKS, [track_id])
+
+
+def test_adopt_is_idempotent_by_track_id(load_app):
+    obs = _feed(1)[0]
+    sender, receiver = load_app("track-fusion"), load_app("track-fusion")
+    entries = _entries(sender, obs)
+    for _ in range(2):
+        adopted, replaced, kept = receiver.persist.adopt(
+            receiver.TRACKS, receiver.OBJECT_TO_TRACK, entries, *receiver._ADOPT_GATE)
+    assert (adopted, replaced, kept) == ([], [], [entries[0]["track"]["track_id"]])
+    assert len(receiver.TRACKS) == 1
+
+
+def test_adopt_replaces_gated_anonymous_duplicate(load_app):
+    obs = _feed(1)[0]
+    sender, receiver = load_app("track-fusion"), load_app("track-fusion")
+    entries = _entries(sender, obs)
+    local = receiver._ingest_local([obs], None, "gnn")["results"][0]["track_id"]
+    adopted, replaced, _ = receiver.persist.adopt(
+        receiver.TRACKS, receiver.OBJECT_TO_TRACK, entries, *receiver._ADOPT_GATE)
+    assert replaced == [local]
+    assert list(receiver.TRACKS.iter_ids()) == adopted
+
+
+def test_handover_and_routing_use_the_same_band(load_app):
+    shards = load_app("track-fusion", "sharding").ShardMap(count=4, index=0)
+    lat, lon = np.meshgrid(np.linspace(29.0, 31.0, 60), np.linspace(-96.5, -94.5, 60))
+    lat, lon = lat.ravel(), lon.ravel()
+    targets = shards.handover_targets(lat, lon)
+    offered = shards.neighbours(lat, lon)
+    # Every position a track is kept at off its own cells is one whose
+    # plots are offered back to this shard by the routers
+    kept_away = (shards.owners(lat, lon) != 0) & (targets < 0)
+    assert kept_away.any()
+    assert (offered[kept_away] == 0).any(axis=1).all()
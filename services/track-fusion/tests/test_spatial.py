@@ -0,0 +1,58 @@
+"""GridIndex against a linear scan over the same positions, at any latitude."""
+import math
+
+import numpy as np
+import pytest
+
+
+def _within(pos, lat, lon, radius_km, km_per_deg):
+    # Flat-earth distance, longitude scaled by cos(lat) as in the Kalman frame
+    c = math.cos(math.radians(lat))
+    return {tid for tid, (a, b) in pos.items() if math.hypot(a - lat, (b - lon) * c) * km_per_deg <= radius_km}
+
+
+def _in_box(pos, box):
+    min_lat, min_lon, max_lat, max_lon = box
+    return {tid for tid, (a, b) in pos.items() if min_lat <= a <= max_lat and min_lon <= b <= max_lon}
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("centre", [0.0, 62.0, -78.0])
+def test_grid_matches_linear_scan(load_app, seed, centre):
+    spatial = load_app("track-fusion", "spatial")
+    rng = np.random.default_rng(seed)
+    cell_km = float(rng.choice([0.5, 2.0, 7.5]))
+    index = spatial.GridIndex(cell_km=cell_km)
+    pos = {}
+
+    # Straddles lon 0, so negative cell indices are exercised too; away
+    # from the equator a km spans more degrees of longitude
+    def point():
+        return centre + float(rng.uniform(-0.6, 0.6)), float(rng.uniform(-1.5, 1.5))
+
+    for step in range(600):
+        tid = f"T-{int(rng.integers(0, 150))}"
+        if rng.random() < 0.15:
+            index.remove(tid)
+            pos.pop(tid, None)
+        else:
+            pos[tid] = point()
+            index.upsert(tid, *pos[tid])
+
+        if step % 20 == 0:
+            assert len(index) == len(pos)
+            lat, lon = point()
+            radius = float(rng.uniform(0.0, 15.0))
+            found = set(index.candidates(lat, lon, radius))
+            assert found <= set(pos)
+            exact = _within(pos, lat, lon, radius, spatial.KM_PER_DEG)
+            assert found >= exact
+            assert _within({tid: pos[tid] for tid in found}, lat, lon, radius, spatial.KM_PER_DEG) == exact
+
+            a, b = sorted((lat, centre + float(rng.uniform(-0.6, 0.6))))
+            c, d = sorted((lon, float(rng.uniform(-1.5, 1.5))))
+            box = (a, c, b, d)
+            found = set(index.in_bbox(*box))
+            assert found <= set(pos)
+            assert found >= _in_box(pos, box)
+            assert _in_box({tid: pos[tid] for tid in found}, box) == _in_box(pos, box)
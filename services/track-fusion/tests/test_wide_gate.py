@@ -0,0 +1,50 @@
+"""Tracks whose gate reaches past the grid search radius still correlate."""
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _plots(lat: float, speed_mps: float, every_s: float, count: int):
+    # Anonymous plots of one target flying east, with its measured velocity
+    lon_per_s = speed_mps / (111_000.0 * math.cos(math.radians(lat)))
+    return [
+        {
+            "sensor_id": "R1",
+            "ts_utc": (T0 + timedelta(seconds=n * every_s)).isoformat(),
+            "position": {"lat": lat, "lon": 20.0 + n * every_s * lon_per_s, "alt_m": 9000.0},
+            "velocity": {"vx_mps": speed_mps, "vy_mps": 0.0, "vz_mps": 0.0},
+            "quality": {"confidence": 0.9},
+        }
+        for n in range(count)
+    ]
+
+
+@pytest.mark.parametrize("association", ["gnn", "sequential"])
+@pytest.mark.parametrize("lat", [0.0, 70.0])
+def test_fast_mover_keeps_one_track(load_app, association, lat):
+    tf = load_app("track-fusion")
+    # 600 m/s every 10 s: each plot lands 6 km past the last one, twice the search radius
+    for plot in _plots(lat, 600.0, 10.0, 12):
+        tf._ingest_local([plot], None, association)
+    assert tf.STATS["tracks_created"] == 1
+    assert len(tf.TRACKS) == 1
+
+
+def test_fast_mover_claimed_by_its_shard(load_app):
+    tf = load_app("track-fusion")
+    plots = _plots(70.0, 600.0, 10.0, 3)
+    tf._ingest_local(plots[:2], None, "gnn")
+    assert tf._claim_local(plots[2:]) == [0]
+
+
+def test_coasting_track_reach_grows(load_app):
+    tf = load_app("track-fusion")
+    tf._ingest_local(_plots(70.0, 50.0, 10.0, 2), None, "gnn")
+    t = tf.TRACKS.kf.t.max()
+    with tf.TRACKS.lock:
+        assert tf._wide_tracks(t, 0.9)[0] == []
+        ids, _, _, reach = tf._wide_tracks(t + 120.0, 0.9)
+    assert len(ids) == 1 and reach[0] > tf._SEARCH_KM